@@ -0,0 +1,30 @@
+"""Add rolling summary columns to chat_sessions
+
+Revision ID: 4c1e7b9a2d53
+Revises: 975eed345791
+Create Date: 2026-10-17 10:12:44.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c1e7b9a2d53'
+down_revision: Union[str, Sequence[str], None] = '975eed345791'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chat_sessions', sa.Column('summary', sa.Text(), nullable=True))
+    op.add_column('chat_sessions', sa.Column('summary_through_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('chat_sessions', 'summary_through_id')
+    op.drop_column('chat_sessions', 'summary')
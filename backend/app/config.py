@@ -14,6 +14,111 @@ class Settings(BaseSettings):
     MAIL_SERVER: str
     MAIL_TLS: bool
     MAIL_SSL: bool
+    debug_endpoints_enabled: bool = False  # serve GET /metrics and /debug/traces; unauthenticated, so only on a private port
+
+    # RAG pipeline
+    rag_index_dir: str = "./chroma_db_final"  # vectors, parent chunks, BM25 index and manifest
+    rag_index_read_only: bool = False  # open a prebuilt index instead of syncing it (multi-worker deploys)
+    rag_retrieval_mode: str = "local"  # "remote": use the shared retrieval server instead of loading the model per worker
+    rag_retrieval_socket: str = "/tmp/college-ai-retrieval.sock"
+    rag_retrieval_ipc_timeout: float = 6.0  # seconds per retrieval server call; keep above rag_retrieval_timeout
+    rag_retriever: str = "hybrid"  # "dense" (vectors only), "lexical" (BM25 only) or "hybrid" (both, fused with RRF)
+    rag_retrieval_k: int = 3  # parent chunks passed to the prompt
+    rag_directory_fast_path: bool = True  # answer HOD/faculty lookups from the parsed faculty directory
+    rag_directory_llm_phrasing: bool = False  # phrase directory answers with the LLM instead of returning them as-is
+    rag_router_enabled: bool = True  # false: web search for every multi-word question, as before
+    rag_router_margin: float = 0.02  # KB centroid must beat the web centroid by this much to skip web search
+    rag_prompt_tokenizer: str = "BAAI/bge-base-en-v1.5"  # local tokenizer for prompt budgets; empty or missing: an estimate
+    rag_prompt_history_tokens: int = 600
+    rag_prompt_db_tokens: int = 1200
+    rag_prompt_web_tokens: int = 500
+    rag_prompt_summary_tokens: int = 250
+    rag_summary_enabled: bool = True  # fold older turns into a rolling per-session summary
+    rag_summary_model: str = "llama-3.1-8b-instant"  # Groq model that writes the summaries
+    rag_summary_verbatim_turns: int = 1  # newest turns always kept word for word next to the summary
+    rag_summary_fold_turns: int = 2  # fold once this many turns are pending beyond the verbatim ones
+    rag_summary_max_words: int = 120
+    rag_history_turns: int = 6  # previous Q&A turns of the session included in the prompt
+    rag_history_cache_sessions: int = 1000  # sessions whose recent turns are kept in memory
+    rag_history_cache_ttl: float = 300  # seconds an idle session stays cached (reads always check chat_messages)
+    rag_executor_workers: int = 4  # threads for embedding/retrieval work off the event loop
+    rag_search_workers: int = 4  # threads for web searches, kept apart so slow searches can't starve retrieval
+    rag_retrieval_timeout: float = 5.0  # seconds; internal DB context is dropped past this
+    rag_web_search_timeout: float = 4.0  # seconds; web context is dropped past this (also the DuckDuckGo client timeout)
+    rag_search_cache_size: int = 512
+    rag_search_cache_ttl: float = 3600  # seconds
+    rag_search_rate_per_second: float = 1.0  # outbound DuckDuckGo calls, shared by all requests
+    rag_search_burst: int = 3
+    rag_embedding_backend: str = "torch"  # "onnx" (fp32) or "onnx-int8" (dynamically quantized) run on ONNX Runtime;
+    # "fake": hashed random vectors, nothing downloaded (tests only; retrieval results are meaningless)
+    rag_embedding_onnx_dir: str = "./onnx_models"  # ONNX exports, created on first use
+    rag_embedding_threads: int = 0  # ONNX Runtime intra-op threads; 0 uses every core
+    rag_parent_chunk_size: int = 2000  # characters; parents are split on "\n=== " section headers first
+    rag_parent_chunk_overlap: int = 200
+    rag_child_chunk_size: int = 400  # the embedded unit; retrieval returns the parent
+    rag_child_chunk_overlap: int = 100  # changing any chunk setting rebuilds the index (compare: bench_retrieval_sweep)
+    rag_vector_store: str = "chroma"  # "faiss": memory-mapped FAISS index shared by read-only workers
+    rag_faiss_index: str = "hnsw"  # "flat" (exact), "hnsw" or "ivfpq"
+    rag_faiss_dtype: str = "float16"  # flat/hnsw vector storage: "float16" or "float32"
+    rag_faiss_pq_m: int = 48  # ivfpq: one-byte PQ codes per vector
+    rag_faiss_ef_search: int = 64  # hnsw: candidates per query
+    rag_faiss_nprobe: int = 8  # ivfpq: inverted lists scanned per query
+    rag_query_embedding_cache_size: int = 1024
+    rag_embedding_batch_window_ms: float = 2.0  # how long a query waits for others to share its encode
+    rag_embedding_max_batch: int = 32  # 1 disables micro-batching
+    rag_answer_cache_size: int = 256
+    rag_answer_cache_threshold: float = 0.95  # cosine similarity between first-turn questions
+    rag_answer_cache_ttl: float = 86400  # seconds; answers also carry live web results
+    rag_llm_backend: str = "groq"  # "fake": local stand-in with the latency below (load tests; no Groq quota used)
+    rag_search_backend: str = "duckduckgo"  # "fake": local stand-in (load tests; apsit.edu.in is not searched)
+    rag_fake_llm_latency: float = 1.0  # seconds to first token (median)
+    rag_fake_llm_jitter: float = 0.3  # lognormal shape of the latency; 0: always the median
+    rag_fake_llm_tokens_per_second: float = 50.0
+    rag_fake_llm_answer_words: int = 150
+    rag_fake_llm_max_concurrency: int = 0  # calls served at once, like a provider rate limit; 0: unlimited
+    rag_fake_search_latency: float = 0.8  # seconds (median)
+    rag_fake_search_jitter: float = 0.5
+    rag_llm_single_flight: bool = True  # identical prompts in flight at the same time share one Groq call
+    rag_llm_base_url: str = ""  # Groq API base URL override (e.g. a local fake server); empty: the SDK default
+    rag_llm_timeout: float = 20.0  # seconds per attempt; for streams, seconds to each next chunk
+    rag_llm_max_attempts: int = 3  # retryable failures (timeouts, 429, 5xx) are retried up to this many attempts
+    rag_llm_backoff_base: float = 0.5  # seconds; full-jitter backoff, doubled per retry
+    rag_llm_backoff_max: float = 4.0
+    rag_llm_breaker_failures: int = 5  # consecutive failed attempts that open the circuit (calls then fail fast)
+    rag_llm_breaker_reset: float = 30.0  # seconds open before one probe call is let through
+    rag_llm_max_connections: int = 20  # Groq HTTP connection pool
+    rag_llm_keepalive_connections: int = 10
+    rag_llm_keepalive_expiry: float = 30.0  # seconds an idle connection is kept open
+    rag_admission_enabled: bool = True  # cap answers generated at once; excess requests queue, then get 503
+    rag_admission_max_in_flight: int = 16  # answers (retrieval + search + Groq) generated at once per worker
+    rag_admission_per_user: int = 2  # questions one user may have in progress or queued; more get 429
+    rag_admission_max_queue: int = 64  # requests waiting for a slot; beyond this: 503 with Retry-After
+    rag_admission_queue_timeout: float = 10.0  # seconds a request may wait for a slot before a 503
+    rag_trace_enabled: bool = True  # per-request span traces (router, service, RAG stages, SQL)
+    rag_trace_sample_rate: float = 0.1  # share of requests whose trace is kept; slow or failed ones always are
+    rag_trace_slow_ms: float = 2000.0  # requests at least this slow are always kept
+    rag_trace_exporter: str = "memory"  # "memory": last traces kept for GET /debug/traces; "log": one JSON log line each
+    rag_trace_buffer_size: int = 200  # traces kept by the memory exporter
+    rag_trace_max_spans: int = 500  # spans per trace; more are counted as dropped
+
+    @property
+    def rag_faiss_options(self) -> dict:
+        return {
+            "index_type": self.rag_faiss_index,
+            "dtype": self.rag_faiss_dtype,
+            "pq_m": self.rag_faiss_pq_m,
+            "ef_search": self.rag_faiss_ef_search,
+            "nprobe": self.rag_faiss_nprobe,
+        }
+
+    @property
+    def rag_chunking(self) -> dict:
+        return {
+            "parent_chunk_size": self.rag_parent_chunk_size,
+            "parent_chunk_overlap": self.rag_parent_chunk_overlap,
+            "child_chunk_size": self.rag_child_chunk_size,
+            "child_chunk_overlap": self.rag_child_chunk_overlap,
+        }
     
     class Config:
         env_file = ".env"
@@ -1,12 +1,35 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from .config import settings
+from .utils.metrics import Gauge, registry
+from .utils.tracing import instrument_sqlalchemy, tracer
 
 engine = create_async_engine(settings.database_url, echo=True)
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+# Every statement becomes a "sql" span of the request that ran it
+instrument_sqlalchemy(engine.sync_engine, tracer)
 
 Base = declarative_base()
 
+
+def _collect_pool_metrics():
+    # Only queue pools (Postgres, file SQLite) have a size; NullPool/StaticPool report nothing
+    pool = engine.sync_engine.pool
+    if not hasattr(pool, "checkedout"):
+        return []
+    size = Gauge("db_pool_size", "Connections the pool keeps open")
+    size.set(pool.size())
+    checked_out = Gauge("db_pool_checked_out", "Connections in use by a request")
+    checked_out.set(pool.checkedout())
+    checked_in = Gauge("db_pool_checked_in", "Idle connections in the pool")
+    checked_in.set(pool.checkedin())
+    overflow = Gauge("db_pool_overflow", "Connections open beyond the pool size")
+    overflow.set(max(0, pool.overflow()))
+    return [size, checked_out, checked_in, overflow]
+
+
+registry.register_collector(_collect_pool_metrics)
+
 async def get_db():
     async with async_session() as session:
         try:
@@ -1,6 +1,12 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from .config import settings
 from .routers import auth, chat, chat_sessions, password_reset
+from .services.admission import admission
+from .services.rag import rag_service
+from .utils.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from .utils.tracing import TracingMiddleware, trace_buffer, tracer
 
 app = FastAPI(
     title="College AI Chatbot",
@@ -15,6 +21,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware, tracer=tracer)
 
 # Include routers
 app.include_router(auth.router)
@@ -28,4 +36,35 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    # Queue depth and rejections, so a load balancer or dashboard can see overload coming
+    return {"status": "healthy", "admission": admission.stats()}
+
+if settings.debug_endpoints_enabled:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        # Prometheus text format: per-stage latency, LLM tokens, cache hit ratios, DB pool, in-flight requests
+        return Response(registry.render(), media_type=CONTENT_TYPE)
+
+    @app.get("/debug/traces", include_in_schema=False)
+    async def list_traces(limit: int = 50):
+        # Newest kept traces (sampled, slow or failed) from the in-memory exporter
+        return {
+            "tracing": tracer.stats(),
+            "traces": [
+                {key: trace[key] for key in ("trace_id", "name", "started_at", "duration_ms", "status", "span_count")}
+                for trace in trace_buffer.traces()[:limit]
+            ],
+        }
+
+    @app.get("/debug/traces/{trace_id}", include_in_schema=False)
+    async def get_trace(trace_id: str):
+        trace = trace_buffer.get(trace_id)
+        if trace is None:
+            raise HTTPException(status_code=404, detail="Trace not found (not kept, or already evicted)")
+        return trace
+
+    @app.post("/debug/knowledge-base/refresh", include_in_schema=False)
+    async def refresh_knowledge_base():
+        # Picks up edits to college_data without a restart; only this worker (or the retrieval server) is refreshed
+        kb_version = await asyncio.to_thread(rag_service.refresh_knowledge_base)
+        return {"kb_version": kb_version}
@@ -11,6 +11,8 @@ class ChatSession(Base):
     title = Column(String, nullable=False, default="New Chat")
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    summary = Column(Text, nullable=True)  # rolling summary of the turns older than the verbatim window
+    summary_through_id = Column(Integer, nullable=True)  # last chat_messages.id folded into summary
     
     user = relationship("User", back_populates="chat_sessions")
     messages = relationship("ChatMessage", back_populates="chat_session", cascade="all, delete-orphan")
@@ -1,13 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
 from ..schemas.chat_session import (
     ChatSessionCreate, ChatSessionResponse, ChatSessionDetail, 
     ChatSessionList, ChatMessageCreate, ChatMessageResponse)
+from ..services.admission import AdmissionSlot, Overloaded, admission
 from ..services.chat_session import ChatSessionService
 from ..services.auth import AuthService
 from ..utils.security import verify_token
+import json
 import logging
 import traceback
 
@@ -16,6 +20,30 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/chat-sessions", tags=["chat-sessions"])
 security = HTTPBearer()
 
+def _sse_response(events, slot: AdmissionSlot) -> StreamingResponse:
+    """Wrap (event, data) pairs from the service as a Server-Sent Events response.
+    The admission slot is held until the stream ends (or the client goes away)"""
+    async def event_stream():
+        try:
+            async for event, data in events:
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        except Exception as e:
+            logger.error(f"Error while streaming answer: {e}")
+            logger.error(f"Traceback: {traceback.format_exc()}")
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+        finally:
+            slot.release()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(slot.release),  # in case the stream never started
+    )
+
+def _overloaded(e: Overloaded) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)):
@@ -50,9 +78,10 @@ async def start_chat_session(
     try:
         logger.info(f"Starting new chat session for user {user.id} with message: {message.question[:50]}...")
         
-        session_response, message_response = await ChatSessionService.create_session_with_first_message(
-            user.id, message.question, db
-        )
+        async with await admission.acquire(user.id):
+            session_response, message_response = await ChatSessionService.create_session_with_first_message(
+                user.id, message.question, db
+            )
         
         logger.info(f"Chat session started: {session_response.id} with title: {session_response.title}")
         
@@ -60,11 +89,31 @@ async def start_chat_session(
             "session": session_response,
             "message": message_response
         }
+    except Overloaded as e:
+        raise _overloaded(e)
     except Exception as e:
         logger.error(f"Error starting chat session: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Failed to start chat session: {str(e)}")
 
+@router.post("/start/stream")
+async def start_chat_session_stream(
+    message: ChatMessageCreate,
+    user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)):
+    """Start a new chat session and stream the first answer as Server-Sent Events"""
+    try:
+        slot = await admission.acquire(user.id)
+    except Overloaded as e:
+        raise _overloaded(e)
+    try:
+        events = await ChatSessionService.stream_session_with_first_message(user.id, message.question, db)
+    except Exception as e:
+        slot.release()
+        logger.error(f"Error starting chat session: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to start chat session: {str(e)}")
+    return _sse_response(events, slot)
+
 @router.get("", response_model=ChatSessionList)
 async def get_chat_sessions(
     user=Depends(get_current_user),
@@ -102,12 +151,37 @@ async def send_message_to_session(
     db: AsyncSession = Depends(get_db)):
     """Send a message to a specific chat session"""
     try:
-        return await ChatSessionService.add_message_to_session(session_id, user.id, message.question, db)
+        async with await admission.acquire(user.id):
+            return await ChatSessionService.add_message_to_session(session_id, user.id, message.question, db)
+    except Overloaded as e:
+        raise _overloaded(e)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error sending message: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{session_id}/messages/stream")
+async def stream_message_to_session(
+    session_id: int,
+    message: ChatMessageCreate,
+    user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)):
+    """Send a message to a chat session and stream the answer tokens as Server-Sent Events"""
+    try:
+        slot = await admission.acquire(user.id)
+    except Overloaded as e:
+        raise _overloaded(e)
+    try:
+        events = await ChatSessionService.stream_message_to_session(session_id, user.id, message.question, db)
     except ValueError as e:
+        slot.release()
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
+        slot.release()
         logger.error(f"Error sending message: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    return _sse_response(events, slot)
 
 @router.put("/{session_id}/title", response_model=ChatSessionResponse)
 async def update_session_title(
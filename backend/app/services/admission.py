@@ -0,0 +1,202 @@
+import math
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from ..config import settings
+from ..utils.metrics import Counter, Gauge, registry
+from ..utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    """A chat request was turned away; `status_code` and `retry_after` (seconds) go into the HTTP reply."""
+
+    def __init__(self, reason: str, status_code: int, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionSlot:
+    """One admitted request. `release()` frees the slot; calling it again does nothing."""
+
+    def __init__(self, controller: "AdmissionController", user_id: Optional[int]):
+        self._controller = controller
+        self.user_id = user_id
+        self.started = time.monotonic()
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self._controller._release(self)
+
+    async def __aenter__(self) -> "AdmissionSlot":
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+
+class AdmissionController:
+    """Caps how many answers are being generated at once, globally and per user.
+
+    At most `max_in_flight` requests run the RAG pipeline (retrieval, web
+    search, Groq) at a time, and each user has at most `per_user` requests
+    in flight or queued; more from the same user get a 429 at once. Beyond
+    the global cap requests wait in a FIFO queue of at most `max_queue`,
+    each for up to `queue_timeout` seconds. Once the queue is full, or a
+    request's wait runs out, it gets a 503. Every rejection carries a
+    Retry-After estimated from the queue length and recent answer times.
+    Freed slots are handed straight to the oldest waiter, so a request
+    that just arrived cannot overtake the queue.
+    """
+
+    def __init__(self, max_in_flight: int = 16, per_user: int = 2, max_queue: int = 64,
+                 queue_timeout: float = 10.0, enabled: bool = True):
+        self.max_in_flight = max_in_flight
+        self.per_user = per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.enabled = enabled
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._per_user: Dict[int, int] = {}
+        self._service_time = 5.0  # moving average of seconds a slot is held
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_user_limit = 0
+        self.timed_out = 0
+        self.max_queue_depth = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to be free, for the Retry-After header."""
+        waves = (self.queue_depth + 1) / max(1, self.max_in_flight)
+        return max(1, math.ceil(waves * self._service_time))
+
+    def _reject(self, reason: str, status_code: int) -> Overloaded:
+        logger.warning(f"🚦 Rejected ({status_code}): {reason}; in flight {self.in_flight}, queued {self.queue_depth}")
+        return Overloaded(reason, status_code, self.retry_after())
+
+    @tracer.traced("admission", attributes=("user_id",))
+    async def acquire(self, user_id: Optional[int] = None) -> AdmissionSlot:
+        """Wait for a slot (FIFO, bounded) or raise Overloaded."""
+        slot = AdmissionSlot(self, user_id)
+        if not self.enabled:
+            slot.released = True  # nothing to give back
+            return slot
+
+        if user_id is not None and self._per_user.get(user_id, 0) >= self.per_user:
+            self.rejected_user_limit += 1
+            raise self._reject(f"user {user_id} already has {self.per_user} questions in progress", 429)
+
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self._admit(slot)
+            return slot
+
+        if self.queue_depth >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise self._reject("the answer queue is full", 503)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._count_user(user_id, 1)
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            self._count_user(user_id, -1)
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended: pass it on
+                self.in_flight -= 1
+                self._wake_next()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.timed_out += 1
+            raise self._reject(f"no answer slot within {self.queue_timeout:.0f}s", 503) from None
+        self._count_user(user_id, -1)
+        self._admit(slot, counted=True)
+        return slot
+
+    def _count_user(self, user_id: Optional[int], delta: int):
+        if user_id is None:
+            return
+        count = self._per_user.get(user_id, 0) + delta
+        if count > 0:
+            self._per_user[user_id] = count
+        else:
+            self._per_user.pop(user_id, None)
+
+    def _admit(self, slot: AdmissionSlot, counted: bool = False):
+        if not counted:
+            self.in_flight += 1
+        self._count_user(slot.user_id, 1)
+        slot.started = time.monotonic()
+        self.admitted += 1
+
+    def _wake_next(self):
+        # Hand the slot over: in_flight stays the same, the waiter takes it
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+                return
+
+    def _release(self, slot: AdmissionSlot):
+        self._service_time = 0.8 * self._service_time + 0.2 * (time.monotonic() - slot.started)
+        self._count_user(slot.user_id, -1)
+        self.in_flight -= 1
+        self._wake_next()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_user_limit": self.rejected_user_limit,
+            "timed_out": self.timed_out,
+            "avg_service_seconds": round(self._service_time, 3),
+        }
+
+
+admission = AdmissionController(
+    max_in_flight=settings.rag_admission_max_in_flight,
+    per_user=settings.rag_admission_per_user,
+    max_queue=settings.rag_admission_max_queue,
+    queue_timeout=settings.rag_admission_queue_timeout,
+    enabled=settings.rag_admission_enabled,
+)
+
+
+def _collect_metrics():
+    in_flight = Gauge("admission_in_flight", "Chat answers being generated (admitted requests)")
+    in_flight.set(admission.in_flight)
+    queue_depth = Gauge("admission_queue_depth", "Chat requests waiting for an answer slot")
+    queue_depth.set(admission.queue_depth)
+    admitted = Counter("admission_admitted_total", "Chat requests given an answer slot")
+    admitted.inc(admission.admitted)
+    rejected = Counter("admission_rejected_total", "Chat requests turned away", ["reason"])
+    rejected.inc(admission.rejected_queue_full, reason="queue_full")
+    rejected.inc(admission.rejected_user_limit, reason="user_limit")
+    rejected.inc(admission.timed_out, reason="queue_timeout")
+    return [in_flight, queue_depth, admitted, rejected]
+
+
+registry.register_collector(_collect_metrics)
@@ -0,0 +1,91 @@
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    vector: np.ndarray
+    kb_version: str
+    expires_at: float
+
+
+class SemanticAnswerCache:
+    """Answers to first-turn questions, matched by cosine similarity of question embeddings.
+
+    An entry is only served for the knowledge-base version it was answered
+    against; entries past their TTL or from an older version are dropped on
+    lookup. Capacity is bounded with LRU eviction.
+    """
+
+    def __init__(self, max_entries: int = 256, threshold: float = 0.95, ttl: float = 86400):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, embedding: List[float], kb_version: str) -> Optional[CachedAnswer]:
+        query = self._unit(embedding)
+        now = time.monotonic()
+        with self._lock:
+            stale = [key for key, entry in self._entries.items()
+                     if entry.kb_version != kb_version or entry.expires_at <= now]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+            if self._entries:
+                keys = list(self._entries)
+                scores = np.stack([self._entries[key].vector for key in keys]) @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self._entries.move_to_end(keys[best])
+                    self.hits += 1
+                    return self._entries[keys[best]]
+
+            self.misses += 1
+            return None
+
+    def store(self, question: str, embedding: List[float], answer: str, kb_version: str):
+        entry = CachedAnswer(question, answer, self._unit(embedding), kb_version, time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[self._next_id] = entry
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -1,13 +1,16 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc, func
 from sqlalchemy.orm import selectinload
+from ..database import async_session
 from ..models.chat_session import ChatSession, ChatMessage
 from ..models.user import User
 from ..schemas.chat_session import ChatSessionResponse, ChatSessionDetail, ChatMessageResponse
-from .rag import rag_service
-from typing import List
+from .rag import rag_service, stage
+from ..utils.tracing import tracer
+from typing import AsyncIterator, List, Tuple
 import logging
 import re
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +46,7 @@ class ChatSessionService:
         return title
 
     @staticmethod
+    @tracer.traced(attributes=("user_id",))
     async def create_chat_session(user_id: int, title: str, db: AsyncSession) -> ChatSessionResponse:
         # For ChatGPT-like experience, always create with provided title
         # Don't auto-generate "Chat X" numbers anymore
@@ -67,6 +71,7 @@ class ChatSessionService:
         )
         
     @staticmethod
+    @tracer.traced(attributes=("user_id",))
     async def create_session_with_first_message(user_id: int, question: str, db: AsyncSession) -> tuple[ChatSessionResponse, ChatMessageResponse]:
         """Create a new session and add the first message - ChatGPT style"""
         # Generate smart title from the question
@@ -79,10 +84,11 @@ class ChatSessionService:
         )
         
         db.add(chat_session)
-        await db.flush()  # Get the ID without committing
+        with stage("db_flush"):
+            await db.flush()  # Get the ID without committing
         
         # Get AI response
-        answer = rag_service.get_response_for_session(question, user_id, chat_session.id)
+        answer = await rag_service.aget_response_for_session(question, user_id, chat_session.id)
         
         # Save the first message
         message = ChatMessage(
@@ -93,9 +99,11 @@ class ChatSessionService:
         )
         
         db.add(message)
-        await db.commit()
-        await db.refresh(chat_session)
-        await db.refresh(message)
+        with stage("db_commit"):
+            await db.commit()
+            await db.refresh(chat_session)
+            await db.refresh(message)
+        rag_service.turn_saved(user_id, chat_session.id, message.id, question, answer)
         
         session_response = ChatSessionResponse(
             id=chat_session.id,
@@ -115,6 +123,7 @@ class ChatSessionService:
         return session_response, message_response
         
     @staticmethod
+    @tracer.traced(attributes=("user_id",))
     async def get_user_chat_sessions(user_id: int, db: AsyncSession) -> List[ChatSessionResponse]:
         # Get sessions with message count - only return sessions that have messages
         result = await db.execute(
@@ -143,6 +152,7 @@ class ChatSessionService:
         ]
         
     @staticmethod
+    @tracer.traced(attributes=("session_id", "user_id"))
     async def get_chat_session_detail(session_id: int, user_id: int, db: AsyncSession) -> ChatSessionDetail:
         result = await db.execute(
             select(ChatSession)
@@ -171,17 +181,19 @@ class ChatSessionService:
         )
         
     @staticmethod
+    @tracer.traced(attributes=("session_id", "user_id"))
     async def add_message_to_session(session_id: int, user_id: int, question: str, db: AsyncSession) -> ChatMessageResponse:
         # Verify session belongs to user
-        result = await db.execute(
-            select(ChatSession).filter(ChatSession.id == session_id, ChatSession.user_id == user_id)
-        )
+        with stage("db_query"):
+            result = await db.execute(
+                select(ChatSession).filter(ChatSession.id == session_id, ChatSession.user_id == user_id)
+            )
         session = result.scalar_one_or_none()
         if not session:
             raise ValueError("Chat session not found")
             
         # Get AI response using session-specific memory
-        answer = rag_service.get_response_for_session(question, user_id, session_id)
+        answer = await rag_service.aget_response_for_session(question, user_id, session_id)
         
         # Save message
         message = ChatMessage(
@@ -196,8 +208,10 @@ class ChatSessionService:
         # Update session's updated_at timestamp
         session.updated_at = func.now()
         
-        await db.commit()
-        await db.refresh(message)
+        with stage("db_commit"):
+            await db.commit()
+            await db.refresh(message)
+        rag_service.turn_saved(user_id, session_id, message.id, question, answer)
         
         return ChatMessageResponse(
             id=message.id,
@@ -207,6 +221,99 @@ class ChatSessionService:
         )
         
     @staticmethod
+    async def _stream_answer(session_id: int, user_id: int, question: str) -> AsyncIterator[Tuple[str, dict]]:
+        """Relay answer tokens, then persist the finished message and emit it as the final event."""
+        started = time.perf_counter()
+        first_token_ms = None
+        parts = []
+
+        async for token in rag_service.astream_response_for_session(question, user_id, session_id):
+            if first_token_ms is None:
+                first_token_ms = (time.perf_counter() - started) * 1000
+                logger.info(f"⚡ Time to first token for session {session_id}: {first_token_ms:.0f}ms")
+            parts.append(token)
+            yield "token", {"token": token}
+
+        # The request-scoped session may already be closed once the response body streams,
+        # so the message is saved through a session owned by the stream itself
+        with stage("db_commit"):
+            async with async_session() as db:
+                session = await db.get(ChatSession, session_id)
+                if session is None:
+                    # Deleted while the answer was streaming; nothing left to save it to
+                    logger.warning(f"Session {session_id} was deleted mid-stream; answer not saved")
+                    raise ValueError("Chat session not found")
+                message = ChatMessage(
+                    chat_session_id=session_id,
+                    user_id=user_id,
+                    question=question,
+                    answer="".join(parts)
+                )
+                db.add(message)
+                session.updated_at = func.now()
+                await db.commit()
+                await db.refresh(message)
+        rag_service.turn_saved(user_id, session_id, message.id, question, message.answer)
+
+        total_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Streamed answer for session {session_id} in {total_ms:.0f}ms")
+
+        message_response = ChatMessageResponse(
+            id=message.id,
+            question=message.question,
+            answer=message.answer,
+            timestamp=message.timestamp
+        )
+        yield "done", {
+            "message": message_response.model_dump(mode="json"),
+            "time_to_first_token_ms": first_token_ms,
+            "total_ms": total_ms,
+        }
+
+    @staticmethod
+    async def stream_message_to_session(session_id: int, user_id: int, question: str, db: AsyncSession) -> AsyncIterator[Tuple[str, dict]]:
+        """Validate the session up front, then return the token event stream for the answer"""
+        with stage("db_query"):
+            result = await db.execute(
+                select(ChatSession).filter(ChatSession.id == session_id, ChatSession.user_id == user_id)
+            )
+        if not result.scalar_one_or_none():
+            raise ValueError("Chat session not found")
+
+        return ChatSessionService._stream_answer(session_id, user_id, question)
+
+    @staticmethod
+    async def stream_session_with_first_message(user_id: int, question: str, db: AsyncSession) -> AsyncIterator[Tuple[str, dict]]:
+        """Streaming variant of create_session_with_first_message"""
+        chat_session = ChatSession(
+            user_id=user_id,
+            title=ChatSessionService._generate_smart_title(question)
+        )
+
+        # Committed before streaming so the stream's own DB session can see it;
+        # sessions without messages are hidden from the sidebar anyway
+        db.add(chat_session)
+        with stage("db_commit"):
+            await db.commit()
+            await db.refresh(chat_session)
+
+        session_response = ChatSessionResponse(
+            id=chat_session.id,
+            title=chat_session.title,
+            created_at=chat_session.created_at,
+            updated_at=chat_session.updated_at,
+            message_count=1
+        )
+
+        async def events():
+            yield "session", session_response.model_dump(mode="json")
+            async for event in ChatSessionService._stream_answer(chat_session.id, user_id, question):
+                yield event
+
+        return events()
+
+    @staticmethod
+    @tracer.traced(attributes=("session_id", "user_id"))
     async def update_session_title(session_id: int, user_id: int, title: str, db: AsyncSession) -> ChatSessionResponse:
         result = await db.execute(
             select(ChatSession).filter(ChatSession.id == session_id, ChatSession.user_id == user_id)
@@ -230,6 +337,7 @@ class ChatSessionService:
         )
         
     @staticmethod
+    @tracer.traced(attributes=("session_id", "user_id"))
     async def delete_chat_session(session_id: int, user_id: int, db: AsyncSession) -> bool:
         result = await db.execute(
             select(ChatSession).filter(ChatSession.id == session_id, ChatSession.user_id == user_id)
@@ -238,7 +346,7 @@ class ChatSessionService:
         if not session:
             return False
             
-        # Clear session memory from RAG service
+        # Drop the session's cached turns from the RAG service
         rag_service.clear_session_memory(user_id, session_id)
         
         await db.delete(session)
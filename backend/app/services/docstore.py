@@ -0,0 +1,90 @@
+import os
+import json
+import sqlite3
+import threading
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.stores import BaseStore
+from langchain.schema import Document
+
+
+class SQLiteDocStore(BaseStore[str, Document]):
+    """Parent-chunk docstore persisted in a single SQLite file.
+
+    Replaces InMemoryStore so parents survive restarts and are not duplicated
+    per worker. The database runs in WAL mode with a memory-mapped read path,
+    so any number of processes can open it with `read_only=True` while one
+    writer (the index build) updates it, and the OS page cache backing the
+    mapping is shared between them.
+    """
+
+    def __init__(self, path: str, read_only: bool = False, mmap_size: int = 256 * 1024 * 1024):
+        self.path = path
+        self.read_only = read_only
+        self.mmap_size = mmap_size
+        # sqlite3 connections must not be shared across threads; retrieval runs on the executor
+        self._local = threading.local()
+        if not read_only:
+            self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        if self.read_only:
+            conn = sqlite3.connect(f"file:{os.path.abspath(self.path)}?mode=ro", uri=True)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS documents (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.commit()
+        conn.execute(f"PRAGMA mmap_size={self.mmap_size}")
+        self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _dumps(doc: Document) -> str:
+        return json.dumps({"page_content": doc.page_content, "metadata": doc.metadata})
+
+    @staticmethod
+    def _loads(value: str) -> Document:
+        data = json.loads(value)
+        return Document(page_content=data["page_content"], metadata=data["metadata"])
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[Document]]:
+        if not keys:
+            return []
+        placeholders = ",".join("?" * len(keys))
+        rows = self._connection().execute(
+            f"SELECT key, value FROM documents WHERE key IN ({placeholders})", list(keys)
+        ).fetchall()
+        found = {key: value for key, value in rows}
+        return [self._loads(found[key]) if key in found else None for key in keys]
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, Document]]) -> None:
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO documents (key, value) VALUES (?, ?)",
+                [(key, self._dumps(doc)) for key, doc in key_value_pairs],
+            )
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        conn = self._connection()
+        with conn:
+            conn.executemany("DELETE FROM documents WHERE key = ?", [(key,) for key in keys])
+
+    def yield_keys(self, prefix: Optional[str] = None) -> Iterator[str]:
+        if prefix is None:
+            rows = self._connection().execute("SELECT key FROM documents ORDER BY key")
+        else:
+            rows = self._connection().execute(
+                "SELECT key FROM documents WHERE substr(key, 1, ?) = ? ORDER BY key", (len(prefix), prefix)
+            )
+        for (key,) in rows:
+            yield key
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
@@ -0,0 +1,257 @@
+import os
+import json
+import queue
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Tuple
+
+import numpy as np
+from langchain_community.embeddings import SentenceTransformerEmbeddings
+from langchain_core.embeddings import Embeddings
+
+from ..config import settings
+from ..utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+ONNX_FP32_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+ONNX_META_FILE = "export.json"
+
+
+class BatchingEmbeddings(Embeddings):
+    """Query-side wrapper around an embedding model: LRU cache plus micro-batching.
+
+    `embed_query` first checks an LRU cache keyed by the whitespace-normalized
+    text. Misses are queued for a single worker thread, which waits up to
+    `batch_window_ms` for more queries (or until `max_batch_size`), then runs
+    them through one `embed_documents` call, i.e. one batched `encode`.
+    Queries that arrive while a batch is encoding form the next batch.
+    `embed_documents` (ingest) goes straight to the wrapped model.
+    """
+
+    def __init__(self, base: Embeddings, cache_size: int = 1024,
+                 batch_window_ms: float = 2.0, max_batch_size: int = 32):
+        self.base = base
+        self.cache = TTLCache(maxsize=cache_size, ttl=None) if cache_size > 0 else None
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = max_batch_size
+
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self.batches = 0
+        self.batched_queries = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.split())
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.normalize(text)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return list(cached)
+
+        if self.max_batch_size <= 1:
+            vector = self.base.embed_query(key)
+        else:
+            future: Future = Future()
+            self._ensure_worker()
+            self._queue.put((key, future))
+            vector = future.result()
+
+        if self.cache is not None:
+            self.cache.set(key, tuple(vector))
+        return vector
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run_batches, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect_batch(self) -> List[Tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run_batches(self):
+        while True:
+            batch = self._collect_batch()
+            # Identical texts in one batch are encoded once
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = dict(zip(texts, self.base.embed_documents(texts)))
+            except Exception as e:
+                logger.error(f"Batched query embedding failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.batched_queries += len(batch)
+            for text, future in batch:
+                future.set_result(vectors[text])
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            **(self.cache.stats() if self.cache is not None else {}),
+            "batches": self.batches,
+            "batched_queries": self.batched_queries,
+            "avg_batch_size": self.batched_queries / self.batches if self.batches else 0.0,
+        }
+
+
+class OnnxEmbeddings(Embeddings):
+    """Sentence embeddings from an ONNX export of a Hugging Face encoder, run on ONNX Runtime.
+
+    The model is exported once into `cache_dir` (this step needs torch and
+    onnx) together with its tokenizer; with `quantize=True` the export is
+    also dynamically quantized to int8 weights. Afterwards only onnxruntime
+    and tokenizers are used. Pooling and normalization match the
+    sentence-transformers config of the bge models: the [CLS] vector,
+    L2-normalized. Texts are encoded in batches of similar length so little
+    padding is computed.
+    """
+
+    def __init__(self, model_name: str = "BAAI/bge-base-en-v1.5", quantize: bool = True,
+                 cache_dir: str = "./onnx_models", pooling: str = "cls", max_length: int = 512,
+                 batch_size: int = 32, threads: int = 0):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.pooling = pooling
+        self.batch_size = batch_size
+        self.model_dir = os.path.join(cache_dir, model_name.replace("/", "__"))
+        model_path = os.path.join(self.model_dir, ONNX_INT8_FILE if quantize else ONNX_FP32_FILE)
+        if not os.path.exists(model_path):
+            export_onnx_model(model_name, self.model_dir, quantize=quantize)
+
+        with open(os.path.join(self.model_dir, ONNX_META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=meta["pad_token_id"], pad_token=meta["pad_token"])
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        features = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        hidden = self.session.run(None, {name: features[name] for name in self.input_names})[0]
+        if self.pooling == "cls":
+            vectors = hidden[:, 0]
+        else:
+            mask = features["attention_mask"][:, :, None].astype(hidden.dtype)
+            vectors = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = np.empty((len(texts), 0), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            encoded = self._encode_batch([texts[i] for i in batch])
+            if not vectors.shape[1]:
+                vectors = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+            vectors[batch] = encoded
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def export_onnx_model(model_name: str, output_dir: str, quantize: bool = True):
+    """Export a Hugging Face encoder and its tokenizer to ONNX, optionally with an int8 copy."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, ONNX_FP32_FILE)
+    if not os.path.exists(fp32_path):
+        logger.info(f"Exporting {model_name} to ONNX in {output_dir}")
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModel.from_pretrained(model_name).eval()
+        sample = tokenizer(["export sample"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+        class LastHiddenState(torch.nn.Module):
+            def __init__(self, encoder):
+                super().__init__()
+                self.encoder = encoder
+
+            def forward(self, *inputs):
+                return self.encoder(**dict(zip(input_names, inputs))).last_hidden_state
+
+        axes = {0: "batch", 1: "sequence"}
+        with torch.no_grad():
+            torch.onnx.export(
+                LastHiddenState(model), tuple(sample[name] for name in input_names), fp32_path + ".tmp",
+                input_names=input_names, output_names=["last_hidden_state"],
+                dynamic_axes={name: axes for name in input_names + ["last_hidden_state"]},
+                opset_version=17, dynamo=False,
+            )
+        os.replace(fp32_path + ".tmp", fp32_path)
+        tokenizer.backend_tokenizer.save(os.path.join(output_dir, "tokenizer.json"))
+        with open(os.path.join(output_dir, ONNX_META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"model_name": model_name, "pad_token": tokenizer.pad_token,
+                       "pad_token_id": tokenizer.pad_token_id}, f, indent=2)
+
+    int8_path = os.path.join(output_dir, ONNX_INT8_FILE)
+    if quantize and not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info(f"Quantizing {fp32_path} to int8")
+        quantize_dynamic(fp32_path, int8_path + ".tmp", weight_type=QuantType.QInt8)
+        os.replace(int8_path + ".tmp", int8_path)
+
+
+def create_embeddings(backend: str = "torch", model_name: str = "BAAI/bge-base-en-v1.5") -> Embeddings:
+    """The embedding model for `backend`: "torch" (sentence-transformers), "onnx", "onnx-int8",
+    or "fake" (deterministic vectors from a hash of the text, for tests that must not download bge-base)."""
+    if backend == "fake":
+        from langchain_community.embeddings import DeterministicFakeEmbedding
+        return DeterministicFakeEmbedding(size=768)
+    if backend == "torch":
+        return SentenceTransformerEmbeddings(model_name=model_name)
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEmbeddings(model_name, quantize=backend == "onnx-int8", cache_dir=settings.rag_embedding_onnx_dir,
+                              threads=settings.rag_embedding_threads)
+    raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {EMBEDDING_BACKENDS} or 'fake'")
+
+
+def create_query_embeddings(model_name: str = "BAAI/bge-base-en-v1.5") -> BatchingEmbeddings:
+    """Load the configured embedding backend behind the query cache and micro-batcher."""
+    return BatchingEmbeddings(
+        create_embeddings(settings.rag_embedding_backend, model_name),
+        cache_size=settings.rag_query_embedding_cache_size,
+        batch_window_ms=settings.rag_embedding_batch_window_ms,
+        max_batch_size=settings.rag_embedding_max_batch,
+    )
@@ -0,0 +1,350 @@
+import os
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+FACULTY_FILE = "faculty_all_departments.txt"
+IT_FACULTY_FILE = "IT_Teachers.txt"
+HOD_ROLE = "Head of Department (HOD)"
+
+_TITLES = {"dr", "prof", "mr", "mrs", "ms"}
+# A surname on its own only names a person right after one of these or right before an honorific;
+# otherwise ordinary words that happen to be surnames (Jain minority, Oak tree) would match
+_BEFORE_SURNAME = [["who", "is"], ["contact"]] + [[title] for title in _TITLES]
+_AFTER_SURNAME = [["sir"], ["madam"], ["maam"], ["mam"], ["ma", "am"]]
+_HEAD_WORDS = {"hod", "hods", "head", "heads", "headed", "incharge"}
+_TEACH_WORDS = {"teach", "teaches", "teaching", "subject", "subjects"}
+# Everything else a pure lookup may say besides names, departments and the words above; any other word
+# ("fee", "leave", "approval") means the question asks for more than the table holds
+_LOOKUP_WORDS = {
+    "who", "whos", "what", "which", "is", "are", "was", "the", "a", "an", "of", "for", "in", "at", "to", "and",
+    "does", "do", "can", "you", "i", "me", "tell", "about", "give", "show", "list", "name", "names", "know",
+    "please", "pls", "all", "each", "every", "our", "current", "currently", "present", "s", "apsit", "college",
+    "department", "departments", "dept", "dean", "deans", "contact", "details", "email", "number", "phone",
+}
+# Departments a head word may be "of" without naming one of ours ("HODs of all departments", "hod of apsit")
+_GENERAL_UNITS = {"all", "each", "every", "apsit", "college", "department", "departments", "dept"}
+# Aliases that are also everyday words ("is it allowed"); they only name a department in upper case
+# or right next to "dept"/"department"/"of"
+_CONTEXT_ALIASES = {"it", "fe"}
+_DEPARTMENT_CONTEXT = {"dept", "department", "of"}
+_TOKEN_RE = re.compile(r"[a-z0-9&]+")
+_CASED_TOKEN_RE = re.compile(r"[A-Za-z0-9&]+")
+
+# faculty_all_departments.txt
+_SECTION_RE = re.compile(r"^===\s*(?P<name>.+?)\s+DEPARTMENT\s*===$")
+_HOD_RE = re.compile(
+    r"^The Head of Department \(HOD\) for (?P<dept>.+?) is (?P<name>.+?), "
+    r"with (?P<years>\d+) years of experience(?: and (?:is currently )?(?P<qual>.+?))?\.$")
+_JOINT_HEADS_RE = re.compile(r"^The (?P<dept>.+?) Department is jointly headed by (?P<heads>.+)\.$")
+_JOINT_HEAD_RE = re.compile(r"(?P<name>(?:Dr|Prof|Mr|Mrs|Ms)\. [^(]+?) \((?P<years>\d+) years? experience, (?P<qual>[^)]+)\)")
+_SENIOR_RE = re.compile(
+    r"^The senior faculty includes (?P<name>.+?), who is an? (?P<role>.+?) "
+    r"with (?P<years>\d+) years of experience and (?P<qual>.+?)\.$")
+_MEMBER_RE = re.compile(r"^- (?P<name>.+?), (?P<role>[A-Za-z ]+?) \((?P<years>\d+) years?, (?P<qual>.+)\)$")
+
+# IT_Teachers.txt
+_IT_HOD_RE = re.compile(r"^Head of Department \(HOD\): (?P<name>.+?)\. Contact: (?P<contact>\S+)$")
+_IT_DEAN_RE = re.compile(r"^(?P<role>Dean [A-Za-z ]+): (?P<name>.+)$")
+_TEACHES_RE = re.compile(r"^(?P<name>(?:Dr|Prof|Mr|Mrs|Ms)\. .+?)(?: \([^)]*\))? teaches (?P<subjects>.+?)\.?$")
+
+# The CSE specialisations win over plain "computer" when both are mentioned
+_DEPARTMENT_ALIASES = [
+    ("CSE (AI & ML)", ["aiml", "ai ml", "ai & ml", "ai and ml", "artificial intelligence", "machine learning"]),
+    ("CSE (Data Science)", ["data science", "ds"]),
+    ("Humanities and Applied Sciences", ["humanities", "applied sciences", "applied science", "first year", "fe"]),
+    ("Information Technology", ["information technology", "it"]),
+    ("Civil Engineering", ["civil"]),
+    ("Mechanical Engineering", ["mechanical", "mech"]),
+    ("Computer Engineering", ["computer", "comp", "comps"]),
+]
+_CSE_SPECIALISATIONS = {"CSE (AI & ML)", "CSE (Data Science)"}
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _name_parts(name: str) -> List[str]:
+    return [t for t in _tokens(name) if t not in _TITLES and len(t) > 1]
+
+
+def _name_key(name: str) -> FrozenSet[str]:
+    """Identity of a person across files: name tokens without titles and initials."""
+    return frozenset(_name_parts(name))
+
+
+def _qualification(text: str) -> str:
+    return (text or "").replace("a PhD", "PhD")
+
+
+@dataclass
+class FacultyMember:
+    name: str
+    department: str
+    role: str
+    experience_years: Optional[int] = None
+    qualification: str = ""
+    other_roles: List[str] = field(default_factory=list)
+    contact: str = ""
+    teaches: str = ""
+
+    @property
+    def surname(self) -> str:
+        parts = _name_parts(self.name)
+        return parts[-1] if parts else ""
+
+    def describe(self) -> str:
+        if self.role == HOD_ROLE:
+            text = f"{self.name} is the {self.role} of {self.department}"
+        else:
+            article = "an" if self.role[0] in "AEIOU" else "a"
+            text = f"{self.name} is {article} {self.role} in the {self.department} department"
+        if self.experience_years is not None:
+            text += f", with {self.experience_years} years of experience"
+            if self.qualification:
+                text += f" ({self.qualification})"
+        text += "."
+        if self.other_roles:
+            text += f" Also {', '.join(self.other_roles)}."
+        if self.contact:
+            text += f" Contact: {self.contact}."
+        return text
+
+
+@dataclass
+class DirectoryAnswer:
+    kind: str  # "hod", "hod_list", "person", "teaches", "dean"
+    text: str
+    members: List[FacultyMember]
+
+
+class FacultyDirectory:
+    """Departments, roles and people parsed from the faculty files in college_data.
+
+    `answer` resolves HOD/dean and person lookups straight from this table, so
+    the most common "who is ..." questions need neither retrieval, web search
+    nor the LLM. Anything it cannot match exactly returns None and takes the
+    normal RAG path.
+    """
+
+    def __init__(self, members: Optional[List[FacultyMember]] = None):
+        self.members: List[FacultyMember] = []
+        self._by_key: Dict[FrozenSet[str], FacultyMember] = {}
+        self._by_surname: Dict[str, List[FacultyMember]] = {}
+        for member in members or []:
+            self._add(member)
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def _add(self, member: FacultyMember) -> FacultyMember:
+        key = _name_key(member.name)
+        existing = self._by_key.get(key)
+        if existing is not None:
+            return existing
+        self.members.append(member)
+        self._by_key[key] = member
+        self._by_surname.setdefault(member.surname, []).append(member)
+        return member
+
+    def find(self, name: str) -> Optional[FacultyMember]:
+        return self._by_key.get(_name_key(name))
+
+    def heads(self, department: Optional[str] = None) -> List[FacultyMember]:
+        return [m for m in self.members if m.role == HOD_ROLE and department in (None, m.department)]
+
+    # --- Ingestion ---
+    @classmethod
+    def load(cls, data_dir: str = "college_data") -> "FacultyDirectory":
+        directory = cls()
+        faculty_path = os.path.join(data_dir, FACULTY_FILE)
+        it_path = os.path.join(data_dir, IT_FACULTY_FILE)
+        if os.path.exists(faculty_path):
+            directory._parse_faculty_file(faculty_path)
+        if os.path.exists(it_path):
+            directory._parse_it_file(it_path)
+        logger.info(f"📇 Faculty directory: {len(directory)} people, {len(directory.heads())} HODs")
+        return directory
+
+    @staticmethod
+    def _read_lines(path: str) -> List[str]:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            return [line.strip() for line in f]
+
+    def _parse_faculty_file(self, path: str):
+        department = None
+        for line in self._read_lines(path):
+            section = _SECTION_RE.match(line)
+            if section:
+                department = section.group("name").title()
+                continue
+            if department is None:
+                continue
+
+            hod = _HOD_RE.match(line)
+            if hod:
+                department = hod.group("dept")
+                self._add(FacultyMember(hod.group("name"), department, HOD_ROLE,
+                                        int(hod.group("years")), _qualification(hod.group("qual"))))
+                continue
+            joint = _JOINT_HEADS_RE.match(line)
+            if joint:
+                department = joint.group("dept")
+                for head in _JOINT_HEAD_RE.finditer(joint.group("heads")):
+                    self._add(FacultyMember(head.group("name"), department, HOD_ROLE,
+                                            int(head.group("years")), head.group("qual")))
+                continue
+            senior = _SENIOR_RE.match(line) or _MEMBER_RE.match(line)
+            if senior:
+                self._add(FacultyMember(senior.group("name"), department, senior.group("role"),
+                                        int(senior.group("years")), _qualification(senior.group("qual"))))
+
+    def _parse_it_file(self, path: str):
+        department = "Information Technology"
+        for line in self._read_lines(path):
+            hod = _IT_HOD_RE.match(line)
+            if hod:
+                member = self._add(FacultyMember(hod.group("name"), department, HOD_ROLE))
+                member.contact = hod.group("contact")
+                continue
+            dean = _IT_DEAN_RE.match(line)
+            if dean:
+                member = self._add(FacultyMember(dean.group("name"), department, dean.group("role")))
+                if member.role != dean.group("role"):
+                    member.other_roles.append(dean.group("role"))
+                continue
+            teaches = _TEACHES_RE.match(line)
+            if teaches:
+                member = self._add(FacultyMember(teaches.group("name"), department, "Faculty member"))
+                member.teaches = teaches.group("subjects")
+
+    # --- Lookup ---
+    @staticmethod
+    def _positions(tokens: List[str], phrase: List[str]) -> List[int]:
+        return [i for i in range(len(tokens) - len(phrase) + 1) if tokens[i:i + len(phrase)] == phrase]
+
+    @staticmethod
+    def _alias_in_context(tokens: List[str], cased: List[str], i: int) -> bool:
+        if cased[i].isupper():
+            return True
+        return bool({tokens[j] for j in (i - 1, i + 1) if 0 <= j < len(tokens)} & _DEPARTMENT_CONTEXT)
+
+    @classmethod
+    def _department_in(cls, tokens: List[str], cased: List[str]) -> Optional[str]:
+        """The department named in the question; if several are, the one nearest "hod"/"head"."""
+        found = {}  # department -> (distance to a head word, -alias length)
+        heads = [i for i, token in enumerate(tokens) if token in _HEAD_WORDS]
+        for department, aliases in _DEPARTMENT_ALIASES:
+            for alias in aliases:
+                phrase = _tokens(alias)
+                for i in cls._positions(tokens, phrase):
+                    if alias in _CONTEXT_ALIASES and not cls._alias_in_context(tokens, cased, i):
+                        continue
+                    distance = min((abs(i - h) for h in heads), default=0)
+                    rank = (distance, -len(phrase))
+                    if department not in found or rank < found[department]:
+                        found[department] = rank
+        if _CSE_SPECIALISATIONS & set(found):
+            found.pop("Computer Engineering", None)
+        return min(found, key=found.get) if found else None
+
+    @staticmethod
+    def _names_other_unit(tokens: List[str]) -> bool:
+        """Whether "hod of ..." goes on to name something other than a department of ours or the college
+        (training and placement, exam cell); only asked once no known department matched."""
+        for i, token in enumerate(tokens):
+            if token not in _HEAD_WORDS:
+                continue
+            rest = tokens[i + 1:]
+            if rest[:2] in (["of", "department"], ["of", "dept"]):
+                rest = rest[2:]
+            if rest[:1] != ["of"]:
+                continue
+            rest = [t for t in rest[1:] if t != "the"]
+            if rest and rest[0] not in _GENERAL_UNITS:
+                return True
+        return False
+
+    @staticmethod
+    def _only_lookup(tokens: List[str], named: Set[str]) -> bool:
+        """Whether every word is part of a directory lookup; compound questions ("the fee for comps and
+        who is the HOD of civil") need the normal path, or their other part would go unanswered."""
+        allowed = _LOOKUP_WORDS | _HEAD_WORDS | _TEACH_WORDS | _TITLES | named
+        allowed |= {t for cue in _AFTER_SURNAME for t in cue}
+        return all(token in allowed for token in tokens)
+
+    def _surname_named(self, tokens: List[str], surname: str) -> bool:
+        """Whether a bare surname is used as a name ("prof jain", "who is oak", "mali sir")."""
+        for i in self._positions(tokens, [surname]):
+            if any(tokens[max(0, i - len(cue)):i] == cue for cue in _BEFORE_SURNAME):
+                return True
+            if any(tokens[i + 1:i + 1 + len(cue)] == cue for cue in _AFTER_SURNAME):
+                return True
+        return False
+
+    def _person_in(self, tokens: List[str]) -> Optional[FacultyMember]:
+        words = set(tokens)
+        best, best_overlap = None, 0
+        for surname in words.intersection(self._by_surname):
+            namesakes = self._by_surname[surname]
+            for member in namesakes:
+                key = _name_key(member.name)
+                overlap = len(key & words)
+                # A shared surname alone (Patil, Singh, Nair, ...) is not enough
+                if overlap < len(key) and len(namesakes) > 1:
+                    continue
+                # Neither is a unique one, unless the question uses it as a name
+                if overlap < 2 and len(key) > 1 and not self._surname_named(tokens, surname):
+                    continue
+                if overlap > best_overlap:
+                    best, best_overlap = member, overlap
+        return best
+
+    def answer(self, question: str) -> Optional[DirectoryAnswer]:
+        cased = _CASED_TOKEN_RE.findall(question)
+        tokens = [token.lower() for token in cased]
+        if not tokens:
+            return None
+        words = set(tokens)
+        padded = f" {' '.join(tokens)} "
+
+        person = self._person_in(tokens)
+        if person is not None:
+            if not self._only_lookup(tokens, set(_tokens(person.name))):
+                return None
+            if words & _TEACH_WORDS and person.teaches:
+                return DirectoryAnswer("teaches", f"{person.name} teaches {person.teaches}.", [person])
+            return DirectoryAnswer("person", person.describe(), [person])
+
+        department = self._department_in(tokens, cased)
+        aliases = {t for _, names in _DEPARTMENT_ALIASES for alias in names for t in _tokens(alias)}
+        if not self._only_lookup(tokens, aliases | {"engineering", "science", "sciences", "cse"}):
+            return None
+        asks_head = bool(words & {"hod", "hods"}) or " head of department" in padded or \
+            (bool(words & (_HEAD_WORDS - {"hod", "hods"})) and (department is not None or "department" in words))
+        if asks_head:
+            heads = self.heads(department)
+            if department is not None and heads:
+                if len(heads) == 1:
+                    return DirectoryAnswer("hod", heads[0].describe(), heads)
+                names = " and ".join(h.name for h in heads)
+                details = " ".join(h.describe() for h in heads)
+                return DirectoryAnswer("hod", f"The {department} department is jointly headed by {names}. {details}", heads)
+            # "department" or "hod of ..." with no known department name (training and placement,
+            # exam cell, ...) is about something the table does not cover, not about every HOD;
+            # neither is a lower-case "it hod", which may or may not mean IT
+            if department is None and heads and not words & ({"department", "dept"} | _CONTEXT_ALIASES) \
+                    and not self._names_other_unit(tokens):
+                lines = "\n".join(f"- {h.department}: {h.name}" for h in heads)
+                return DirectoryAnswer("hod_list", f"Heads of Department at APSIT:\n{lines}", heads)
+            return None
+
+        if "dean" in words:
+            deans = [m for m in self.members if any(r.startswith("Dean") for r in [m.role] + m.other_roles)]
+            if deans:
+                return DirectoryAnswer("dean", " ".join(d.describe() for d in deans), deans)
+        return None
@@ -0,0 +1,266 @@
+import os
+import json
+import math
+import logging
+import threading
+from typing import Any, Iterable, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from langchain.schema import Document
+
+from .docstore import SQLiteDocStore
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "hnsw", "ivfpq")
+FAISS_INDEX_FILE = "faiss.index"
+FAISS_IDS_FILE = "faiss_ids.json"
+FAISS_VECTORS_FILE = "faiss_vectors.npy"
+FAISS_CHUNKS_FILE = "faiss_chunks.sqlite3"
+FAISS_FILES = (FAISS_INDEX_FILE, FAISS_IDS_FILE, FAISS_VECTORS_FILE, FAISS_CHUNKS_FILE,
+               FAISS_CHUNKS_FILE + "-wal", FAISS_CHUNKS_FILE + "-shm")
+
+
+def build_settings(index_type: str = "hnsw", dtype: str = "float16", hnsw_m: int = 32,
+                   ivf_nlist: int = 64, pq_m: int = 48, **search_options) -> dict:
+    """The FaissVectorStore options that change what is stored (not how it is searched)."""
+    if index_type == "ivfpq":
+        return {"index_type": index_type, "ivf_nlist": ivf_nlist, "pq_m": pq_m}
+    if index_type == "hnsw":
+        return {"index_type": index_type, "dtype": dtype, "hnsw_m": hnsw_m}
+    return {"index_type": index_type, "dtype": dtype}
+
+
+class FaissVectorStore(VectorStore):
+    """Child-chunk vectors in a FAISS index file that read-only processes memory-map.
+
+    Writers (the index build) keep the vectors as float16 in
+    `faiss_vectors.npy` and the chunk texts in a SQLite docstore; `save()`
+    rebuilds the FAISS index from them and writes it next to the id list.
+    Rebuilding keeps add/delete simple for every index type (HNSW cannot
+    remove vectors) and takes well under a second at college_data's size.
+    With `read_only=True` the index is opened with FAISS's mmap flags, so
+    the vector codes of all workers on a machine share the same page-cache
+    pages instead of each worker loading its own copy.
+
+    `index_type` is "flat" (exact), "hnsw" (graph) or "ivfpq" (inverted
+    lists of product-quantization codes). Flat and HNSW store vectors as
+    `dtype` ("float16" or "float32"); IVF-PQ stores `pq_m` one-byte codes
+    per vector. Vectors are L2-normalized and searched by inner product,
+    i.e. cosine similarity.
+    """
+
+    def __init__(self, embedding: Embeddings, persist_dir: str, index_type: str = "hnsw",
+                 dtype: str = "float16", hnsw_m: int = 32, ef_search: int = 64,
+                 ivf_nlist: int = 64, pq_m: int = 48, nprobe: int = 8, read_only: bool = False):
+        import faiss
+
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown FAISS index type {index_type!r}; expected one of {INDEX_TYPES}")
+        self._faiss = faiss
+        self.embedding = embedding
+        self.persist_dir = persist_dir
+        self.index_type = index_type
+        self.dtype = dtype
+        self.hnsw_m = hnsw_m
+        self.ef_search = ef_search
+        self.ivf_nlist = ivf_nlist
+        self.pq_m = pq_m
+        self.nprobe = nprobe
+        self.read_only = read_only
+
+        if not read_only:
+            os.makedirs(persist_dir, exist_ok=True)
+        self.chunks = SQLiteDocStore(os.path.join(persist_dir, FAISS_CHUNKS_FILE), read_only=read_only)
+        # What searches use: the FAISS index and the chunk id of each of its rows, swapped together
+        self._searchable = (None, [])
+        # Writer state, applied to the index by save(): chunk ids, their rows in _vectors
+        self.ids: List[str] = []
+        self._rows = {}
+        self._store_dtype = np.float32 if dtype == "float32" and index_type != "ivfpq" else np.float16
+        self._vectors = np.empty((0, 0), dtype=self._store_dtype)
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self.embedding
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.persist_dir, name)
+
+    def _load(self):
+        if not os.path.exists(self._path(FAISS_IDS_FILE)):
+            return
+        with open(self._path(FAISS_IDS_FILE), "r", encoding="utf-8") as f:
+            ids = json.load(f)
+        if self.read_only:
+            if ids and os.path.exists(self._path(FAISS_INDEX_FILE)):
+                index = self._faiss.read_index(self._path(FAISS_INDEX_FILE), self._mmap_flags())
+                self._searchable = (self._configure(index), ids)
+            self.ids = ids
+            return
+        if ids and os.path.exists(self._path(FAISS_VECTORS_FILE)):
+            self._vectors = np.load(self._path(FAISS_VECTORS_FILE)).astype(self._store_dtype)
+            self.ids = ids
+            self._rows = {chunk_id: row for row, chunk_id in enumerate(ids)}
+            self._searchable = (self._build_index(self._vectors.astype(np.float32)), list(ids))
+
+    def _mmap_flags(self) -> int:
+        # IVF inverted lists are mapped by IO_FLAG_MMAP; flat codes (flat, HNSW storage) need
+        # IO_FLAG_MMAP_IFC, which older faiss releases do not have. The two cannot be combined.
+        faiss = self._faiss
+        if self.index_type == "ivfpq" or not hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+            return faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        return faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+
+    @property
+    def index(self):
+        return self._searchable[0]
+
+    def _normalized(self, vectors) -> np.ndarray:
+        vectors = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32))
+        self._faiss.normalize_L2(vectors)
+        return vectors
+
+    def _configure(self, index):
+        if hasattr(index, "hnsw"):
+            index.hnsw.efSearch = self.ef_search
+        if hasattr(index, "nprobe"):
+            index.nprobe = self.nprobe
+        return index
+
+    def _build_index(self, vectors: np.ndarray):
+        faiss = self._faiss
+        n, d = vectors.shape
+        metric = faiss.METRIC_INNER_PRODUCT
+        quantizer_type = faiss.ScalarQuantizer.QT_fp16 if self.dtype == "float16" else None
+        index_type = self.index_type
+        if index_type == "ivfpq" and n < 2:
+            index_type = "flat"
+
+        if index_type == "ivfpq":
+            # Small corpora cannot train the configured sizes: shrink lists and codebooks to fit
+            nlist = max(1, min(self.ivf_nlist, int(math.sqrt(n))))
+            pq_m = max(m for m in range(1, min(self.pq_m, d) + 1) if d % m == 0)
+            nbits = min(8, int(math.log2(n)))
+            index = faiss.IndexIVFPQ(faiss.IndexFlatIP(d), d, nlist, pq_m, nbits, metric)
+            # Sizes are already scaled to n; silence faiss's "provide more training points" warnings
+            index.cp.min_points_per_centroid = index.pq.cp.min_points_per_centroid = 1
+        elif index_type == "hnsw":
+            if quantizer_type is None:
+                index = faiss.IndexHNSWFlat(d, self.hnsw_m, metric)
+            else:
+                index = faiss.IndexHNSWSQ(d, quantizer_type, self.hnsw_m, metric)
+        elif quantizer_type is None:
+            index = faiss.IndexFlatIP(d)
+        else:
+            index = faiss.IndexScalarQuantizer(d, quantizer_type, metric)
+
+        if not index.is_trained:
+            index.train(vectors)
+        index.add(vectors)
+        return self._configure(index)
+
+    # --- Writes (index build only) ---
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        if self.read_only:
+            raise RuntimeError("Cannot add to a read-only FAISS store")
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        if ids is None:
+            raise ValueError("FaissVectorStore needs explicit chunk ids")
+        vectors = self._normalized(self.embedding.embed_documents(texts)).astype(self._store_dtype)
+
+        self.delete(ids)
+        with self._lock:
+            if not self._vectors.size:
+                self._vectors = np.empty((0, vectors.shape[1]), dtype=self._store_dtype)
+            start = len(self.ids)
+            self._vectors = np.concatenate([self._vectors, vectors])
+            self.ids.extend(ids)
+            self._rows.update({chunk_id: start + i for i, chunk_id in enumerate(ids)})
+        self.chunks.mset([(chunk_id, Document(page_content=text, metadata=metadata))
+                          for chunk_id, text, metadata in zip(ids, texts, metadatas)])
+        return list(ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if self.read_only:
+            raise RuntimeError("Cannot delete from a read-only FAISS store")
+        if not ids:
+            return False
+        with self._lock:
+            drop = {self._rows[chunk_id] for chunk_id in ids if chunk_id in self._rows}
+            if drop:
+                keep = [row for row in range(len(self.ids)) if row not in drop]
+                self._vectors = self._vectors[keep]
+                self.ids = [self.ids[row] for row in keep]
+                self._rows = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+        self.chunks.mdelete(list(ids))
+        return bool(drop)
+
+    def delete_collection(self):
+        """Drop every vector and chunk (full rebuild)."""
+        for name in (FAISS_IDS_FILE, FAISS_VECTORS_FILE, FAISS_INDEX_FILE):
+            if os.path.exists(self._path(name)):
+                os.remove(self._path(name))
+        with self._lock:
+            self.ids, self._rows = [], {}
+            self._vectors = np.empty((0, 0), dtype=self._store_dtype)
+            self._searchable = (None, [])
+        self.chunks.mdelete(list(self.chunks.yield_keys()))
+
+    def save(self):
+        """Rebuild the FAISS index from the stored vectors and write it out."""
+        if self.read_only:
+            raise RuntimeError("Cannot save a read-only FAISS store")
+        os.makedirs(self.persist_dir, exist_ok=True)
+        with self._lock:
+            ids, vectors = list(self.ids), self._vectors
+        index = self._build_index(vectors.astype(np.float32)) if ids else None
+
+        # Each file is replaced atomically; KnowledgeIndex writes its manifest after this
+        np.save(self._path(FAISS_VECTORS_FILE + ".tmp.npy"), vectors)
+        os.replace(self._path(FAISS_VECTORS_FILE + ".tmp.npy"), self._path(FAISS_VECTORS_FILE))
+        if index is not None:
+            self._faiss.write_index(index, self._path(FAISS_INDEX_FILE + ".tmp"))
+            os.replace(self._path(FAISS_INDEX_FILE + ".tmp"), self._path(FAISS_INDEX_FILE))
+        with open(self._path(FAISS_IDS_FILE + ".tmp"), "w", encoding="utf-8") as f:
+            json.dump(ids, f)
+        os.replace(self._path(FAISS_IDS_FILE + ".tmp"), self._path(FAISS_IDS_FILE))
+        self._searchable = (index, ids)
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    # --- Reads ---
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self._search(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any):
+        return self._search(self.embedding.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self.embedding.embed_query(query), k)
+
+    def _search(self, embedding: List[float], k: int):
+        index, ids = self._searchable
+        if index is None or not ids:
+            return []
+        scores, rows = index.search(self._normalized([embedding]), min(k, len(ids)))
+        hits = [(ids[row], float(score)) for row, score in zip(rows[0], scores[0]) if 0 <= row < len(ids)]
+        docs = self.chunks.mget([chunk_id for chunk_id, _ in hits])
+        return [(doc, score) for doc, (_, score) in zip(docs, hits) if doc is not None]
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   ids: Optional[List[str]] = None, persist_dir: str = "./faiss_index", **kwargs: Any):
+        store = cls(embedding, persist_dir, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids or [str(i) for i in range(len(texts))])
+        store.save()
+        return store
@@ -0,0 +1,159 @@
+import os
+import re
+import json
+import math
+import heapq
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Sequence, Tuple
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+from langchain.schema import Document
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have how i in is it its of on or that the their this
+to was were what when where which who whom why will with you your me my tell about
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over the child chunks, maintained incrementally alongside the vector index.
+
+    Postings (term -> chunk id -> term frequency) and chunk lengths are built at
+    ingest time and persisted as JSON; idf is derived from the posting lists at
+    query time, so adding or removing a file never requires a full rebuild.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.chunks: Dict[str, Tuple[int, str]] = {}  # chunk id -> (length in tokens, parent id)
+        self.total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def add(self, ids: Sequence[str], texts: Sequence[str], parent_ids: Sequence[str]):
+        with self._lock:
+            for chunk_id, text, parent_id in zip(ids, texts, parent_ids):
+                tokens = tokenize(text)
+                self.chunks[chunk_id] = (len(tokens), parent_id)
+                self.total_length += len(tokens)
+                for term, tf in Counter(tokens).items():
+                    self.postings.setdefault(term, {})[chunk_id] = tf
+
+    def remove(self, ids: Sequence[str]):
+        ids = set(ids)
+        with self._lock:
+            for chunk_id in ids:
+                length, _ = self.chunks.pop(chunk_id, (0, None))
+                self.total_length -= length
+            for term in list(self.postings):
+                docs = self.postings[term]
+                for chunk_id in ids.intersection(docs):
+                    del docs[chunk_id]
+                if not docs:
+                    del self.postings[term]
+
+    def clear(self):
+        with self._lock:
+            self.postings, self.chunks, self.total_length = {}, {}, 0
+
+    def search(self, query: str, k: int = 20) -> List[Tuple[str, str, float]]:
+        """Top-k chunks as (chunk id, parent id, score)."""
+        with self._lock:
+            n = len(self.chunks)
+            if not n:
+                return []
+            avg_length = self.total_length / n
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+                for chunk_id, tf in docs.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.chunks[chunk_id][0] / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [(chunk_id, self.chunks[chunk_id][1], score) for chunk_id, score in top]
+
+    def save(self, path: str):
+        with self._lock:
+            data = {
+                "k1": self.k1,
+                "b": self.b,
+                "chunks": self.chunks,
+                "postings": self.postings,
+            }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        index.chunks = {chunk_id: tuple(value) for chunk_id, value in data["chunks"].items()}
+        index.postings = data["postings"]
+        index.total_length = sum(length for length, _ in index.chunks.values())
+        return index
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[str]:
+    """Fuse ranked id lists: score(id) = sum of 1 / (k + rank) over the lists containing it."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def _unique(items) -> List[str]:
+    return list(dict.fromkeys(items))
+
+
+class HybridRetriever(BaseRetriever):
+    """Parent-document retrieval over dense (Chroma) and lexical (BM25) child rankings.
+
+    Each ranker returns `fetch_k` children, which are collapsed to a ranking of
+    their parents; the two parent rankings are fused with reciprocal rank
+    fusion and the top `k` parents are loaded from the docstore. `mode`
+    "dense" or "lexical" uses a single ranker (for evaluation and fallback).
+    """
+
+    vectorstore: Any
+    docstore: Any
+    lexical: Any
+    mode: str = "hybrid"
+    k: int = 3
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    def dense_parents(self, query: str) -> List[str]:
+        children = self.vectorstore.similarity_search(query, k=self.fetch_k)
+        return _unique(doc.metadata["doc_id"] for doc in children if "doc_id" in doc.metadata)
+
+    def lexical_parents(self, query: str) -> List[str]:
+        return _unique(parent_id for _, parent_id, _ in self.lexical.search(query, k=self.fetch_k))
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        if self.mode == "dense":
+            parent_ids = self.dense_parents(query)
+        elif self.mode == "lexical":
+            parent_ids = self.lexical_parents(query)
+        else:
+            parent_ids = reciprocal_rank_fusion(
+                [self.dense_parents(query), self.lexical_parents(query)], k=self.rrf_k)
+        parent_ids = parent_ids[:self.k]
+        return [doc for doc in self.docstore.mget(parent_ids) if doc is not None]
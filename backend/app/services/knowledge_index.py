@@ -0,0 +1,373 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from filelock import FileLock, Timeout
+from langchain_community.document_loaders import TextLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.vectorstores import Chroma
+from langchain.schema import Document
+
+from .docstore import SQLiteDocStore
+from .faiss_store import FAISS_FILES, FaissVectorStore, build_settings
+from .hybrid_retrieval import BM25Index, HybridRetriever
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "index_manifest.json"
+DOCSTORE_FILE = "parents.sqlite3"
+LEXICAL_FILE = "bm25_index.json"
+FAISS_DIR = "faiss"  # FAISS files live apart from Chroma's, which own the top of persist_dir
+CHROMA_FILE = "chroma.sqlite3"
+SYNC_LOCK_FILE = "sync.lock"
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class IndexSyncReport:
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    full_rebuild: bool = False
+    embedded_chunks: int = 0
+    seconds: float = 0.0
+
+
+class KnowledgeIndex:
+    """Persistent parent/child index over college_data with per-file change tracking.
+
+    Child chunks live in a persisted Chroma collection (or a FAISS index,
+    `vector_store="faiss"`) and a BM25 index,
+    parent chunks in a SQLite docstore next to them. A manifest records the content hash of every
+    source file and the ids of the chunks it produced, so a restart only
+    re-splits and re-embeds files that were added or changed and deletes the
+    chunks of changed or removed files by id. It also records the embedding
+    model and backend: vectors from different backends are never mixed, a
+    change rebuilds the index.
+
+    With `read_only=True` the index is only opened (see `open`), so several
+    worker processes can share an index built once by `sync`.
+    """
+
+    def __init__(self, embeddings, data_dir: str = "college_data",
+                 persist_dir: str = "./chroma_db_final",
+                 collection_name: str = "split_by_section",
+                 embedding_model: str = "BAAI/bge-base-en-v1.5", embedding_backend: str = "torch",
+                 vector_store: str = "chroma", vector_store_options: Optional[Dict] = None,
+                 parent_chunk_size: int = 2000, parent_chunk_overlap: int = 200,
+                 child_chunk_size: int = 400, child_chunk_overlap: int = 100,
+                 read_only: bool = False):
+        self.embeddings = embeddings
+        self.data_dir = data_dir
+        self.persist_dir = persist_dir
+        self.collection_name = collection_name
+        self.embedding_model = embedding_model
+        self.embedding_backend = embedding_backend
+        self.vector_store = vector_store
+        self.vector_store_options = vector_store_options or {}
+
+        self.chunking = {
+            "parent": [parent_chunk_size, parent_chunk_overlap],
+            "child": [child_chunk_size, child_chunk_overlap],
+        }
+        self.parent_splitter = RecursiveCharacterTextSplitter(
+            separators=["\n=== "], chunk_size=parent_chunk_size, chunk_overlap=parent_chunk_overlap)
+        self.child_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=child_chunk_size, chunk_overlap=child_chunk_overlap)
+
+        self.read_only = read_only
+        self.vectorstore = None  # Chroma or FaissVectorStore
+        self.docstore = SQLiteDocStore(os.path.join(persist_dir, DOCSTORE_FILE), read_only=read_only)
+        self.lexical = BM25Index()
+        self.manifest: Dict = {}
+
+    # --- Manifest ---
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.persist_dir, MANIFEST_FILE)
+
+    def _index_settings(self) -> Dict:
+        """Everything that changes chunk ids or vectors; a mismatch forces a full rebuild."""
+        return {
+            "manifest_version": MANIFEST_VERSION,
+            "collection": self.collection_name,
+            "embedding_model": self.embedding_model,
+            "embedding_backend": self.embedding_backend,
+            "vector_store": self.vector_store,
+            **({"faiss": build_settings(**self.vector_store_options)} if self.vector_store == "faiss" else {}),
+            "chunking": self.chunking,
+        }
+
+    def _load_manifest(self) -> Optional[Dict]:
+        if not os.path.exists(self.manifest_path):
+            return None
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except Exception as e:
+            logger.warning(f"Unreadable index manifest, rebuilding: {e}")
+            return None
+        if isinstance(manifest.get("settings"), dict):
+            # Manifests from before backends were selectable were all built with sentence-transformers
+            manifest["settings"].setdefault("embedding_backend", "torch")
+            manifest["settings"].setdefault("vector_store", "chroma")
+        if manifest.get("settings") != self._index_settings():
+            logger.info("Index settings changed since last build, rebuilding")
+            return None
+        return manifest
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    @property
+    def version(self) -> str:
+        """Content version of the indexed knowledge base."""
+        files = self.manifest.get("files", {})
+        digest = hashlib.sha256(json.dumps(self._index_settings(), sort_keys=True).encode())
+        for path in sorted(files):
+            digest.update(f"{path}:{files[path]['sha256']}\n".encode())
+        return digest.hexdigest()[:16]
+
+    # --- Source files ---
+    def _scan_sources(self) -> Dict[str, str]:
+        """Map of path relative to data_dir -> sha256 of its bytes."""
+        sources = {}
+        for root, _, files in os.walk(self.data_dir):
+            for name in files:
+                if not name.endswith(".txt"):
+                    continue
+                path = os.path.join(root, name)
+                with open(path, "rb") as f:
+                    sources[os.path.relpath(path, self.data_dir)] = hashlib.sha256(f.read()).hexdigest()
+        return sources
+
+    def _split_file(self, rel_path: str):
+        """Split one source file into parents and children with deterministic ids."""
+        file_path = os.path.join(self.data_dir, rel_path)
+        docs = TextLoader(file_path, encoding='utf-8').load()
+
+        parents: List[Document] = self.parent_splitter.split_documents(docs)
+        parent_ids = [f"{rel_path}#p{i}" for i in range(len(parents))]
+
+        children: List[Document] = []
+        child_ids: List[str] = []
+        for parent_id, parent in zip(parent_ids, parents):
+            for j, child in enumerate(self.child_splitter.split_documents([parent])):
+                child.metadata["doc_id"] = parent_id
+                children.append(child)
+                child_ids.append(f"{parent_id}#c{j}")
+
+        return parent_ids, parents, child_ids, children
+
+    # --- Sync ---
+    def _open_vectorstore(self):
+        if self.vector_store == "faiss":
+            return FaissVectorStore(self.embeddings, os.path.join(self.persist_dir, FAISS_DIR),
+                                    read_only=self.read_only, **self.vector_store_options)
+        return Chroma(
+            collection_name=self.collection_name,
+            embedding_function=self.embeddings,
+            persist_directory=self.persist_dir,
+        )
+
+    def open(self):
+        """Open an index previously built by sync(), without modifying it."""
+        manifest = self._load_manifest()
+        if manifest is None:
+            raise RuntimeError(f"No usable index in {self.persist_dir}; build it with sync() first")
+        self.manifest = manifest
+        self.vectorstore = self._open_vectorstore()
+        self.lexical = self._load_lexical()
+        if not len(self.lexical):
+            logger.warning("Index has no BM25 data (built by an older version?), lexical retrieval is empty")
+
+    @property
+    def lexical_path(self) -> str:
+        return os.path.join(self.persist_dir, LEXICAL_FILE)
+
+    def _load_lexical(self) -> BM25Index:
+        if os.path.exists(self.lexical_path):
+            try:
+                return BM25Index.load(self.lexical_path)
+            except Exception as e:
+                logger.warning(f"Unreadable BM25 index, rebuilding: {e}")
+        return BM25Index()
+
+    def as_retriever(self, mode: str = "hybrid", k: int = 3) -> HybridRetriever:
+        """Retriever over the current collection; sync() may replace it, so build a new one after each."""
+        return HybridRetriever(
+            vectorstore=self.vectorstore,
+            docstore=self.docstore,
+            lexical=self.lexical,
+            mode=mode,
+            k=k,
+        )
+
+    def _remove_inactive_store(self):
+        """Delete the vectors of the store not in use, left behind when rag_vector_store changed."""
+        if self.vector_store == "faiss":
+            if os.path.exists(os.path.join(self.persist_dir, CHROMA_FILE)):
+                try:
+                    Chroma(collection_name=self.collection_name, persist_directory=self.persist_dir).delete_collection()
+                except Exception as e:
+                    logger.warning(f"Could not delete the old Chroma collection: {e}")
+        else:
+            shutil.rmtree(os.path.join(self.persist_dir, FAISS_DIR), ignore_errors=True)
+        # Written straight into persist_dir by earlier versions
+        for name in FAISS_FILES:
+            path = os.path.join(self.persist_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _clear_docstore(self):
+        self.docstore.mdelete(list(self.docstore.yield_keys()))
+
+    def sync(self) -> IndexSyncReport:
+        """Bring the persisted index in line with data_dir, embedding only what changed.
+
+        Holds a file lock in persist_dir, so worker processes started on the same index
+        sync one at a time: the first does the work, the others then find nothing changed.
+        """
+        if self.read_only:
+            raise RuntimeError("Cannot sync a read-only index")
+        os.makedirs(self.persist_dir, exist_ok=True)
+        lock = FileLock(os.path.join(self.persist_dir, SYNC_LOCK_FILE))
+        try:
+            lock.acquire(blocking=False)
+        except Timeout:
+            logger.info("Another process is syncing the index, waiting for it")
+            lock.acquire()
+        try:
+            return self._sync()
+        finally:
+            lock.release()
+
+    def _sync(self) -> IndexSyncReport:
+        started = time.perf_counter()
+        report = IndexSyncReport()
+
+        previous = self._load_manifest()
+        self.vectorstore = self._open_vectorstore()
+        self.lexical = self._load_lexical()
+        reload_parents = reload_lexical = False
+
+        if previous is not None:
+            expected = sum(len(entry["child_ids"]) for entry in previous["files"].values())
+            if self._vector_count() != expected:
+                logger.info("Vector collection does not match manifest, rebuilding")
+                previous = None
+
+        if previous is None:
+            # Unknown collection contents: start from an empty collection
+            report.full_rebuild = True
+            self._remove_inactive_store()
+            self.vectorstore.delete_collection()
+            self.vectorstore = self._open_vectorstore()
+            self._clear_docstore()
+            self.lexical.clear()
+            previous = {"files": {}}
+        else:
+            # Vectors are fine but parents or BM25 data are missing or stale: re-split, no re-embedding
+            if self.docstore.count() != sum(len(entry["parent_ids"]) for entry in previous["files"].values()):
+                logger.info("Parent docstore does not match manifest, reloading parents")
+                self._clear_docstore()
+                reload_parents = True
+            if len(self.lexical) != expected:
+                logger.info("BM25 index does not match manifest, rebuilding it")
+                self.lexical.clear()
+                reload_lexical = True
+
+        sources = self._scan_sources()
+        old_files = previous["files"]
+        self.manifest = {"settings": self._index_settings(), "files": {}}
+
+        for rel_path in sorted(old_files):
+            if rel_path not in sources:
+                report.removed.append(rel_path)
+                self._drop_entry(old_files[rel_path])
+
+        for rel_path in sorted(sources):
+            sha = sources[rel_path]
+            old_entry = old_files.get(rel_path)
+
+            if old_entry and old_entry["sha256"] == sha:
+                # Vectors, parents and BM25 postings are already persisted
+                report.unchanged.append(rel_path)
+                self.manifest["files"][rel_path] = old_entry
+                if reload_parents or reload_lexical:
+                    parent_ids, parents, child_ids, children = self._split_file(rel_path)
+                    if reload_parents:
+                        self.docstore.mset(list(zip(parent_ids, parents)))
+                    if reload_lexical:
+                        self._index_lexical(child_ids, children)
+                continue
+
+            if old_entry:
+                report.changed.append(rel_path)
+                self._drop_entry(old_entry)
+            else:
+                report.added.append(rel_path)
+
+            parent_ids, parents, child_ids, children = self._split_file(rel_path)
+            if children:
+                self.vectorstore.add_documents(children, ids=child_ids)
+            report.embedded_chunks += len(children)
+            self._index_lexical(child_ids, children)
+            self.docstore.mset(list(zip(parent_ids, parents)))
+            self.manifest["files"][rel_path] = {
+                "sha256": sha,
+                "parent_ids": parent_ids,
+                "child_ids": child_ids,
+            }
+
+        if report.full_rebuild or report.added or report.changed or report.removed:
+            if isinstance(self.vectorstore, FaissVectorStore):
+                self.vectorstore.save()
+        if report.full_rebuild or reload_lexical or report.added or report.changed or report.removed:
+            self.lexical.save(self.lexical_path)
+        # Manifest last: a crash before this point is detected as a mismatch on the next sync
+        self._save_manifest()
+        report.seconds = time.perf_counter() - started
+        logger.info(
+            f"📚 Index sync: +{len(report.added)} ~{len(report.changed)} -{len(report.removed)} "
+            f"={len(report.unchanged)} files, {report.embedded_chunks} chunks embedded in {report.seconds:.2f}s"
+        )
+        return report
+
+    def _vector_count(self) -> int:
+        if isinstance(self.vectorstore, FaissVectorStore):
+            return self.vectorstore.count()
+        return len(self.vectorstore.get(include=[])["ids"])
+
+    def _index_lexical(self, child_ids: List[str], children: List[Document]):
+        self.lexical.add(child_ids, [c.page_content for c in children], [c.metadata["doc_id"] for c in children])
+
+    def _drop_entry(self, entry: Dict):
+        if entry["child_ids"]:
+            self.vectorstore.delete(ids=entry["child_ids"])
+            self.lexical.remove(entry["child_ids"])
+        if entry["parent_ids"]:
+            self.docstore.mdelete(entry["parent_ids"])
+
+
+if __name__ == "__main__":
+    # Build/update the index once, e.g. before starting workers with rag_index_read_only=true
+    from ..config import settings
+    from .embeddings import create_embeddings
+
+    logging.basicConfig(level=logging.INFO)
+    KnowledgeIndex(create_embeddings(settings.rag_embedding_backend),
+                   persist_dir=settings.rag_index_dir,
+                   embedding_backend=settings.rag_embedding_backend,
+                   vector_store=settings.rag_vector_store,
+                   vector_store_options=settings.rag_faiss_options,
+                   **settings.rag_chunking).sync()
@@ -0,0 +1,179 @@
+import os
+import random
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
+
+import groq
+import httpx
+from langchain_groq import ChatGroq
+
+from ..utils.concurrency import CircuitBreaker
+from ..utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Worth another attempt: timeouts, dropped connections, rate limits and server-side errors
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+LLM_TOKENS = registry.counter("llm_tokens_total", "Tokens billed by the LLM provider", ["llm", "direction"])
+
+
+class LLMUnavailable(Exception):
+    """The LLM provider is failing: its circuit is open or every attempt failed."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, groq.APITimeoutError, groq.APIConnectionError)):
+        return True
+    return isinstance(error, groq.APIStatusError) and error.status_code in RETRYABLE_STATUS
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait (Retry-After on 429/503), if any."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def create_http_client(max_connections: int = 20, keepalive_connections: int = 10,
+                       keepalive_expiry: float = 30.0, timeout: float = 20.0) -> httpx.AsyncClient:
+    """One pooled keep-alive client for every Groq model in the process, so calls reuse TLS connections."""
+    return groq.DefaultAsyncHttpxClient(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=keepalive_connections,
+                            keepalive_expiry=keepalive_expiry),
+        timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+    )
+
+
+def create_groq_chat(model_name: str, temperature: float, http_client: httpx.AsyncClient,
+                     base_url: str = "", timeout: float = 20.0) -> ChatGroq:
+    """ChatGroq on the shared pool, with the SDK's own retries off (ResilientChatModel owns them)."""
+    options = {"groq_api_base": base_url} if base_url else {}
+    return ChatGroq(
+        groq_api_key=os.getenv("GROQ_API_KEY"),
+        model_name=model_name,
+        temperature=temperature,
+        http_async_client=http_client,
+        max_retries=0,
+        request_timeout=timeout,
+        **options,
+    )
+
+
+class ResilientChatModel:
+    """Retries, per-call timeouts and a circuit breaker around a LangChain chat model.
+
+    Each attempt is bounded by `timeout` seconds (for streams: seconds to
+    each next chunk). Retryable failures are retried up to `max_attempts`
+    in total, sleeping a full-jitter exponential backoff in between (or
+    the provider's Retry-After, whichever is longer, capped at
+    `backoff_max`). Every failed attempt counts towards the breaker; while
+    it is open calls raise LLMUnavailable at once instead of waiting on a
+    provider that is down. Streams are only retried before their first
+    chunk, since what was already yielded cannot be taken back.
+    """
+
+    def __init__(self, llm, timeout: float = 20.0, max_attempts: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 4.0, breaker: Optional[CircuitBreaker] = None, name: str = "groq"):
+        self.llm = llm
+        self.timeout = timeout
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.name = name
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    def _backoff(self, attempt: int, error: BaseException) -> float:
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        return min(self.backoff_max, max(delay, retry_after(error) or 0.0))
+
+    def _count_tokens(self, message):
+        # Groq reports usage on the response, or on the last chunk of a stream
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            LLM_TOKENS.inc(usage.get("input_tokens", 0), llm=self.name, direction="input")
+            LLM_TOKENS.inc(usage.get("output_tokens", 0), llm=self.name, direction="output")
+
+    def _admit(self):
+        if not self.breaker.allow():
+            raise LLMUnavailable(f"{self.name}: circuit open, failing fast")
+        self.attempts += 1
+
+    async def _after_failure(self, attempt: int, error: BaseException):
+        """Re-raise `error` unless it is worth another attempt, in which case back off first."""
+        if isinstance(error, asyncio.TimeoutError):
+            self.timeouts += 1
+        if not is_retryable(error):
+            # The provider answered (bad request, auth...): it is up, and retrying will not help
+            self.breaker.record_success()
+            raise error
+        self.breaker.record_failure()
+        if attempt == self.max_attempts:
+            self.failures += 1
+            raise LLMUnavailable(f"{self.name}: {attempt} attempts failed, last: {error!r}") from error
+        delay = self._backoff(attempt, error)
+        logger.warning(f"🔁 {self.name} attempt {attempt} failed ({error!r}); retrying in {delay:.2f}s")
+        self.retries += 1
+        await asyncio.sleep(delay)
+
+    async def ainvoke(self, prompt, **kwargs: Any):
+        self.calls += 1
+        for attempt in range(1, self.max_attempts + 1):
+            self._admit()
+            try:
+                result = await asyncio.wait_for(self.llm.ainvoke(prompt, **kwargs), self.timeout)
+            except Exception as e:
+                await self._after_failure(attempt, e)
+                continue
+            self.breaker.record_success()
+            self._count_tokens(result)
+            return result
+
+    async def astream(self, prompt, **kwargs: Any) -> AsyncIterator:
+        self.calls += 1
+        for attempt in range(1, self.max_attempts + 1):
+            self._admit()
+            stream = self.llm.astream(prompt, **kwargs)
+            started = False
+            try:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(stream.__anext__(), self.timeout)
+                    except StopAsyncIteration:
+                        break
+                    if not started:
+                        started = True
+                        self.breaker.record_success()
+                    self._count_tokens(chunk)
+                    yield chunk
+            except Exception as e:
+                if started:
+                    if is_retryable(e):
+                        self.breaker.record_failure()
+                    raise
+                await self._after_failure(attempt, e)
+                continue
+            finally:
+                await stream.aclose()
+            if not started:
+                self.breaker.record_success()
+            return
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "failed_calls": self.failures,
+            "circuit": self.breaker.stats(),
+        }
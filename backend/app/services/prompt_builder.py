@@ -0,0 +1,192 @@
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TEMPLATE = """You are a smart senior student at APSIT.
+
+**CRITICAL INSTRUCTIONS:**
+1. **Conflict Rule:** If Source 1 and Source 2 disagree on a person's name/role, **Source 1 (Web) is the TRUTH**.
+2. **HOD Check:** When checking for "HOD" or "Head of Department", look for the exact name listed next to that title in Source 1. Ignore "Assistant Professor" names unless they are explicitly called HOD.
+3. **Correction:** If the user corrects you (e.g., "Mugdha is HOD"), trust the user and double-check Source 1.
+4. **Persona:** {style_instruction} Be helpful and confident.
+
+**CONTEXT:**
+History: {history}
+User Question: {question}
+
+**INFORMATION:**
+[SOURCE 1: LIVE WEB SEARCH (HIGHEST PRIORITY)]:
+{web}
+
+[SOURCE 2: INTERNAL DATABASE (SECONDARY)]:
+{db}
+
+**ANSWER:**"""
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+class TokenCounter:
+    """Counts tokens with a local Hugging Face tokenizer, or estimates ~4 characters per token.
+
+    The default is the embedding model's tokenizer, which is already on disk;
+    its counts are close to, not identical with, what Groq bills.
+    """
+
+    def __init__(self, tokenizer_name: Optional[str] = None):
+        self.name = "estimate (4 chars/token)"
+        self._backend = None
+        if tokenizer_name:
+            try:
+                from transformers import AutoTokenizer
+                backend = AutoTokenizer.from_pretrained(tokenizer_name).backend_tokenizer
+                backend.no_truncation()
+                backend.no_padding()
+                self._backend, self.name = backend, tokenizer_name
+            except Exception as e:
+                logger.warning(f"Tokenizer {tokenizer_name!r} unavailable, estimating prompt tokens: {e}")
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._backend is None:
+            return (len(text) + 3) // 4
+        return len(self._backend.encode(text, add_special_tokens=False).ids)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Longest prefix of text within max_tokens, cut back to a word boundary."""
+        if max_tokens <= 0:
+            return ""
+        if self._backend is None:
+            cut = max_tokens * 4
+        else:
+            offsets = self._backend.encode(text, add_special_tokens=False).offsets
+            if len(offsets) <= max_tokens:
+                return text
+            cut = offsets[max_tokens][0]
+        if cut >= len(text):
+            return text
+        head = text[:cut]
+        return (head.rsplit(None, 1)[0] if " " in head else head).rstrip() + " ..."
+
+
+@dataclass
+class BuiltPrompt:
+    text: str
+    tokens: Dict[str, int]  # per section plus "total"
+    dropped: Dict[str, int] = field(default_factory=dict)  # ranked items left out, per section
+    truncated: List[str] = field(default_factory=list)  # sections whose last item was cut
+
+
+class PromptBuilder:
+    """Assembles the answer prompt within a token budget per section.
+
+    Each section gets its items best-first (retrieved parents in rank order,
+    web sentences in result order, history newest first). Items are added while
+    they fit; the first one that does not is truncated if at least
+    `min_fragment_tokens` remain, and everything ranked lower that does not fit
+    is dropped. Parent chunks are deduplicated line by line first, since
+    neighbouring parents overlap, and web sentences are deduplicated too.
+    A session's rolling summary, when there is one, goes ahead of the
+    verbatim turns in the history block under its own budget.
+    """
+
+    def __init__(self, counter: TokenCounter, history_tokens: int = 600, db_tokens: int = 1200,
+                 web_tokens: int = 500, summary_tokens: int = 250, min_fragment_tokens: int = 40):
+        self.counter = counter
+        self.budgets = {"summary": summary_tokens, "history": history_tokens, "db": db_tokens, "web": web_tokens}
+        self.min_fragment_tokens = min_fragment_tokens
+
+    @staticmethod
+    def dedupe_chunks(chunks: Sequence[str]) -> List[str]:
+        seen = set()
+        unique = []
+        for chunk in chunks:
+            lines = []
+            for line in chunk.splitlines():
+                key = " ".join(line.split()).lower()
+                if key and key in seen:
+                    continue
+                seen.add(key)
+                lines.append(line)
+            text = "\n".join(lines).strip()
+            if text:
+                unique.append(text)
+        return unique
+
+    @staticmethod
+    def split_web(web_context: str) -> List[str]:
+        seen = set()
+        sentences = []
+        for sentence in _SENTENCE_RE.split(web_context or ""):
+            key = " ".join(sentence.split()).lower()
+            if key and key not in seen:
+                seen.add(key)
+                sentences.append(sentence.strip())
+        return sentences
+
+    def _fill(self, items: Sequence[str], budget: int) -> Tuple[List[str], int, bool]:
+        """Keep ranked items within budget; returns (kept, dropped count, truncated)."""
+        kept, dropped, truncated = [], 0, False
+        remaining = budget
+        for item in items:
+            tokens = self.counter.count(item)
+            if tokens <= remaining:
+                kept.append(item)
+                remaining -= tokens
+            elif remaining >= self.min_fragment_tokens:
+                kept.append(self.counter.truncate(item, remaining))
+                remaining, truncated = 0, True
+            else:
+                dropped += 1
+        return kept, dropped, truncated
+
+    def build(self, question: str, history_list: List[Dict], db_chunks: Sequence[str],
+              web_context: str, summary: str = "") -> BuiltPrompt:
+        dropped, truncated = {}, []
+
+        summary_text = ""
+        if summary:
+            summary_text = self.counter.truncate(summary, self.budgets["summary"])
+            if summary_text != summary:
+                truncated.append("summary")
+
+        if history_list or summary_text:
+            style_instruction = "Strictly DO NOT greet. Answer directly."
+            turns = [f"User: {msg['question']}\nYou: {msg['answer']}" for msg in reversed(history_list)]
+            kept, dropped["history"], cut = self._fill(turns, self.budgets["history"])
+            turns_text = "\n".join(reversed(kept))
+            history_text = turns_text
+            if summary_text:
+                history_text = f"(Summary of earlier turns) {summary_text}\n{turns_text}".rstrip()
+            if cut:
+                truncated.append("history")
+        else:
+            style_instruction = "Start with a short, friendly greeting."
+            history_text = turns_text = "No previous conversation."
+
+        kept, dropped["db"], cut = self._fill(self.dedupe_chunks(db_chunks), self.budgets["db"])
+        db_text = "\n\n".join(kept)
+        if cut:
+            truncated.append("db")
+
+        kept, dropped["web"], cut = self._fill(self.split_web(web_context), self.budgets["web"])
+        web_text = " ".join(kept)
+        if cut:
+            truncated.append("web")
+
+        text = PROMPT_TEMPLATE.format(style_instruction=style_instruction, history=history_text,
+                                      question=question, web=web_text, db=db_text)
+        tokens = {
+            "question": self.counter.count(question),
+            "summary": self.counter.count(summary_text),
+            "history": self.counter.count(turns_text),
+            "db": self.counter.count(db_text),
+            "web": self.counter.count(web_text),
+            "total": self.counter.count(text),
+        }
+        tokens["instructions"] = max(0, tokens["total"] - sum(tokens[k] for k in ("question", "summary", "history", "db", "web")))
+        return BuiltPrompt(text, tokens, {k: v for k, v in dropped.items() if v}, truncated)
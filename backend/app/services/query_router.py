@@ -0,0 +1,170 @@
+import re
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Tiers, cheapest first
+SMALL_TALK = "small_talk"  # canned reply, no retrieval, no LLM
+KB_ONLY = "kb_only"  # knowledge base retrieval, no web search
+KB_WEB = "kb_web"  # retrieval and web search in parallel (the old behaviour)
+WEB_FIRST = "web_first"  # web search; retrieval only if the web returns nothing
+TIERS = (SMALL_TALK, KB_ONLY, KB_WEB, WEB_FIRST)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_GREETINGS = {"hi", "hii", "hiii", "hello", "hey", "heyy", "namaste", "hola", "yo", "morning", "evening", "afternoon"}
+_THANKS = {"thanks", "thank", "thankyou", "thx", "ty", "tysm"}
+_BYES = {"bye", "goodbye", "cya", "later", "goodnight"}
+_ACKS = {"ok", "okay", "k", "cool", "great", "nice", "fine", "alright", "awesome", "got", "it", "understood"}
+_FILLER = {"you", "so", "much", "a", "lot", "very", "there", "again", "good", "bro", "sir", "maam", "see", "all", "for",
+           "the", "help", "and", "oh", "hmm"}
+_SMALL_TALK_WORDS = _GREETINGS | _THANKS | _BYES | _ACKS | _FILLER
+
+CANNED_REPLIES = {
+    "thanks": "You're welcome! Ask me anything else about APSIT.",
+    "bye": "Goodbye! Come back any time you have questions about APSIT.",
+    "greeting": "Hi! I'm the APSIT assistant. Ask me about admissions, fees, departments, faculty, placements or facilities.",
+    "ack": "Great! Let me know if there's anything else you'd like to know about APSIT.",
+}
+
+# Things that change faster than college_data, or that it does not cover at all
+_WEB_FIRST_WORDS = {"latest", "news", "today", "tomorrow", "yesterday", "recent", "recently", "upcoming",
+                    "announcement", "announced", "notice", "circular", "cutoff", "cutoffs", "weather", "holiday",
+                    "holidays", "principal", "ranking", "rank", "timetable"}
+_WEB_FIRST_PHRASES = ("this year", "this week", "this month", "right now", "cut off", "exam result", "exam results")
+
+# Topics college_data answers well
+_KB_WORDS = {"fee", "fees", "admission", "admissions", "eligibility", "eligible", "seats", "intake", "documents",
+             "scholarship", "scholarships", "library", "books", "hod", "hods", "faculty", "professor", "professors",
+             "teacher", "teachers", "teaches", "department", "departments", "placement", "placements", "recruiters",
+             "nss", "refund", "cancellation", "cancel", "dte", "accreditation", "accredited", "nba", "naac",
+             "counselling", "counselor", "bentley", "autodesk", "moodle", "portal",
+             "website", "vision", "mission", "minority", "jain", "cap", "dse", "branches", "courses", "tfws",
+             "obc", "sc", "st", "insurance", "medical"}
+
+# Seed questions for the embedding centroids
+KB_EXAMPLES = [
+    "What is the fee structure for first year engineering",
+    "How many seats are there in computer engineering",
+    "Which documents are required for admission",
+    "What are the library rules and timings",
+    "Which companies come to campus for placements",
+    "What is the DTE code of the college",
+    "Tell me about the NSS unit",
+    "What scholarships are available for students",
+    "Am I eligible for direct second year admission",
+    "What facilities does the college provide",
+    "What is the refund policy if I cancel my admission",
+    "Which branches does APSIT offer",
+]
+WEB_EXAMPLES = [
+    "What is the latest news about APSIT",
+    "When will the semester exam results be declared",
+    "What was the cutoff for computer engineering this year",
+    "Is the college closed tomorrow because of rain",
+    "What events are happening on campus this week",
+    "Who is the principal of APSIT",
+    "Any recent placement drive announcements",
+    "Where can I find the Mumbai University exam timetable",
+    "How is APSIT ranked compared to other colleges",
+]
+
+
+@dataclass
+class RouteDecision:
+    tier: str
+    reason: str
+    reply: Optional[str] = None  # canned answer for SMALL_TALK
+
+
+class QueryRouter:
+    """Decides per question which answer tiers to run.
+
+    Keyword rules come first (small talk, time-sensitive or uncovered topics,
+    topics the knowledge base covers). Otherwise the question embedding is
+    compared with the centroids of KB_EXAMPLES and WEB_EXAMPLES: a clear win
+    for the knowledge base means KB_ONLY, anything else keeps web search.
+    Every decision is logged with its reason and counted in `stats()`.
+    """
+
+    def __init__(self, embeddings, enabled: bool = True, margin: float = 0.02):
+        self.embeddings = embeddings
+        self.enabled = enabled
+        self.margin = margin
+        self._centroids: Optional[Dict[str, np.ndarray]] = None
+        self._lock = threading.Lock()
+        self.decisions: Counter = Counter()
+
+    @staticmethod
+    def _tokens(question: str) -> List[str]:
+        return _TOKEN_RE.findall(question.lower().replace("'", ""))
+
+    def match_keywords(self, question: str) -> Optional[RouteDecision]:
+        """Rule-based decision, or None when the rules have no opinion."""
+        tokens = self._tokens(question)
+        words = set(tokens)
+        padded = f" {' '.join(tokens)} "
+
+        if not self.enabled:
+            return RouteDecision(KB_WEB if len(question.split()) > 1 else KB_ONLY, "router disabled")
+        if not tokens:
+            return RouteDecision(SMALL_TALK, "empty question", CANNED_REPLIES["greeting"])
+        if len(tokens) <= 6 and words <= _SMALL_TALK_WORDS and not words <= _FILLER:
+            kind = "thanks" if words & _THANKS else "bye" if words & _BYES else \
+                "greeting" if words & _GREETINGS else "ack"
+            return RouteDecision(SMALL_TALK, f"small talk ({kind})", CANNED_REPLIES[kind])
+
+        web = sorted(words & _WEB_FIRST_WORDS) + [p for p in _WEB_FIRST_PHRASES if f" {p} " in padded]
+        if web:
+            return RouteDecision(WEB_FIRST, f"time-sensitive/uncovered: {', '.join(web)}")
+        kb = sorted(words & _KB_WORDS)
+        if kb:
+            return RouteDecision(KB_ONLY, f"knowledge base topic: {', '.join(kb)}")
+        if len(tokens) == 1:
+            return RouteDecision(KB_ONLY, "single word")
+        return None
+
+    def _ensure_centroids(self) -> Dict[str, np.ndarray]:
+        if self._centroids is None:
+            with self._lock:
+                if self._centroids is None:
+                    centroids = {}
+                    for tier, examples in ((KB_ONLY, KB_EXAMPLES), (KB_WEB, WEB_EXAMPLES)):
+                        vectors = np.asarray(self.embeddings.embed_documents(examples), dtype=np.float32)
+                        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+                        centroid = vectors.mean(axis=0)
+                        centroids[tier] = centroid / np.linalg.norm(centroid)
+                    self._centroids = centroids
+        return self._centroids
+
+    def match_embedding(self, question: str, embedding: Optional[List[float]] = None) -> RouteDecision:
+        try:
+            centroids = self._ensure_centroids()
+            if embedding is None:
+                embedding = self.embeddings.embed_query(question)
+        except Exception as e:
+            return RouteDecision(KB_WEB, f"no embedding ({e})")
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        kb_score = float(centroids[KB_ONLY] @ query)
+        web_score = float(centroids[KB_WEB] @ query)
+        tier = KB_ONLY if kb_score - web_score >= self.margin else KB_WEB
+        return RouteDecision(tier, f"centroid kb={kb_score:.3f} web={web_score:.3f}")
+
+    def route(self, question: str, embedding: Optional[List[float]] = None) -> RouteDecision:
+        decision = self.match_keywords(question) or self.match_embedding(question, embedding)
+        self.record(question, decision)
+        return decision
+
+    def record(self, question: str, decision: RouteDecision):
+        self.decisions[decision.tier] += 1
+        logger.info(f"🧭 Route {decision.tier} for {question!r}: {decision.reason}")
+
+    def stats(self) -> Dict[str, int]:
+        return {tier: self.decisions[tier] for tier in TIERS}
@@ -1,22 +1,30 @@
 import os
-import pickle
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict
-import shutil
-
-# LangChain imports
-from langchain_community.document_loaders import TextLoader, DirectoryLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import SentenceTransformerEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain_groq import ChatGroq
-from langchain.schema import Document
-from langchain.storage import InMemoryStore
-from langchain.retrievers import ParentDocumentRetriever
+import time
+from contextlib import aclosing, contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 
 # Web Search
 from langchain_community.tools import DuckDuckGoSearchRun
-from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+
+from ..config import settings
+from .answer_cache import SemanticAnswerCache
+from .embeddings import create_query_embeddings
+from .faculty_directory import DirectoryAnswer, FacultyDirectory
+from .knowledge_index import KnowledgeIndex
+from .llm_client import LLMUnavailable, ResilientChatModel, create_groq_chat, create_http_client
+from .prompt_builder import PromptBuilder, TokenCounter
+from .query_router import CANNED_REPLIES, KB_ONLY, KB_WEB, SMALL_TALK, WEB_FIRST, QueryRouter
+from .retrieval_server import RemoteEmbeddings, RemoteRetriever, RetrievalClient
+from .session_history import CachedSessionHistory, SessionHistoryStore
+from .session_summary import SessionSummarizer
+from .web_search import CachedWebSearch, TimedDuckDuckGoSearchAPIWrapper
+from ..utils.concurrency import AsyncSingleFlight, CircuitBreaker, ReadWriteLock
+from ..utils.metrics import Counter, Gauge, registry
+from ..utils.tracing import tracer
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -24,99 +32,206 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Retries are exhausted or the circuit is open: say so instead of blaming search limits
+LLM_UNAVAILABLE_REPLY = "I can't reach my answer service right now. Please try again in a minute."
+SEARCH_LIMIT_REPLY = "I'm hitting a search limit. Give me a second and ask again."
+# Saved to chat_messages like any answer, but they say nothing about the conversation,
+# so prompt history and summaries leave those turns out
+NON_ANSWERS = frozenset({LLM_UNAVAILABLE_REPLY, SEARCH_LIMIT_REPLY, *CANNED_REPLIES.values()})
+
+
+class AnswerInterrupted(Exception):
+    """The LLM failed after part of a streamed answer was sent; the partial answer must not be saved."""
+
+STAGE_SECONDS = registry.histogram(
+    "chat_stage_seconds", "Time spent in each stage of answering a chat question", ["stage"])
+STAGE_TIMEOUTS = registry.counter(
+    "chat_stage_timeouts_total", "Context stages cut off at their deadline", ["stage"])
+
+
+@contextmanager
+def stage(name: str):
+    """Time a stage of answering in chat_stage_seconds, and as a span of the request's trace."""
+    with tracer.span(name), STAGE_SECONDS.time(stage=name):
+        yield
+
 class RAGService:
     def __init__(self):
         logger.info("Initializing RAG Service with Smart Query Logic...")
 
-        self.embeddings = SentenceTransformerEmbeddings(model_name="BAAI/bge-base-en-v1.5")
-
-        # Temperature 0.3: Keep it low to prevent hallucinating names
-        self.llm = ChatGroq(
-            groq_api_key=os.getenv("GROQ_API_KEY"),
-            model_name="llama-3.3-70b-versatile",
-            temperature=0.3,
+        # In remote mode the model and index live in the shared retrieval server
+        self.retrieval_client = None
+        if settings.rag_retrieval_mode == "remote":
+            self.retrieval_client = RetrievalClient(settings.rag_retrieval_socket, timeout=settings.rag_retrieval_ipc_timeout)
+            self.embeddings = RemoteEmbeddings(self.retrieval_client)
+        else:
+            self.embeddings = create_query_embeddings()
+
+        # Both Groq models share one keep-alive connection pool; each has its own retries and circuit
+        self.http_client = create_http_client(
+            max_connections=settings.rag_llm_max_connections,
+            keepalive_connections=settings.rag_llm_keepalive_connections,
+            keepalive_expiry=settings.rag_llm_keepalive_expiry,
+            timeout=settings.rag_llm_timeout,
         )
+        # Temperature 0.3: Keep it low to prevent hallucinating names
+        self.llm = self._resilient(self._create_llm(
+            "llama-3.3-70b-versatile", 0.3, settings.rag_fake_llm_answer_words,
+        ), "answer")
 
-        # Max results 5 ensures we see the specific faculty page snippet
-        self.search_wrapper = DuckDuckGoSearchAPIWrapper(max_results=5)
-        self.search_tool = DuckDuckGoSearchRun(api_wrapper=self.search_wrapper)
+        # Identical prompts in flight at the same time (a burst of students asking the same
+        # first question) share one Groq call
+        self.llm_flights = AsyncSingleFlight()
+
+        if settings.rag_search_backend == "fake":
+            from benchmarks.fakes import FakeSearchTool  # test double; only importable from backend/
+            self.search_tool = FakeSearchTool(latency=settings.rag_fake_search_latency, jitter=settings.rag_fake_search_jitter)
+        else:
+            # Max results 5 ensures we see the specific faculty page snippet
+            self.search_wrapper = TimedDuckDuckGoSearchAPIWrapper(max_results=5, timeout=settings.rag_web_search_timeout)
+            self.search_tool = DuckDuckGoSearchRun(api_wrapper=self.search_wrapper)
+        self.web_search = CachedWebSearch(
+            self._run_search_tool,
+            cache_size=settings.rag_search_cache_size,
+            ttl=settings.rag_search_cache_ttl,
+            rate_per_second=settings.rag_search_rate_per_second,
+            burst=settings.rag_search_burst,
+        )
 
         self.retriever = None
-        self.session_conversations: Dict[int, Dict[int, List[Dict]]] = {}
+        self.knowledge_index = None
+        self._kb_version = "empty"
+        self._index_lock = ReadWriteLock()  # queries read the local index while a refresh rewrites it
+        self.faculty_directory = FacultyDirectory.load("college_data")
+        self.prompt_builder = PromptBuilder(
+            TokenCounter(settings.rag_prompt_tokenizer),
+            history_tokens=settings.rag_prompt_history_tokens,
+            db_tokens=settings.rag_prompt_db_tokens,
+            web_tokens=settings.rag_prompt_web_tokens,
+            summary_tokens=settings.rag_prompt_summary_tokens,
+        )
+        self.router = QueryRouter(self.embeddings, enabled=settings.rag_router_enabled, margin=settings.rag_router_margin)
+        self.answer_cache = SemanticAnswerCache(
+            max_entries=settings.rag_answer_cache_size,
+            threshold=settings.rag_answer_cache_threshold,
+            ttl=settings.rag_answer_cache_ttl,
+        )
+        self.session_history = CachedSessionHistory(
+            SessionHistoryStore(max_turns=settings.rag_history_turns, skip_answers=NON_ANSWERS),
+            max_sessions=settings.rag_history_cache_sessions,
+            ttl=settings.rag_history_cache_ttl,
+        )
+        # Summaries are short and frequent, so they go to a smaller, cheaper model
+        self.summarizer = SessionSummarizer(
+            self._resilient(self._create_llm(settings.rag_summary_model, 0, settings.rag_summary_max_words), "summary"),
+            verbatim_turns=settings.rag_summary_verbatim_turns,
+            fold_turns=settings.rag_summary_fold_turns,
+            max_words=settings.rag_summary_max_words,
+            skip_answers=NON_ANSWERS,
+        )
+
+        # Bounded pool for the blocking parts of the async pipeline (embedding, Chroma, DuckDuckGo, disk)
+        self._executor = ThreadPoolExecutor(max_workers=settings.rag_executor_workers, thread_name_prefix="rag")
+        # Web searches wait on DuckDuckGo, not the CPU; on their own pool a few slow ones can't starve retrieval
+        self._search_executor = ThreadPoolExecutor(max_workers=settings.rag_search_workers, thread_name_prefix="rag-search")
 
         self._load_or_create_retriever()
-        self._load_conversation_memory()
+        registry.register_collector(self._collect_metrics)
         logger.info("✅ RAG Service initialized successfully")
 
-    def _load_conversation_memory(self):
-        memory_file = "conversation_memory.pkl"
-        if os.path.exists(memory_file):
-            try:
-                with open(memory_file, 'rb') as f:
-                    self.session_conversations = pickle.load(f)
-            except Exception:
-                self.session_conversations = {}
+    def _create_llm(self, model_name: str, temperature: float, fake_words: int):
+        """The Groq chat model, or with rag_llm_backend=fake a local stand-in answering `fake_words` words."""
+        if settings.rag_llm_backend == "fake":
+            from benchmarks.fakes import FakeChatModel, canned_answer  # test double; only importable from backend/
+            return FakeChatModel(
+                latency=settings.rag_fake_llm_latency,
+                jitter=settings.rag_fake_llm_jitter,
+                tokens_per_second=settings.rag_fake_llm_tokens_per_second,
+                answer=canned_answer(fake_words),
+                max_concurrency=settings.rag_fake_llm_max_concurrency,
+            )
+        return create_groq_chat(model_name, temperature, self.http_client, settings.rag_llm_base_url, settings.rag_llm_timeout)
+
+    @staticmethod
+    def _resilient(llm, name: str) -> ResilientChatModel:
+        return ResilientChatModel(
+            llm,
+            timeout=settings.rag_llm_timeout,
+            max_attempts=settings.rag_llm_max_attempts,
+            backoff_base=settings.rag_llm_backoff_base,
+            backoff_max=settings.rag_llm_backoff_max,
+            breaker=CircuitBreaker(settings.rag_llm_breaker_failures, settings.rag_llm_breaker_reset),
+            name=name,
+        )
 
-    def _save_conversation_memory(self):
-        try:
-            with open("conversation_memory.pkl", 'wb') as f:
-                pickle.dump(self.session_conversations, f)
-        except Exception as e:
-            logger.error(f"Failed to save memory: {e}")
-    
     def _load_or_create_retriever(self):
-        chroma_dir = "./chroma_db_final"
-        if os.path.exists(chroma_dir):
-            shutil.rmtree(chroma_dir) 
-        self._create_retriever_and_vectorstore()
+        if self.retrieval_client is not None:
+            self.retriever = RemoteRetriever(client=self.retrieval_client)
+            logger.info(f"Using retrieval server at {settings.rag_retrieval_socket}")
+            return
 
-    def _create_retriever_and_vectorstore(self):
         data_dir = "college_data"
         if not os.path.exists(data_dir) or not os.listdir(data_dir):
              return
 
         try:
-            loader = DirectoryLoader(
-                data_dir,
-                glob="**/*.txt",
-                loader_cls=lambda file_path: TextLoader(file_path, encoding='utf-8'),
-            )
-            all_docs = loader.load()
-
-            parent_splitter = RecursiveCharacterTextSplitter(separators=["\n=== "], chunk_size=2000, chunk_overlap=200)
-            child_splitter = RecursiveCharacterTextSplitter(chunk_size=400, chunk_overlap=100)
-
-            vectorstore = Chroma(
-                collection_name="split_by_section",
-                embedding_function=self.embeddings,
-                persist_directory="./chroma_db_final"
-            )
-            store = InMemoryStore()
-
-            self.retriever = ParentDocumentRetriever(
-                vectorstore=vectorstore,
-                docstore=store,
-                child_splitter=child_splitter,
-                parent_splitter=parent_splitter,
+            self.knowledge_index = KnowledgeIndex(
+                self.embeddings,
+                data_dir=data_dir,
+                persist_dir=settings.rag_index_dir,
+                embedding_backend=settings.rag_embedding_backend,
+                vector_store=settings.rag_vector_store,
+                vector_store_options=settings.rag_faiss_options,
+                **settings.rag_chunking,
+                read_only=settings.rag_index_read_only,
             )
-            self.retriever.add_documents(all_docs, ids=None)
+            if settings.rag_index_read_only:
+                # Built beforehand with `python -m app.services.knowledge_index`
+                self.knowledge_index.open()
+            else:
+                # Only files added/changed since the last boot get re-embedded
+                self.knowledge_index.sync()
+            self._build_retriever()
 
         except Exception as e:
             logger.error(f"❌ Error creating retriever: {e}")
 
-    def _get_session_history(self, user_id: int, session_id: int) -> List[Dict]:
-        if user_id not in self.session_conversations:
-            return []
-        if session_id not in self.session_conversations[user_id]:
-            return []
-        return self.session_conversations[user_id][session_id]
+    def _build_retriever(self):
+        self.retriever = self.knowledge_index.as_retriever(settings.rag_retriever, settings.rag_retrieval_k)
+        self._kb_version = self.knowledge_index.version
 
-    def _store_session_conversation(self, user_id: int, session_id: int, question: str, answer: str):
-        if user_id not in self.session_conversations: self.session_conversations[user_id] = {}
-        if session_id not in self.session_conversations[user_id]: self.session_conversations[user_id][session_id] = []
-        
-        self.session_conversations[user_id][session_id].append({'question': question, 'answer': answer})
-        self._save_conversation_memory()
+    @property
+    def kb_version(self) -> str:
+        """Version of the knowledge base, without I/O: the answer cache reads it on the event loop."""
+        if self.retrieval_client is not None:
+            # Updated from every retrieval server reply (the cache lookup embeds through it first)
+            return self.retrieval_client.kb_version or "unknown"
+        return self._kb_version
+
+    def refresh_knowledge_base(self):
+        """Re-sync the index with college_data; cached answers from the old version are dropped.
+
+        A read-only worker re-opens the index instead (whoever owns it has to sync it first).
+        Blocking; call it from a thread, not from async code. Returns the new kb_version.
+        """
+        old_version = self.kb_version
+        if self.retrieval_client is not None:
+            self.retrieval_client.call("refresh")
+        else:
+            with self._index_lock.write():
+                if self.knowledge_index.read_only:
+                    self.knowledge_index.open()
+                else:
+                    self.knowledge_index.sync()
+                self._build_retriever()
+        self.faculty_directory = FacultyDirectory.load("college_data")
+        if self.kb_version != old_version:
+            logger.info(f"📚 Knowledge base {old_version} -> {self.kb_version}, answer cache cleared")
+            self.answer_cache.invalidate()
+        return self.kb_version
+
+    def _run_search_tool(self, search_query: str) -> str:
+        return self.search_tool.run(search_query)
 
     # --- NEW: SMART SEARCH LOGIC ---
     def _perform_web_search(self, question):
@@ -146,73 +261,315 @@ class RAGService:
                 search_query = f"{question} site:apsit.edu.in"
 
             logger.info(f"🔎 Executing Smart Search: {search_query}")
-            return self.search_tool.run(search_query)
+            return self.web_search.run(search_query)
 
         except Exception as e:
             logger.error(f"Web search failed: {e}")
             return ""
 
-    def get_response_for_session(self, question: str, user_id: int, session_id: int) -> str:
-        
-        # 1. Greeting Logic
-        history_list = self._get_session_history(user_id, session_id)
-        if len(history_list) > 0:
-            style_instruction = "Strictly DO NOT greet. Answer directly."
-            history_text = "\n".join([f"User: {msg['question']}\nYou: {msg['answer']}" for msg in history_list[-6:]])
-        else:
-            style_instruction = "Start with a short, friendly greeting."
-            history_text = "No previous conversation."
-
-        # 2. Retrieve Documents (Internal DB)
+    def _retrieve_context(self, question: str) -> List[str]:
+        """Retrieved parent chunks, best first."""
         try:
-            db_docs = self.retriever.get_relevant_documents(question)
-            db_context = "\n".join([doc.page_content for doc in db_docs]) if db_docs else ""
+            with self._index_lock.read():
+                return [doc.page_content for doc in self.retriever.get_relevant_documents(question)]
         except Exception:
-            db_context = ""
-
-        # 3. Web Search
-        web_context = ""
-        if len(question.split()) > 1: 
-            web_context = self._perform_web_search(question)
-        
-        # 4. Construct Prompt
-        knowledge_base = f"""
-        [SOURCE 1: LIVE WEB SEARCH (HIGHEST PRIORITY)]:
-        {web_context}
-
-        [SOURCE 2: INTERNAL DATABASE (SECONDARY)]:
-        {db_context}
-        """
+            return []
 
-        final_prompt = f"""You are a smart senior student at APSIT.
+    def _build_prompt(self, question: str, history_list: List[Dict], db_chunks: List[str], web_context: str,
+                      summary: str = "") -> str:
+        with stage("prompt"):
+            built = self.prompt_builder.build(question, history_list, db_chunks or [], web_context or "", summary)
+        summary = ", ".join(f"{name}={count}" for name, count in built.tokens.items())
+        if built.dropped or built.truncated:
+            summary += f" (dropped {built.dropped}, truncated {built.truncated})"
+        logger.info(f"🧮 Prompt tokens: {summary}")
+        return built.text
+
+    def _context_stages(self, tier: str) -> Dict[str, Tuple]:
+        """Independent context-gathering stages for a route tier: name -> (callable, timeout seconds, executor)."""
+        retrieval = (self._retrieve_context, settings.rag_retrieval_timeout, self._executor)
+        web_search = (self._perform_web_search, settings.rag_web_search_timeout, self._search_executor)
+        if tier == WEB_FIRST:
+            return {"web_search": web_search}
+        if tier == KB_WEB:
+            return {"retrieval": retrieval, "web_search": web_search}
+        return {"retrieval": retrieval}
+
+    def _log_stage_timings(self, session_id: int, timings: Dict[str, Dict]):
+        summary = ", ".join(
+            f"{name}={t['ms']:.0f}ms/{t['budget_ms']:.0f}ms {t['status']}" for name, t in timings.items()
+        )
+        if any(t["status"] != "ok" for t in timings.values()):
+            logger.warning(f"⏱️ Context stages for session {session_id} missed budget: {summary}")
+        else:
+            logger.info(f"⏱️ Context stages for session {session_id}: {summary}")
 
-        **CRITICAL INSTRUCTIONS:**
-        1. **Conflict Rule:** If Source 1 and Source 2 disagree on a person's name/role, **Source 1 (Web) is the TRUTH**.
-        2. **HOD Check:** When checking for "HOD" or "Head of Department", look for the exact name listed next to that title in Source 1. Ignore "Assistant Professor" names unless they are explicitly called HOD.
-        3. **Correction:** If the user corrects you (e.g., "Mugdha is HOD"), trust the user and double-check Source 1.
-        4. **Persona:** {style_instruction} Be helpful and confident.
+    async def _run_stage(self, name: str, func, question: str, timeout: float,
+                         executor: ThreadPoolExecutor) -> Tuple[str, Dict]:
+        started = time.perf_counter()
+        deadline = started + timeout
 
-        **CONTEXT:**
-        History: {history_text}
-        User Question: {question}
+        def run_unless_late(question: str):
+            # Still queued behind other work at the deadline: nobody is waiting for the result any more
+            return func(question) if time.perf_counter() < deadline else ""
 
-        **INFORMATION:**
-        {knowledge_base}
+        with tracer.span(name, budget_ms=timeout * 1000) as span:
+            try:
+                result = await asyncio.wait_for(self._run_blocking(run_unless_late, question, executor=executor), timeout)
+                status = "ok"
+            except asyncio.TimeoutError:
+                # The wait is cut off, not the work: it keeps its executor thread until it returns (a search
+                # up to its client timeout, a remote retrieval up to rag_retrieval_ipc_timeout), result ignored
+                result, status = "", "timeout"
+            span.set_attribute("status", status)
+        return result, {"status": status, "ms": (time.perf_counter() - started) * 1000, "budget_ms": timeout * 1000}
+
+    async def _gather_context(self, question: str, tier: str) -> Tuple[Dict[str, str], Dict[str, Dict]]:
+        """Run the tier's stages in parallel on their executors, each cut off at its own deadline."""
+        stages = self._context_stages(tier)
+        outcomes = await asyncio.gather(
+            *(self._run_stage(name, func, question, timeout, executor)
+              for name, (func, timeout, executor) in stages.items())
+        )
+        results = {name: outcome[0] for name, outcome in zip(stages, outcomes)}
+        timings = {name: outcome[1] for name, outcome in zip(stages, outcomes)}
+        for name, timing in timings.items():
+            STAGE_SECONDS.observe(timing["ms"] / 1000, stage=name)
+            if timing["status"] == "timeout":
+                STAGE_TIMEOUTS.inc(stage=name)
+        return results, timings
+
+    def _lookup_cached_answer(self, question: str, history_list: List[Dict],
+                              summary: str = "") -> Tuple[Optional[str], Optional[List[float]]]:
+        """Semantic cache lookup for first-turn questions; returns (answer, question embedding)."""
+        # Follow-ups depend on the conversation, so only first turns are cached
+        if history_list or summary:
+            return None, None
+        try:
+            with stage("cache_lookup"):
+                embedding = self.embeddings.embed_query(question)
+                hit = self.answer_cache.lookup(embedding, self.kb_version)
+        except Exception as e:
+            logger.warning(f"Answer cache lookup skipped: {e}")
+            return None, None
+        if hit is None:
+            return None, embedding
+        logger.info(f"💾 Answer cache hit: {question!r} ~ {hit.question!r} (hit rate {self.answer_cache.stats()['hit_rate']:.0%})")
+        return hit.answer, embedding
+
+    def _remember_answer(self, question: str, embedding: Optional[List[float]], answer: str):
+        if embedding is not None:
+            self.answer_cache.store(question, embedding, answer, self.kb_version)
+
+    def _directory_answer(self, question: str, history_list: List[Dict], summary: str = "") -> Optional[DirectoryAnswer]:
+        # A follow-up ("and their email?", "what about civil?") depends on earlier turns the table can't see
+        if not settings.rag_directory_fast_path or history_list or summary:
+            return None
+        answer = self.faculty_directory.answer(question)
+        if answer is not None:
+            logger.info(f"📇 Directory fast path ({answer.kind}): {question!r}")
+        return answer
+
+    async def _run_blocking(self, func, *args, executor: Optional[ThreadPoolExecutor] = None):
+        """Run CPU/IO-bound work on a bounded executor (the RAG one by default) instead of the event loop."""
+        loop = asyncio.get_running_loop()
+        # Under the caller's trace span, so spans opened on the worker thread nest correctly
+        return await loop.run_in_executor(executor or self._executor, tracer.wrap(func, *args))
+
+    async def _aprepare_prompt(self, question: str, history_list: List[Dict], session_id: int,
+                               tier: str = KB_WEB, summary: str = "") -> str:
+        # Retrieval (CPU-bound embedding + Chroma) and DuckDuckGo (sync client) both run on
+        # the executor, concurrently, each bounded by its own deadline
+        context, timings = await self._gather_context(question, tier)
+        if tier == WEB_FIRST and not context.get("web_search"):
+            # Nothing from the web (timeout, rate limit, no hits): fall back to the knowledge base
+            fallback, fallback_timings = await self._gather_context(question, KB_ONLY)
+            context.update(fallback)
+            timings.update(fallback_timings)
+        self._log_stage_timings(session_id, timings)
+
+        return self._build_prompt(
+            question, history_list, context.get("retrieval") or [], context.get("web_search", ""), summary
+        )
 
-        **ANSWER:**"""
+    async def _aplan_answer(self, question: str, history_list: List[Dict], session_id: int,
+                            summary: str = "") -> Tuple[Optional[str], Optional[str], Optional[List[float]]]:
+        """Return (ready answer, None, None) when no LLM call is needed, else (None, prompt, embedding)."""
+        route = self.router.match_keywords(question)
+        if route is not None and route.tier == SMALL_TALK:
+            self.router.record(question, route)
+            return route.reply, None, None
+
+        direct = self._directory_answer(question, history_list, summary)
+        if direct is not None:
+            if not settings.rag_directory_llm_phrasing:
+                return direct.text, None, None
+            # The directory entry is the whole context; no retrieval or web search needed
+            return None, self._build_prompt(question, history_list, [direct.text], "", summary), None
+
+        cached, embedding = await self._run_blocking(self._lookup_cached_answer, question, history_list, summary)
+        if cached is not None:
+            return cached, None, None
+
+        if route is None:
+            with stage("routing"):
+                route = await self._run_blocking(self.router.match_embedding, question, embedding)
+        self.router.record(question, route)
+        return None, await self._aprepare_prompt(question, history_list, session_id, route.tier, summary), embedding
+
+    @staticmethod
+    def _prompt_key(mode: str, prompt: str) -> str:
+        return f"{mode}:{hashlib.sha256(prompt.encode('utf-8')).hexdigest()}"
+
+    async def _ainvoke_llm(self, prompt: str):
+        if not settings.rag_llm_single_flight:
+            return await self.llm.ainvoke(prompt)
+        key = self._prompt_key("invoke", prompt)
+        if key in self.llm_flights:
+            logger.info(f"🔗 Joining in-flight LLM call ({self.llm_flights.shared + 1} coalesced so far)")
+        return await self.llm_flights.do(key, lambda: self.llm.ainvoke(prompt))
+
+    def _astream_llm(self, prompt: str) -> AsyncIterator:
+        if not settings.rag_llm_single_flight:
+            return self.llm.astream(prompt)
+        key = self._prompt_key("stream", prompt)
+        if key in self.llm_flights:
+            logger.info(f"🔗 Joining in-flight LLM stream ({self.llm_flights.shared + 1} coalesced so far)")
+        return self.llm_flights.stream(key, lambda: self.llm.astream(prompt))
+
+    async def aget_response_for_session(self, question: str, user_id: int, session_id: int) -> str:
+        """Answer a chat-session question without ever blocking the event loop."""
+        with stage("answer"):
+            return await self._aget_response_for_session(question, user_id, session_id)
+
+    async def _aget_response_for_session(self, question: str, user_id: int, session_id: int) -> str:
+        with stage("history"):
+            memory = await self.session_history.get_memory(user_id, session_id)
+
+        ready, final_prompt, embedding = await self._aplan_answer(question, memory.turns, session_id, memory.summary)
+        if ready is not None:
+            return ready
 
         try:
-            response = self.llm.invoke(final_prompt)
-            self._store_session_conversation(user_id, session_id, question, response.content)
-            return response.content
-
+            with stage("llm"):
+                response = await self._ainvoke_llm(final_prompt)
+        except LLMUnavailable as e:
+            logger.error(f"❌ LLM unavailable: {e}")
+            return LLM_UNAVAILABLE_REPLY
         except Exception as e:
             logger.error(f"❌ CRITICAL ERROR: {e}")
-            return "I'm hitting a search limit. Give me a second and ask again."
+            return SEARCH_LIMIT_REPLY
+
+        self._remember_answer(question, embedding, response.content)
+        return response.content
+
+    async def astream_response_for_session(self, question: str, user_id: int, session_id: int) -> AsyncIterator[str]:
+        """Yield answer tokens as the LLM produces them."""
+        started = time.perf_counter()
+        with stage("history"):
+            memory = await self.session_history.get_memory(user_id, session_id)
+
+        ready, final_prompt, embedding = await self._aplan_answer(question, memory.turns, session_id, memory.summary)
+        if ready is not None:
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage="answer")
+            yield ready
+            return
+
+        parts = []
+        first_token_ms = None
+        llm_started = time.perf_counter()
+        try:
+            # Closed right away if the client goes, so a shared stream knows this caller left
+            async with aclosing(self._astream_llm(final_prompt)) as chunks:
+                async for chunk in chunks:
+                    if chunk.content:
+                        if not parts:
+                            first_token_ms = (time.perf_counter() - llm_started) * 1000
+                            STAGE_SECONDS.observe(first_token_ms / 1000, stage="llm_first_token")
+                        parts.append(chunk.content)
+                        yield chunk.content
+        except LLMUnavailable as e:
+            logger.error(f"❌ LLM unavailable while streaming: {e}")
+            if parts:
+                raise AnswerInterrupted("The answer was interrupted. Please ask again.") from e
+            yield LLM_UNAVAILABLE_REPLY
+            return
+        except Exception as e:
+            logger.error(f"❌ CRITICAL ERROR while streaming: {e}")
+            if parts:
+                raise AnswerInterrupted("The answer was interrupted. Please ask again.") from e
+            yield SEARCH_LIMIT_REPLY
+            return
+
+        now = time.perf_counter()
+        STAGE_SECONDS.observe(now - llm_started, stage="llm")
+        # Recorded afterwards: a span held open across the yields above would leak into the consumer
+        attributes = {"tokens": len(parts)}
+        if first_token_ms is not None:  # an empty completion has no first token
+            attributes["first_token_ms"] = round(first_token_ms, 1)
+        tracer.record("llm", now - llm_started, **attributes)
+        STAGE_SECONDS.observe(now - started, stage="answer")
+        answer = "".join(parts)
+        self._remember_answer(question, embedding, answer)
+
+    def turn_saved(self, user_id: int, session_id: int, message_id: int, question: str, answer: str):
+        """Call once a turn is committed to chat_messages: updates the cached history, then the summary."""
+        self.session_history.record_turn(user_id, session_id, message_id, question, answer)
+        self.schedule_session_summary(user_id, session_id)
+
+    def schedule_session_summary(self, user_id: int, session_id: int):
+        """Fold older turns into the session summary in the background; call once the turn is saved."""
+        if not settings.rag_summary_enabled:
+            return
+        pending = self.session_history.pending_turns(user_id, session_id)
+        if pending is not None and not self.summarizer.due(pending):
+            return
+        self.summarizer.schedule(user_id, session_id, on_update=self.session_history.forget)
 
     def clear_session_memory(self, user_id: int, session_id: int):
-        if user_id in self.session_conversations and session_id in self.session_conversations[user_id]:
-            del self.session_conversations[user_id][session_id]
-            self._save_conversation_memory()
+        self.session_history.forget(user_id, session_id)
+
+    def _collect_metrics(self):
+        """Scrape-time view of the caches, LLM clients and router, from their stats()."""
+        caches = {"answer": self.answer_cache, "web_search": self.web_search, "session_history": self.session_history}
+        if hasattr(self.embeddings, "stats"):
+            caches["query_embedding"] = self.embeddings
+        hits = Counter("rag_cache_hits_total", "Cache lookups that found an entry", ["cache"])
+        misses = Counter("rag_cache_misses_total", "Cache lookups that found nothing", ["cache"])
+        hit_ratio = Gauge("rag_cache_hit_ratio", "Hits / lookups since startup", ["cache"])
+        entries = Gauge("rag_cache_entries", "Entries currently cached", ["cache"])
+        for name, cache in caches.items():
+            stats = cache.stats()
+            if "hits" not in stats:
+                continue
+            hits.inc(stats["hits"], cache=name)
+            misses.inc(stats["misses"], cache=name)
+            hit_ratio.set(stats["hit_rate"], cache=name)
+            entries.set(stats["size"], cache=name)
+
+        llm_calls = Counter("llm_calls_total", "Calls to the LLM client (each may take several attempts)", ["llm"])
+        llm_retries = Counter("llm_retries_total", "Attempts retried after a retryable failure", ["llm"])
+        llm_timeouts = Counter("llm_timeouts_total", "Attempts cut off by the per-attempt timeout", ["llm"])
+        llm_failed = Counter("llm_failed_calls_total", "Calls that failed after every attempt", ["llm"])
+        circuit_open = Gauge("llm_circuit_open", "1 while the circuit breaker fails calls fast", ["llm"])
+        for llm in (self.llm, self.summarizer.llm):
+            stats = llm.stats()
+            llm_calls.inc(stats["calls"], llm=llm.name)
+            llm_retries.inc(stats["retries"], llm=llm.name)
+            llm_timeouts.inc(stats["timeouts"], llm=llm.name)
+            llm_failed.inc(stats["failed_calls"], llm=llm.name)
+            circuit_open.set(stats["circuit"]["state"] == "open", llm=llm.name)
+
+        flights = self.llm_flights.stats()
+        in_flight = Gauge("llm_requests_in_flight", "Distinct answer LLM calls running right now")
+        in_flight.set(flights["in_flight"])
+        coalesced = Counter("llm_coalesced_total", "Answer requests that joined an identical in-flight LLM call")
+        coalesced.inc(flights["coalesced"])
+
+        routes = Counter("rag_route_decisions_total", "Questions per route tier", ["tier"])
+        for tier, count in self.router.stats().items():
+            routes.inc(count, tier=tier)
+        return [hits, misses, hit_ratio, entries, llm_calls, llm_retries, llm_timeouts, llm_failed, circuit_open,
+                in_flight, coalesced, routes]
 
 rag_service = RAGService()
\ No newline at end of file
@@ -0,0 +1,232 @@
+import os
+import json
+import queue
+import struct
+import socket
+import logging
+import socketserver
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain.schema import Document
+
+from ..config import settings
+from ..utils.concurrency import ReadWriteLock
+from .embeddings import create_query_embeddings
+from .knowledge_index import KnowledgeIndex
+
+logger = logging.getLogger(__name__)
+
+# Every message is a 4-byte big-endian length followed by that many bytes of JSON
+_HEADER = struct.Struct(">I")
+
+
+class RetrievalServerError(RuntimeError):
+    """The retrieval server could not be reached or failed to handle a request."""
+
+
+def send_message(sock: socket.socket, payload: Dict[str, Any]):
+    body = json.dumps(payload).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(body)) + body)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("Connection closed by peer")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_message(sock: socket.socket) -> Dict[str, Any]:
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, size))
+
+
+class RetrievalServer:
+    """Single process that owns the embedding model and the knowledge index.
+
+    API workers talk to it over a Unix socket (see RetrievalClient) instead of
+    each loading bge-base, Chroma and the parent store. Every connection is
+    handled on its own thread, and all of them share one BatchingEmbeddings,
+    so concurrent queries from different workers are encoded in one batch.
+    A refresh re-syncs the index under a write lock, so queries never see a
+    half-updated index (chunks deleted but not yet re-added).
+    """
+
+    def __init__(self, socket_path: str, embeddings: Embeddings = None,
+                 data_dir: str = "college_data", persist_dir: str = "./chroma_db_final"):
+        self.socket_path = socket_path
+        self.embeddings = embeddings if embeddings is not None else create_query_embeddings()
+        self.knowledge_index = KnowledgeIndex(
+            self.embeddings,
+            data_dir=data_dir,
+            persist_dir=persist_dir,
+            embedding_backend=settings.rag_embedding_backend,
+            vector_store=settings.rag_vector_store,
+            vector_store_options=settings.rag_faiss_options,
+            **settings.rag_chunking,
+            read_only=settings.rag_index_read_only,
+        )
+        if settings.rag_index_read_only:
+            self.knowledge_index.open()
+        else:
+            self.knowledge_index.sync()
+        self.retriever = self.knowledge_index.as_retriever(settings.rag_retriever, settings.rag_retrieval_k)
+        self._index_lock = ReadWriteLock()
+        self._server = None
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        if request.get("op") == "refresh":
+            with self._index_lock.write():
+                self.knowledge_index.sync()
+                self.retriever = self.knowledge_index.as_retriever(settings.rag_retriever, settings.rag_retrieval_k)
+                version = self.knowledge_index.version
+            return {"version": version, "kb_version": version}
+        with self._index_lock.read():
+            response = self._dispatch(request)
+            # Every reply carries the index version, so clients keep it current without asking
+            response["kb_version"] = self.knowledge_index.version
+        return response
+
+    def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        if op == "retrieve":
+            docs = self.retriever.get_relevant_documents(request["query"])
+            return {"documents": [{"page_content": d.page_content, "metadata": d.metadata} for d in docs]}
+        if op == "embed_query":
+            return {"embedding": self.embeddings.embed_query(request["text"])}
+        if op == "embed_documents":
+            return {"embeddings": self.embeddings.embed_documents(request["texts"])}
+        if op == "kb_version":
+            return {"version": self.knowledge_index.version}
+        if op == "stats":
+            stats = self.embeddings.stats() if hasattr(self.embeddings, "stats") else {}
+            return {"embeddings": stats}
+        raise ValueError(f"Unknown op: {op!r}")
+
+    def serve_forever(self):
+        service = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                # One connection carries many requests until the client closes it
+                while True:
+                    try:
+                        request = recv_message(self.request)
+                    except (ConnectionError, OSError):
+                        return
+                    try:
+                        response = service.handle(request)
+                    except Exception as e:
+                        logger.error(f"Retrieval request {request.get('op')!r} failed: {e}")
+                        response = {"error": str(e)}
+                    send_message(self.request, response)
+
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        self._server.daemon_threads = True
+        logger.info(f"🔌 Retrieval server listening on {self.socket_path}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+
+class RetrievalClient:
+    """Thread-safe client for RetrievalServer that reuses a small pool of connections."""
+
+    def __init__(self, socket_path: str, timeout: float = 10.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.kb_version: Optional[str] = None  # as of the last reply
+        self._idle: "queue.LifoQueue[socket.socket]" = queue.LifoQueue()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _request(self, payload: Dict[str, Any], fresh: bool) -> Dict[str, Any]:
+        sock = None
+        if not fresh:
+            try:
+                sock = self._idle.get_nowait()
+            except queue.Empty:
+                pass
+        if sock is None:
+            sock = self._connect()
+        try:
+            send_message(sock, payload)
+            response = recv_message(sock)
+        except BaseException:
+            sock.close()
+            raise
+        self._idle.put(sock)
+        return response
+
+    def call(self, op: str, **params) -> Dict[str, Any]:
+        payload = {"op": op, **params}
+        try:
+            response = self._request(payload, fresh=False)
+        except socket.timeout as e:
+            raise RetrievalServerError(f"Retrieval server timed out after {self.timeout}s") from e
+        except (ConnectionError, OSError):
+            # A pooled connection may predate a server restart; retry once on a new one
+            try:
+                response = self._request(payload, fresh=True)
+            except (ConnectionError, OSError) as e:
+                raise RetrievalServerError(f"Retrieval server unavailable at {self.socket_path}: {e}") from e
+        if "error" in response:
+            raise RetrievalServerError(response["error"])
+        self.kb_version = response.get("kb_version", self.kb_version)
+        return response
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class RemoteEmbeddings(Embeddings):
+    """Embeddings computed by the retrieval server."""
+
+    def __init__(self, client: RetrievalClient):
+        self.client = client
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.client.call("embed_documents", texts=texts)["embeddings"]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.client.call("embed_query", text=text)["embedding"]
+
+
+class RemoteRetriever(BaseRetriever):
+    """Parent-document retrieval performed by the retrieval server."""
+
+    client: Any
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        documents = self.client.call("retrieve", query=query)["documents"]
+        return [Document(page_content=d["page_content"], metadata=d["metadata"]) for d in documents]
+
+
+if __name__ == "__main__":
+    # Start this first, then the API workers with RAG_RETRIEVAL_MODE=remote
+    logging.basicConfig(level=logging.INFO)
+    RetrievalServer(settings.rag_retrieval_socket, persist_dir=settings.rag_index_dir).serve_forever()
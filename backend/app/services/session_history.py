@@ -0,0 +1,140 @@
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, desc, func
+
+from ..database import async_session
+from ..models.chat_session import ChatMessage, ChatSession
+from ..utils.cache import TTLCache
+
+
+@dataclass
+class SessionMemory:
+    summary: str = ""  # rolling summary of the turns up to summary_through_id
+    summary_through_id: int = 0
+    turns: List[Dict] = field(default_factory=list)  # verbatim turns after the summary, oldest first
+    marker: Tuple[int, int, int] = (0, 0, 0)  # see SessionHistoryStore.marker
+
+
+class SessionHistoryStore:
+    """Recent question/answer turns of a chat session, read from chat_messages.
+
+    chat_messages is already written once per turn by ChatSessionService, so
+    there is nothing extra to persist here, and any worker can serve any
+    session. Reads only fetch the session's rolling summary and at most the
+    last `max_turns` rows after it. Rows whose answer is one of `skip_answers`
+    (canned small-talk and failure replies) are saved like any other but
+    left out of the history.
+    """
+
+    def __init__(self, session_factory=async_session, max_turns: int = 6, skip_answers: Iterable[str] = ()):
+        self.session_factory = session_factory
+        self.max_turns = max_turns
+        self.skip_answers = frozenset(skip_answers)
+
+    @staticmethod
+    async def _marker(db, user_id: int, session_id: int) -> Tuple[int, int, int]:
+        through_id = select(ChatSession.summary_through_id).filter(ChatSession.id == session_id).scalar_subquery()
+        row = (await db.execute(
+            select(func.count(ChatMessage.id), func.coalesce(func.max(ChatMessage.id), 0), through_id)
+            .filter(ChatMessage.chat_session_id == session_id, ChatMessage.user_id == user_id)
+        )).first()
+        return row[0], row[1], row[2] or 0
+
+    async def marker(self, user_id: int, session_id: int) -> Tuple[int, int, int]:
+        """(message count, latest message id, summary_through_id): changes whenever any worker adds a
+        turn or folds the summary. One indexed query, much cheaper than reloading the turns."""
+        async with self.session_factory() as db:
+            return await self._marker(db, user_id, session_id)
+
+    async def get_memory(self, user_id: int, session_id: int) -> SessionMemory:
+        async with self.session_factory() as db:
+            marker = await self._marker(db, user_id, session_id)
+            row = (await db.execute(
+                select(ChatSession.summary, ChatSession.summary_through_id)
+                .filter(ChatSession.id == session_id, ChatSession.user_id == user_id)
+            )).first()
+            summary, through_id = (row[0] or "", row[1] or 0) if row else ("", 0)
+            result = await db.execute(
+                select(ChatMessage.question, ChatMessage.answer)
+                .filter(ChatMessage.chat_session_id == session_id, ChatMessage.user_id == user_id,
+                        ChatMessage.id > through_id, ChatMessage.answer.notin_(self.skip_answers))
+                .order_by(desc(ChatMessage.id))
+                .limit(self.max_turns)
+            )
+            rows = result.all()
+        turns = [{'question': question, 'answer': answer} for question, answer in reversed(rows)]
+        return SessionMemory(summary, through_id, turns, marker)
+
+    async def get_recent_turns(self, user_id: int, session_id: int) -> List[Dict]:
+        return (await self.get_memory(user_id, session_id)).turns
+
+
+class CachedSessionHistory:
+    """Bounded in-memory cache of session memory in front of SessionHistoryStore.
+
+    Keeps the summary and at most `max_turns` turns for each of at most
+    `max_sessions` sessions, evicting the least recently used session. A miss
+    reloads the session from the database, and so does a hit whose marker no
+    longer matches chat_messages (another worker answered in the session or
+    folded its summary), so any worker can serve any session. Turns are
+    recorded only once they are committed.
+    """
+
+    def __init__(self, store: SessionHistoryStore, max_sessions: int = 1000, ttl: float = 300):
+        self.store = store
+        self.cache = TTLCache(maxsize=max_sessions, ttl=ttl)
+        self.stale_reloads = 0  # cache hits that had to be reloaded anyway
+
+    async def get_memory(self, user_id: int, session_id: int) -> SessionMemory:
+        key = (user_id, session_id)
+        memory = self.cache.get(key)
+        if memory is not None and await self.store.marker(user_id, session_id) != memory.marker:
+            self.stale_reloads += 1
+            memory = None
+        if memory is None:
+            memory = await self.store.get_memory(user_id, session_id)
+            memory.turns = deque(memory.turns, maxlen=self.store.max_turns)
+            self.cache.set(key, memory)
+        return SessionMemory(memory.summary, memory.summary_through_id, list(memory.turns), memory.marker)
+
+    async def get_recent_turns(self, user_id: int, session_id: int) -> List[Dict]:
+        return (await self.get_memory(user_id, session_id)).turns
+
+    def record_turn(self, user_id: int, session_id: int, message_id: int, question: str, answer: str):
+        """Add a turn committed to chat_messages as `message_id`."""
+        memory = self.cache.peek((user_id, session_id))
+        # Sessions that are not cached pick the turn up from chat_messages on their next read
+        if memory is not None:
+            if answer not in self.store.skip_answers:
+                memory.turns.append({'question': question, 'answer': answer})
+            count, last_id, through_id = memory.marker
+            # If another worker added a turn meanwhile, the count still won't match on the next read
+            memory.marker = (count + 1, max(last_id, message_id), through_id)
+
+    def pending_turns(self, user_id: int, session_id: int) -> Optional[int]:
+        """Cached turns not yet folded into the summary, or None when the session is not cached."""
+        memory = self.cache.peek((user_id, session_id))
+        return None if memory is None else len(memory.turns)
+
+    def forget(self, user_id: int, session_id: int):
+        self.cache.pop((user_id, session_id))
+
+    def stats(self) -> Dict[str, object]:
+        sessions = [memory for _, memory in self.cache.items()]
+        turns = [turn for memory in sessions for turn in memory.turns]
+        cache = self.cache.stats()
+        # A stale entry is reloaded from the database, so it counts as a miss
+        hits, misses = cache["hits"] - self.stale_reloads, cache["misses"] + self.stale_reloads
+        return {
+            **cache,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "stale_reloads": self.stale_reloads,
+            "turns": len(turns),
+            "summaries": sum(1 for memory in sessions if memory.summary),
+            "approx_text_bytes": sum(len(t['question'].encode()) + len(t['answer'].encode()) for t in turns)
+            + sum(len(memory.summary.encode()) for memory in sessions),
+        }
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select, update, func
+
+from ..database import async_session
+from ..models.chat_session import ChatMessage, ChatSession
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """You maintain the running summary of a conversation between a student and the APSIT college assistant.
+
+Current summary:
+{summary}
+
+New turns to fold in:
+{turns}
+
+Rewrite the summary so it also covers the new turns, in at most {max_words} words. Keep what the student is
+asking about and anything about them that matters for follow-up questions (branch, year, category, plans),
+and the key facts, names and numbers the assistant gave. Drop greetings and repetition.
+
+SUMMARY:"""
+
+
+class SessionSummarizer:
+    """Folds chat turns that fall out of the verbatim window into a per-session summary.
+
+    The summary and the id of the last folded message are stored on
+    chat_sessions. After a turn is saved, `schedule` folds every stored turn
+    except the newest `verbatim_turns` once at least `fold_turns` of them
+    have piled up, so the prompt carries the summary plus a short verbatim
+    tail whatever the session length. Folding runs as a background task with
+    at most one fold per session at a time; the conditional update on
+    summary_through_id keeps workers from overwriting each other's folds.
+    Turns answered with one of `skip_answers` are never folded in.
+    """
+
+    def __init__(self, llm, session_factory=async_session, verbatim_turns: int = 1, fold_turns: int = 2,
+                 max_words: int = 120, skip_answers: Iterable[str] = ()):
+        self.llm = llm
+        self.session_factory = session_factory
+        self.skip_answers = frozenset(skip_answers)
+        self.verbatim_turns = verbatim_turns
+        self.fold_turns = fold_turns
+        self.max_words = max_words
+        self._running: Set[Tuple[int, int]] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.folds = 0
+        self.failures = 0
+
+    def due(self, pending_turns: int) -> bool:
+        return pending_turns >= self.verbatim_turns + self.fold_turns
+
+    def turns_to_fold(self, turns: List) -> List:
+        """Everything but the verbatim tail, once enough turns are pending."""
+        if not self.due(len(turns)):
+            return []
+        return turns[:len(turns) - self.verbatim_turns]
+
+    async def fold(self, summary: str, turns: List[Dict]) -> str:
+        turns_text = "\n".join(f"Student: {t['question']}\nAssistant: {t['answer']}" for t in turns)
+        prompt = SUMMARY_PROMPT.format(summary=summary or "(empty)", turns=turns_text, max_words=self.max_words)
+        response = await self.llm.ainvoke(prompt)
+        return response.content.strip()
+
+    async def update(self, user_id: int, session_id: int) -> bool:
+        """Fold the session's pending turns into its summary; returns whether it changed."""
+        async with self.session_factory() as db:
+            row = (await db.execute(
+                select(ChatSession.summary, ChatSession.summary_through_id)
+                .filter(ChatSession.id == session_id, ChatSession.user_id == user_id)
+            )).first()
+            if row is None:
+                return False
+            summary, through_id = row[0] or "", row[1] or 0
+            rows = (await db.execute(
+                select(ChatMessage.id, ChatMessage.question, ChatMessage.answer)
+                .filter(ChatMessage.chat_session_id == session_id, ChatMessage.id > through_id,
+                        ChatMessage.answer.notin_(self.skip_answers))
+                .order_by(ChatMessage.id)
+            )).all()
+        folded = self.turns_to_fold(rows)
+        if not folded:
+            return False
+
+        # No connection is held while the LLM writes the summary
+        new_summary = await self.fold(summary, [{'question': q, 'answer': a} for _, q, a in folded])
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(ChatSession)
+                .where(ChatSession.id == session_id,
+                       func.coalesce(ChatSession.summary_through_id, 0) == through_id)
+                .values(summary=new_summary, summary_through_id=folded[-1][0])
+            )
+            await db.commit()
+        if result.rowcount != 1:
+            return False  # another worker folded these turns first
+        self.folds += 1
+        logger.info(f"🗜️ Folded {len(folded)} turns of session {session_id} into its summary "
+                    f"({len(new_summary.split())} words)")
+        return True
+
+    def schedule(self, user_id: int, session_id: int,
+                 on_update: Optional[Callable[[int, int], None]] = None) -> Optional[asyncio.Task]:
+        key = (user_id, session_id)
+        if key in self._running:
+            return None
+        self._running.add(key)
+
+        async def run():
+            try:
+                if await self.update(user_id, session_id) and on_update is not None:
+                    on_update(user_id, session_id)
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"⚠️ Summary update for session {session_id} failed: {e}")
+            finally:
+                self._running.discard(key)
+
+        task = asyncio.create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def stats(self) -> Dict[str, int]:
+        return {"folds": self.folds, "failures": self.failures, "running": len(self._running)}
@@ -0,0 +1,85 @@
+import logging
+from typing import Callable, Dict, List, Optional
+
+from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+
+from ..utils.cache import TTLCache
+from ..utils.concurrency import SingleFlight, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class SearchRateLimited(Exception):
+    pass
+
+
+class TimedDuckDuckGoSearchAPIWrapper(DuckDuckGoSearchAPIWrapper):
+    """DuckDuckGoSearchAPIWrapper whose HTTP client gives up after `timeout` seconds.
+
+    The stage deadline only stops the request waiting; with the client's own
+    default the abandoned call would hold its search thread well past it.
+    """
+
+    timeout: float = 4.0
+
+    def _ddgs_text(self, query: str, max_results: Optional[int] = None) -> List[Dict[str, str]]:
+        from ddgs import DDGS
+
+        with DDGS(timeout=self.timeout) as ddgs:
+            results = ddgs.text(
+                query,
+                region=self.region,
+                safesearch=self.safesearch,
+                timelimit=self.time,
+                max_results=max_results or self.max_results,
+                backend=self.backend,
+            )
+            return list(results or [])
+
+
+class CachedWebSearch:
+    """Front for the outbound web search: TTL/LRU result cache, single-flight and a global rate limit.
+
+    Queries are keyed after normalization (case and whitespace), so the
+    handful of templated HOD/Principal searches are served from memory, and
+    concurrent identical searches share one outbound call. Outbound calls
+    are paced by a token bucket shared by every request in the process.
+    By default a search with no token left is skipped rather than waited
+    for: a thread sleeping on the search executor would hold up other
+    requests' searches.
+    """
+
+    def __init__(self, search_fn: Callable[[str], str], cache_size: int = 512, ttl: float = 3600,
+                 rate_per_second: float = 1.0, burst: int = 3, max_wait: float = 0.0):
+        self.search_fn = search_fn
+        self.cache = TTLCache(maxsize=cache_size, ttl=ttl)
+        self.single_flight = SingleFlight()
+        self.limiter = TokenBucket(rate=rate_per_second, capacity=burst)
+        self.max_wait = max_wait
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def run(self, query: str) -> str:
+        key = self.normalize(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.info(f"🔎 Search cache hit: {key}")
+            return cached
+        return self.single_flight.do(key, lambda: self._fetch(key, query))
+
+    def _fetch(self, key: str, query: str) -> str:
+        if not self.limiter.acquire(timeout=self.max_wait):
+            raise SearchRateLimited(f"Outbound search budget exhausted for: {key}")
+        result = self.search_fn(query)
+        self.cache.set(key, result)
+        return result
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            **self.cache.stats(),
+            "outbound_calls": self.limiter.granted,
+            "coalesced": self.single_flight.shared,
+            "rate_limited": self.limiter.rejected,
+        }
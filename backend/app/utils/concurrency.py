@@ -0,0 +1,300 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one execution (thread-based).
+
+    The first caller for a key runs `fn`; callers arriving while it is in
+    flight block on the same future and get its result or exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], object]):
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.executions += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+class _Flight:
+    """One in-flight run of AsyncSingleFlight: its task, callers, and (for streams) the chunks so far."""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self.chunks: List[Any] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.updated = asyncio.Event()
+
+    def notify(self):
+        # Wake everyone waiting on the current event; later waits use a fresh one
+        self.updated.set()
+        self.updated = asyncio.Event()
+
+
+class AsyncSingleFlight:
+    """Collapse concurrent awaits for the same key into one run (asyncio-based).
+
+    The first caller for a key starts `fn()` as a task; callers arriving
+    while it is in flight await the same task and get its result or
+    exception. A caller that is cancelled only stops waiting: the run keeps
+    going for the others, and is cancelled once no caller is left.
+    `stream()` does the same for async iterators: late joiners first get
+    the chunks produced so far, then follow the live ones.
+    Nothing is cached; the key is free again as soon as the run finishes.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self.executions = 0
+        self.shared = 0
+        self.abandoned = 0  # runs cancelled because every caller went away
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def _join(self, key: Hashable, start: Callable[[_Flight], Awaitable]) -> _Flight:
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _Flight()
+            flight.task = asyncio.ensure_future(start(flight))
+            flight.task.add_done_callback(lambda _: self._discard(key, flight))
+            self._inflight[key] = flight
+            self.executions += 1
+        else:
+            self.shared += 1
+        flight.waiters += 1
+        return flight
+
+    def _discard(self, key: Hashable, flight: _Flight):
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+    def _leave(self, key: Hashable, flight: _Flight):
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            self._discard(key, flight)
+            flight.task.cancel()
+            self.abandoned += 1
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        flight = self._join(key, lambda _: fn())
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            self._leave(key, flight)
+
+    async def stream(self, key: Hashable, fn: Callable[[], AsyncIterator]) -> AsyncIterator:
+        flight = self._join(key, lambda flight: self._pump(flight, fn))
+        try:
+            position = 0
+            while True:
+                if position < len(flight.chunks):
+                    position += 1
+                    yield flight.chunks[position - 1]
+                elif flight.finished:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                else:
+                    await flight.updated.wait()
+        finally:
+            self._leave(key, flight)
+
+    @staticmethod
+    async def _pump(flight: _Flight, fn: Callable[[], AsyncIterator]):
+        try:
+            async for chunk in fn():
+                flight.chunks.append(chunk)
+                flight.notify()
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.finished = True
+            flight.notify()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "executions": self.executions,
+            "coalesced": self.shared,
+            "abandoned": self.abandoned,
+            "in_flight": len(self._inflight),
+        }
+
+
+class ReadWriteLock:
+    """Many readers or one writer (thread-based). A waiting writer holds off new readers,
+    so a stream of queries cannot starve it."""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writer or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `capacity` banked."""
+
+    def __init__(self, rate: float, capacity: int):
+        if rate <= 0:
+            raise ValueError(f"TokenBucket rate must be positive, got {rate}")
+        if capacity < 1:
+            raise ValueError(f"TokenBucket capacity must be at least 1, got {capacity}")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.granted = 0
+        self.rejected = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take one token, waiting up to `timeout` seconds (forever if None). False if none came."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.granted += 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                if now + wait > deadline:
+                    with self._lock:
+                        self.rejected += 1
+                    return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Fail fast while a dependency is down.
+
+    Closed: every call goes through. After `failure_threshold` consecutive
+    failures the circuit opens and `allow()` refuses calls. Once
+    `reset_timeout` seconds have passed it lets a single probe through
+    (half-open): a success closes the circuit, a failure opens it again.
+    A probe that never reports back (its caller was cancelled) is replaced
+    after another `reset_timeout`.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._changed_at = time.monotonic()
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def _set_state(self, state: str, now: float):
+        self._state = state
+        self._changed_at = now
+
+    def allow(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self._state == self.OPEN and now - self._changed_at >= self.reset_timeout:
+                self._set_state(self.HALF_OPEN, now)
+                self._probe_started = None
+            if self._state == self.HALF_OPEN:
+                if self._probe_started is None or now - self._probe_started >= self.reset_timeout:
+                    self._probe_started = now
+                    return True
+            elif self._state == self.CLOSED:
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            if self._state != self.CLOSED:
+                self._set_state(self.CLOSED, time.monotonic())
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or (self._state == self.CLOSED and self._failures >= self.failure_threshold):
+                self._set_state(self.OPEN, time.monotonic())
+                self.opened += 1
+
+    def stats(self) -> Dict[str, object]:
+        return {"state": self._state, "consecutive_failures": self._failures,
+                "opened": self.opened, "rejected": self.rejected}
@@ -0,0 +1,392 @@
+import os
+import json
+import time
+import random
+import inspect
+import logging
+import functools
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+class Trace:
+    """The spans of one request. Spans started after the root span ended are dropped."""
+
+    def __init__(self, trace_id: str, sampled: bool, max_spans: int):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.max_spans = max_spans
+        self.started_at = time.time()
+        self.spans: List["Span"] = []
+        self.dropped_spans = 0
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def add(self, span: "Span") -> bool:
+        with self._lock:
+            if self.finished or len(self.spans) >= self.max_spans:
+                self.dropped_spans += 1
+                return False
+            self.spans.append(span)
+            return True
+
+
+class Span:
+    """A timed operation within a trace, with attributes and an ok/error status."""
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.status = "ok"
+        self.started = time.perf_counter()
+        self.start_offset_ms = (time.time() - trace.started_at) * 1000
+        self.duration_ms: Optional[float] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        self.status = "error"
+        self.attributes["error"] = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        if self.duration_ms is None:
+            self.duration_ms = (time.perf_counter() - self.started) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ms": round(self.start_offset_ms, 3),
+            "duration_ms": round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span when there is no sampled trace, so callers need no checks."""
+
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def trace_to_dict(trace: Trace) -> Dict[str, Any]:
+    """The trace as JSON-ready data: root span first, each span with its children nested."""
+    nodes = {span.span_id: {**span.to_dict(), "children": []} for span in trace.spans}
+    roots = []
+    for span in sorted(trace.spans, key=lambda s: s.start_offset_ms):
+        node = nodes[span.span_id]
+        parent = nodes.get(span.parent_id)
+        (parent["children"] if parent is not None else roots).append(node)
+    root = trace.spans[0]
+    return {
+        "trace_id": trace.trace_id,
+        "name": root.name,
+        "started_at": datetime.fromtimestamp(trace.started_at, timezone.utc).isoformat(timespec="milliseconds"),
+        "duration_ms": round(root.duration_ms or 0.0, 3),
+        "status": "error" if any(span.status == "error" for span in trace.spans) else "ok",
+        "sampled": trace.sampled,
+        "span_count": len(trace.spans),
+        "dropped_spans": trace.dropped_spans,
+        "spans": roots,
+    }
+
+
+class RingBufferExporter:
+    """Keeps the last `maxlen` exported traces in memory, for the /debug/traces endpoint."""
+
+    def __init__(self, maxlen: int = 200):
+        self._traces: Deque[Dict[str, Any]] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def export(self, trace: Dict[str, Any]):
+        with self._lock:
+            self._traces.append(trace)
+
+    def traces(self) -> List[Dict[str, Any]]:
+        """Newest first."""
+        with self._lock:
+            return list(reversed(self._traces))
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return next((t for t in self._traces if t["trace_id"] == trace_id), None)
+
+
+class LogExporter:
+    """Writes every exported trace as one JSON log line, for log-based trace collection."""
+
+    def __init__(self, log: logging.Logger = logger):
+        self.log = log
+
+    def export(self, trace: Dict[str, Any]):
+        self.log.info("trace %s", json.dumps(trace, default=str))
+
+
+class Tracer:
+    """Per-request traces of nested spans, carried in a context variable.
+
+    A root span is started per request (see TracingMiddleware); span()
+    opens a child of whatever span is current, so nesting follows the call
+    stack across awaits and into asyncio tasks, which copy the context.
+    Work handed to a thread pool keeps its parent only if submitted through
+    wrap(). A trace is kept when it was sampled (a `sample_rate` share of
+    requests, or the caller's traceparent asked for it), took at least
+    `slow_ms`, or has an error span; kept traces go to every exporter.
+    """
+
+    def __init__(self, exporters: Sequence = (), sample_rate: float = 0.1, slow_ms: Optional[float] = 2000.0,
+                 max_spans: int = 500, enabled: bool = True):
+        self.exporters = list(exporters)
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.max_spans = max_spans
+        self.enabled = enabled
+        self.started = 0
+        self.kept = 0
+
+    def current_span(self):
+        return _current_span.get() or NOOP_SPAN
+
+    def _should_keep(self, trace: Trace) -> bool:
+        if trace.sampled or any(span.status == "error" for span in trace.spans):
+            return True
+        root = trace.spans[0]
+        return self.slow_ms is not None and root.duration_ms >= self.slow_ms
+
+    def _export(self, trace: Trace):
+        self.kept += 1
+        data = trace_to_dict(trace)
+        for exporter in self.exporters:
+            try:
+                exporter.export(data)
+            except Exception as e:
+                logger.warning(f"Trace exporter {type(exporter).__name__} failed: {e}")
+
+    @contextmanager
+    def start_trace(self, name: str, trace_id: Optional[str] = None, sampled: Optional[bool] = None,
+                    **attributes):
+        """Root span of a new trace; nested start_trace() calls just open a child span."""
+        if not self.enabled or _current_span.get() is not None:
+            with self.span(name, **attributes) as span:
+                yield span
+            return
+        self.started += 1
+        if sampled is None:
+            sampled = random.random() < self.sample_rate
+        trace = Trace(trace_id or _new_id(16), sampled, self.max_spans)
+        root = Span(trace, name, None, attributes)
+        trace.add(root)
+        token = _current_span.set(root)
+        try:
+            yield root
+        except BaseException as e:
+            root.record_error(e)
+            raise
+        finally:
+            root.end()
+            _reset(token, None)
+            with trace._lock:
+                trace.finished = True
+            for span in trace.spans:
+                span.end()  # children still open (abandoned work) end with the request
+            if self._should_keep(trace):
+                self._export(trace)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Child span of the current span; a no-op outside a trace."""
+        parent = _current_span.get()
+        span = self.child(name, **attributes)
+        if span is None:
+            yield NOOP_SPAN
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            span.end()
+            _reset(token, parent)
+
+    def child(self, name: str, **attributes) -> Optional[Span]:
+        """A started child of the current span, without making it current; the caller ends it. None outside a trace."""
+        parent = _current_span.get()
+        if parent is None:
+            return None
+        span = Span(parent.trace, name, parent.span_id, attributes)
+        return span if parent.trace.add(span) else None
+
+    def record(self, name: str, duration_s: float, **attributes):
+        """Add an already finished child span (for work timed by hand, e.g. across yields)."""
+        span = self.child(name, **attributes)
+        if span is not None:
+            span.start_offset_ms -= duration_s * 1000
+            span.duration_ms = duration_s * 1000
+
+    def traced(self, name: Optional[str] = None, attributes: Sequence[str] = ()):
+        """Decorator: run the function (sync or async) in a span; `attributes` names arguments to record."""
+        def decorate(func):
+            span_name = name or func.__qualname__
+            signature = inspect.signature(func)
+
+            def span_attributes(args, kwargs):
+                if not attributes:
+                    return {}
+                bound = signature.bind_partial(*args, **kwargs).arguments
+                return {key: bound[key] for key in attributes if key in bound}
+
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(span_name, **span_attributes(args, kwargs)):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name, **span_attributes(args, kwargs)):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    @staticmethod
+    def wrap(func: Callable, *args) -> Callable[[], Any]:
+        """`func(*args)` bound to the caller's context, to run on an executor thread under the current span."""
+        return functools.partial(contextvars.copy_context().run, func, *args)
+
+    def stats(self) -> Dict[str, object]:
+        return {"enabled": self.enabled, "traces": self.started, "kept": self.kept,
+                "sample_rate": self.sample_rate, "slow_ms": self.slow_ms}
+
+
+def _reset(token: contextvars.Token, fallback: Optional[Span]):
+    try:
+        _current_span.reset(token)
+    except ValueError:
+        # Ended in another context (an async generator finalized elsewhere)
+        _current_span.set(fallback)
+
+
+def parse_traceparent(header: Optional[str]):
+    """(trace id, sampled) from a W3C traceparent header, or (None, None) if absent or malformed."""
+    parts = (header or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16)
+    except ValueError:
+        return None, None
+    if parts[1] == "0" * 32:
+        return None, None
+    return parts[1], bool(flags & 1) or None
+
+
+def instrument_sqlalchemy(engine, tracer: "Tracer", max_statement: int = 500):
+    """Record every statement on `engine` (a sync Engine, e.g. AsyncEngine.sync_engine) as a "sql" span.
+
+    Parameters are not recorded; they can hold passwords and personal data.
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        span = tracer.child("sql", statement=statement[:max_statement], executemany=executemany)
+        conn.info.setdefault("_trace_spans", []).append(span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("_trace_spans")
+        span = spans.pop() if spans else None
+        if span is not None:
+            if cursor.rowcount >= 0:  # -1 for SELECTs on most drivers
+                span.set_attribute("rows", cursor.rowcount)
+            span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("_trace_spans") if conn is not None else None
+        span = spans.pop() if spans else None
+        if span is not None:
+            span.record_error(exception_context.original_exception)
+            span.end()
+
+
+class TracingMiddleware:
+    """ASGI middleware: one trace per HTTP request, named after the route template.
+
+    Honours an incoming W3C traceparent header (its trace id, and its
+    sampled flag) and returns the trace id in X-Trace-Id.
+    """
+
+    def __init__(self, app, tracer: "Tracer", skip_paths: Sequence[str] = ("/metrics", "/debug/traces")):
+        self.app = app
+        self.tracer = tracer
+        self.skip_paths = tuple(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.tracer.enabled or scope["path"].startswith(self.skip_paths):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        trace_id, sampled = parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        with self.tracer.start_trace(f"{scope['method']} {scope['path']}", trace_id=trace_id, sampled=sampled,
+                                     method=scope["method"], path=scope["path"]) as root:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    root.set_attribute("status", message["status"])
+                    if message["status"] >= 500:
+                        root.status = "error"
+                    message = {**message, "headers": list(message.get("headers", []))
+                               + [(b"x-trace-id", root.trace.trace_id.encode())]}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    root.name = f"{scope['method']} {route}"
+
+
+trace_buffer = RingBufferExporter(settings.rag_trace_buffer_size)
+tracer = Tracer(
+    exporters=[LogExporter()] if settings.rag_trace_exporter == "log" else [trace_buffer],
+    sample_rate=settings.rag_trace_sample_rate,
+    slow_ms=settings.rag_trace_slow_ms,
+    max_spans=settings.rag_trace_max_spans,
+    enabled=settings.rag_trace_enabled,
+)
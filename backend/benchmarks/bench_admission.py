@@ -0,0 +1,99 @@
+# bench_admission.py
+# Chat answer latency under overload without and with admission control. Requests arrive at
+# --rate per second, about twice what the fake Groq can serve (it answers LLM_CAPACITY calls at a
+# time; the rest wait, like requests behind a provider rate limit). One user also fires a burst
+# of 6 questions at once to hit the per-user cap. Without admission every request is accepted
+# and latency grows for as long as the overload lasts; with it, answered requests stay within
+# queue timeout + answer time and the excess gets a fast 503 (or 429) with Retry-After.
+# Retrieval uses the real embedding model and index; DuckDuckGo is a fake.
+# Run from backend/:  python -m benchmarks.bench_admission [--rate 8] [--seconds 20]
+import sys
+import json
+import os
+import time
+import random
+import asyncio
+import statistics
+
+from app.config import settings
+from app.services.admission import AdmissionController, Overloaded
+from benchmarks.fakes import FakeChatModel, FakeSearchTool, install_fakes
+from app.services.rag import rag_service
+
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), "golden_questions.json")
+LLM_CAPACITY = 8  # concurrent calls the fake provider serves
+ANSWER = " ".join(["word"] * 100)  # 1s to first token + 2s of tokens
+QUEUE_TIMEOUT = 5.0
+BURST_USER, BURST_SIZE = 0, 6
+BURST_QUESTION = "What is the admission process at APSIT?"
+
+
+async def one_request(controller, user_id, question, delay):
+    await asyncio.sleep(delay)
+    started = time.perf_counter()
+    try:
+        async with await controller.acquire(user_id):
+            await rag_service.aget_response_for_session(question, user_id, user_id)
+        outcome, retry_after = 200, None
+    except Overloaded as e:
+        outcome, retry_after = e.status_code, e.retry_after
+    return outcome, time.perf_counter() - started, retry_after
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))] if values else float("nan")
+
+
+async def run(enabled, questions, rate, seconds):
+    llm = FakeChatModel(latency=1.0, answer=ANSWER, max_concurrency=LLM_CAPACITY)
+    rag_service.llm = rag_service._resilient(llm, "answer")
+    controller = AdmissionController(max_in_flight=LLM_CAPACITY, per_user=2, max_queue=2 * LLM_CAPACITY,
+                                     queue_timeout=QUEUE_TIMEOUT, enabled=enabled)
+    count = int(rate * seconds)
+    requests = [one_request(controller, i + 1, questions[i % len(questions)], i / rate) for i in range(count)]
+    requests += [one_request(controller, BURST_USER, BURST_QUESTION, seconds / 2) for _ in range(BURST_SIZE)]
+    started = time.perf_counter()
+    results = await asyncio.gather(*requests)
+    elapsed = time.perf_counter() - started
+
+    answered = sorted(seconds for outcome, seconds, _ in results if outcome == 200)
+    shed = sorted(seconds for outcome, seconds, _ in results if outcome != 200)
+    retry_after = [r for _, _, r in results if r is not None]
+    return {
+        "answered": len(answered), "total": len(results),
+        "503": sum(1 for outcome, _, _ in results if outcome == 503),
+        "429": sum(1 for outcome, _, _ in results if outcome == 429),
+        "p50": percentile(answered, 0.5), "p95": percentile(answered, 0.95), "p99": percentile(answered, 0.99),
+        "shed_p99": percentile(shed, 0.99),
+        "retry_after": statistics.median(retry_after) if retry_after else None,
+        "goodput": len(answered) / elapsed,
+        "max_queue": controller.max_queue_depth,
+    }
+
+
+async def main(rate, seconds):
+    with open(GOLDEN_FILE, "r", encoding="utf-8") as f:
+        questions = [item["question"] for item in json.load(f)]
+    random.Random(0).shuffle(questions)
+    settings.rag_llm_single_flight = False  # every request pays for its own LLM call
+    install_fakes(rag_service, FakeChatModel(latency=0), FakeSearchTool(latency=0.3))
+    await rag_service.aget_response_for_session(questions[0], 0, 0)  # warm up the model and index
+
+    capacity = LLM_CAPACITY / (1.0 + 99 / 50)
+    print(f"\n{rate:.0f} requests/s for {seconds:.0f}s (+ a burst of {BURST_SIZE} from one user); "
+          f"the fake LLM serves ~{capacity:.1f} answers/s (directory answers skip it)\n")
+    print(f"{'admission':<10}{'answered':>10}{'503':>6}{'429':>6}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}"
+          f"{'shed p99 s':>12}{'Retry-After':>13}{'answers/s':>11}{'max queue':>11}")
+    for enabled in (False, True):
+        row = await run(enabled, questions, rate, seconds)
+        retry_after = "-" if row["retry_after"] is None else f"{row['retry_after']:.0f}s"
+        print(f"{'on' if enabled else 'off':<10}{row['answered']:>5}/{row['total']:<4}{row['503']:>6}{row['429']:>6}"
+              f"{row['p50']:>8.2f}{row['p95']:>8.2f}{row['p99']:>8.2f}{row['shed_p99']:>12.2f}{retry_after:>13}"
+              f"{row['goodput']:>11.2f}{row['max_queue']:>11}")
+    print("\np50/p95/p99 are over answered requests; shed = time until a rejected request got its 503/429")
+
+
+if __name__ == "__main__":
+    rate = float(sys.argv[sys.argv.index("--rate") + 1]) if "--rate" in sys.argv else 8.0
+    seconds = float(sys.argv[sys.argv.index("--seconds") + 1]) if "--seconds" in sys.argv else 20.0
+    asyncio.run(main(rate, seconds))
@@ -0,0 +1,63 @@
+# bench_async_pipeline.py
+# Throughput of the chat answer pipeline with N concurrent users, comparing the old
+# pattern (every stage run synchronously inside the event loop) with
+# aget_response_for_session. Groq and DuckDuckGo are replaced by fixed-latency fakes;
+# retrieval uses the real embedding model and index.
+# Run from backend/:  python -m benchmarks.bench_async_pipeline
+import asyncio
+import time
+
+from benchmarks.fakes import FakeChatModel, FakeSearchTool, install_fakes
+from app.services.rag import rag_service
+
+LLM_LATENCY = 1.0
+SEARCH_LATENCY = 0.3
+CONCURRENCY = [1, 4, 16]
+QUESTION = "What is the admission process at APSIT?"
+
+
+async def blocking_call(user_id: int):
+    # What the session service used to do inside its async handler
+    db_context = rag_service._retrieve_context(QUESTION)
+    web_context = rag_service._perform_web_search(QUESTION)
+    prompt = rag_service._build_prompt(QUESTION, [], db_context, web_context)
+    return rag_service.llm.llm.invoke(prompt).content
+
+
+async def async_call(user_id: int):
+    return await rag_service.aget_response_for_session(QUESTION, user_id, 1)
+
+
+async def probe_loop_stall(stop: asyncio.Event) -> float:
+    """Worst delay seen by a 10ms heartbeat, i.e. how long /health would have hung."""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - started - 0.01)
+    return worst
+
+
+async def run_round(call, users: int):
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_loop_stall(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(call(-(i + 1)) for i in range(users)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    return elapsed, await probe
+
+
+async def main():
+    install_fakes(rag_service, FakeChatModel(latency=LLM_LATENCY), FakeSearchTool(latency=SEARCH_LATENCY))
+
+    print(f"fake LLM {LLM_LATENCY}s, fake search {SEARCH_LATENCY}s\n")
+    print(f"{'mode':<10}{'users':>6}{'wall s':>9}{'req/s':>8}{'max loop stall s':>18}")
+    for users in CONCURRENCY:
+        for mode, call in (("blocking", blocking_call), ("async", async_call)):
+            elapsed, stall = await run_round(call, users)
+            print(f"{mode:<10}{users:>6}{elapsed:>9.2f}{users / elapsed:>8.2f}{stall:>18.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+# bench_docstore.py
+# Parent lookup latency: InMemoryStore vs the SQLite docstore (read-write and read-only).
+# Run from backend/:  python -m benchmarks.bench_docstore
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from langchain.storage import InMemoryStore
+
+from app.services.docstore import SQLiteDocStore
+from app.services.knowledge_index import KnowledgeIndex
+
+LOOKUPS = 2000
+KEYS_PER_LOOKUP = 4  # ParentDocumentRetriever fetches the parents of the top-k children
+
+
+def load_parents(data_dir):
+    # Splitting only, no embedding needed
+    index = KnowledgeIndex(None, data_dir=data_dir, persist_dir=tempfile.mkdtemp(prefix="bench_split_"))
+    parents = []
+    for rel_path in sorted(index._scan_sources()):
+        parent_ids, docs, _, _ = index._split_file(rel_path)
+        parents.extend(zip(parent_ids, docs))
+    shutil.rmtree(index.persist_dir, ignore_errors=True)
+    return parents
+
+
+def measure(store, keys):
+    rng = random.Random(0)
+    samples = []
+    for _ in range(LOOKUPS):
+        batch = rng.sample(keys, min(KEYS_PER_LOOKUP, len(keys)))
+        started = time.perf_counter()
+        docs = store.mget(batch)
+        samples.append((time.perf_counter() - started) * 1e6)
+        assert all(doc is not None for doc in docs)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def run_benchmark():
+    parents = load_parents("college_data")
+    keys = [key for key, _ in parents]
+    workdir = tempfile.mkdtemp(prefix="bench_docstore_")
+    path = os.path.join(workdir, "parents.sqlite3")
+
+    try:
+        memory = InMemoryStore()
+        memory.mset(parents)
+
+        started = time.perf_counter()
+        writer = SQLiteDocStore(path)
+        writer.mset(parents)
+        write_seconds = time.perf_counter() - started
+        reader = SQLiteDocStore(path, read_only=True)
+
+        on_disk = sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+        print(f"{len(parents)} parent chunks, {on_disk / 1024:.0f} KiB on disk, "
+              f"written in {write_seconds * 1000:.1f}ms")
+        print(f"{LOOKUPS} lookups of {KEYS_PER_LOOKUP} keys each\n")
+        print(f"{'store':<24}{'p50 us':>10}{'p99 us':>10}")
+        for name, store in (("InMemoryStore", memory),
+                            ("SQLite (read-write)", writer),
+                            ("SQLite (read-only)", reader)):
+            p50, p99 = measure(store, keys)
+            print(f"{name:<24}{p50:>10.1f}{p99:>10.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run_benchmark()
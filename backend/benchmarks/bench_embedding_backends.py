@@ -0,0 +1,129 @@
+# bench_embedding_backends.py
+# Compares the embedding backends (sentence-transformers on PyTorch fp32, ONNX Runtime fp32, ONNX
+# Runtime with dynamic int8 quantization) on college_data: model load time, docs/sec while
+# building the index, ms/query, peak RSS, and dense/hybrid recall@k on benchmarks/golden_questions.json.
+# Each backend runs in its own process so peak RSS is not shared; ONNX exports are created first,
+# in a separate process, and reused from RAG_EMBEDDING_ONNX_DIR.
+# Run from backend/:  python -m benchmarks.bench_embedding_backends [--backends torch,onnx-int8]
+#   BENCH_MODEL=<name or path> benchmarks another encoder (default BAAI/bge-base-en-v1.5)
+# Peak RSS comes from getrusage, so this needs Linux.
+import os
+import sys
+import json
+import queue
+import shutil
+import statistics
+import tempfile
+import time
+import resource
+import multiprocessing as mp
+
+from app.services.embeddings import EMBEDDING_BACKENDS
+
+MODEL = os.getenv("BENCH_MODEL", "BAAI/bge-base-en-v1.5")
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), "golden_questions.json")
+KS = (1, 3, 5)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def prepare(backend):
+    from app.config import settings
+    from app.services.embeddings import export_onnx_model
+    export_onnx_model(MODEL, os.path.join(settings.rag_embedding_onnx_dir, MODEL.replace("/", "__")),
+                      quantize=backend == "onnx-int8")
+
+
+def run_backend(backend, results):
+    from app.services.embeddings import create_embeddings
+    from app.services.knowledge_index import KnowledgeIndex
+    from benchmarks.eval_retrieval import evaluate
+
+    with open(GOLDEN_FILE, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+    baseline_mb = peak_rss_mb()  # langchain, Chroma and friends, before any model is loaded
+
+    started = time.perf_counter()
+    embeddings = create_embeddings(backend, MODEL)
+    embeddings.embed_query("warm up")
+    load_s = time.perf_counter() - started
+
+    workdir = tempfile.mkdtemp(prefix=f"bench_{backend}_")
+    try:
+        index = KnowledgeIndex(embeddings, persist_dir=workdir, embedding_model=MODEL, embedding_backend=backend)
+        report = index.sync()
+
+        latencies = []
+        for item in golden:
+            started = time.perf_counter()
+            embeddings.embed_query(item["question"])
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        recall = {}
+        for mode in ("dense", "hybrid"):
+            recall[mode] = evaluate(index, mode, golden)[0]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    latencies.sort()
+    results.put({
+        "backend": backend,
+        "load_s": load_s,
+        "docs_per_s": report.embedded_chunks / report.seconds if report.seconds else 0.0,
+        "chunks": report.embedded_chunks,
+        "query_p50_ms": statistics.median(latencies),
+        "query_p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "baseline_mb": baseline_mb,
+        "peak_mb": peak_rss_mb(),
+        "recall": recall,
+    })
+
+
+def in_process(target, *args):
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=target, args=args + (results,))
+    process.start()
+    while True:
+        try:
+            result = results.get(timeout=1)
+            break
+        except queue.Empty:
+            if not process.is_alive():
+                raise RuntimeError(f"{target.__name__}{args} failed with exit code {process.exitcode}")
+    process.join()
+    return result
+
+
+def prepare_in_process(backend, results):
+    prepare(backend)
+    results.put(True)
+
+
+def main(backends):
+    for backend in backends:
+        if backend.startswith("onnx"):
+            started = time.perf_counter()
+            in_process(prepare_in_process, backend)
+            print(f"{backend}: export ready in {time.perf_counter() - started:.1f}s")
+
+    rows = [in_process(run_backend, backend) for backend in backends]
+
+    print(f"\nmodel {MODEL}, {rows[0]['chunks']} child chunks, {os.cpu_count()} CPUs\n")
+    recall_header = "".join(f"{f'{mode[0]}@{k}':>7}" for mode in ("dense", "hybrid") for k in KS)
+    print(f"{'backend':<11}{'load s':>8}{'docs/s':>9}{'q p50 ms':>10}{'q p95 ms':>10}"
+          f"{'peak MB':>9}{'model MB':>10}{recall_header}")
+    for row in rows:
+        recall = "".join(f"{row['recall'][mode][k]:>7.2f}" for mode in ("dense", "hybrid") for k in KS)
+        print(f"{row['backend']:<11}{row['load_s']:>8.1f}{row['docs_per_s']:>9.1f}{row['query_p50_ms']:>10.1f}"
+              f"{row['query_p95_ms']:>10.1f}{row['peak_mb']:>9.0f}{row['peak_mb'] - row['baseline_mb']:>10.0f}{recall}")
+    print("\nmodel MB = peak RSS above the process's RSS before the model was loaded; d@k/h@k = dense/hybrid recall@k")
+
+
+if __name__ == "__main__":
+    chosen = EMBEDDING_BACKENDS
+    if "--backends" in sys.argv:
+        chosen = tuple(sys.argv[sys.argv.index("--backends") + 1].split(","))
+    main(chosen)
@@ -0,0 +1,71 @@
+# bench_faculty_directory.py
+# Coverage and latency of the faculty directory fast path on typical role/person questions.
+# Questions it does not match fall through to retrieval + web search + LLM as before.
+# Run from backend/:  python -m benchmarks.bench_faculty_directory
+import statistics
+import time
+
+from app.services.faculty_directory import FacultyDirectory
+
+ROUNDS = 2000
+
+QUESTIONS = [
+    "who is the HOD of IT",
+    "HOD of Humanities and Applied Sciences",
+    "Who is the head of the Computer Engineering department?",
+    "hod civil",
+    "who heads the mechanical department",
+    "HOD of CSE AI & ML",
+    "who is hod of data science",
+    "list all the HODs",
+    "who is Dr. Kiran B. Deshpande",
+    "Tell me about Dr. Sachin Malave",
+    "What does Prof. Anupama Singh teach?",
+    "who is Prof. Sonal Jain",
+    "who is the dean",
+    "who is prof jain",
+    "hod of it dept",
+    # Not directory questions: must return None
+    "what is the fee structure",
+    "who is the principal",
+    "who is prof patil",
+    "is the library open on sunday",
+    "Is APSIT a Jain minority college?",
+    "What is the admission quota for Jain minority students?",
+    "Tell me about the Oak tree garden on campus",
+    "Is the library open on Sunday? ask Mali",
+    "who heads the training and placement department",
+    "who is the HOD of training and placement",
+    "FE admission fee, and who is the civil department hod",
+    "what is the fee for comps and who is the HOD of civil?",
+    "is it hod approval required for leave?",
+    "Can I meet the HOD, is it allowed?",
+    "My HOD is strict, what should I do about it?",
+]
+
+
+def run_benchmark():
+    started = time.perf_counter()
+    directory = FacultyDirectory.load("college_data")
+    print(f"Parsed {len(directory)} people in {(time.perf_counter() - started) * 1000:.1f}ms\n")
+
+    print(f"{'question':<60}{'kind':>10}")
+    answered = 0
+    for question in QUESTIONS:
+        answer = directory.answer(question)
+        answered += answer is not None
+        print(f"{question:<60}{answer.kind if answer else '-':>10}")
+
+    samples = []
+    for _ in range(ROUNDS):
+        for question in QUESTIONS:
+            t0 = time.perf_counter()
+            directory.answer(question)
+            samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+    print(f"\nAnswered {answered}/{len(QUESTIONS)} from the directory")
+    print(f"Lookup latency: p50 {statistics.median(samples):.1f}us, p99 {samples[int(len(samples) * 0.99) - 1]:.1f}us")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,49 @@
+# bench_index_startup.py
+# Startup cost of the knowledge index: cold build vs warm start vs one file changed.
+# Run from backend/:  python -m benchmarks.bench_index_startup
+import os
+import shutil
+import tempfile
+import time
+
+from langchain_community.embeddings import SentenceTransformerEmbeddings
+
+from app.services.knowledge_index import KnowledgeIndex
+
+
+def timed_sync(embeddings, data_dir, persist_dir):
+    started = time.perf_counter()
+    index = KnowledgeIndex(embeddings, data_dir=data_dir, persist_dir=persist_dir)
+    report = index.sync()
+    return time.perf_counter() - started, report
+
+
+def run_benchmark():
+    workdir = tempfile.mkdtemp(prefix="bench_index_")
+    data_dir = os.path.join(workdir, "college_data")
+    persist_dir = os.path.join(workdir, "chroma")
+    shutil.copytree("college_data", data_dir)
+
+    try:
+        started = time.perf_counter()
+        embeddings = SentenceTransformerEmbeddings(model_name="BAAI/bge-base-en-v1.5")
+        print(f"Model load (paid on every start, not part of the index): {time.perf_counter() - started:.2f}s\n")
+
+        results = []
+        results.append(("cold start (full build)",) + timed_sync(embeddings, data_dir, persist_dir))
+        results.append(("warm start (no changes)",) + timed_sync(embeddings, data_dir, persist_dir))
+
+        changed = os.path.join(data_dir, "apsit_placements.txt")
+        with open(changed, "a", encoding="utf-8") as f:
+            f.write("\nBenchmark edit: placement drive schedule updated.\n")
+        results.append(("one file changed",) + timed_sync(embeddings, data_dir, persist_dir))
+
+        print(f"{'scenario':<28}{'seconds':>10}{'chunks embedded':>18}")
+        for name, seconds, report in results:
+            print(f"{name:<28}{seconds:>10.2f}{report.embedded_chunks:>18}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,108 @@
+# bench_llm_resilience.py
+# The answer LLM client before (ChatGroq with the SDK defaults: 2 quick retries, 60s timeout) and
+# after (ResilientChatModel: per-attempt timeout, jittered backoff retries, circuit breaker, shared
+# keep-alive pool) against a local fake Groq server that injects latency, errors and hangs.
+# Requests arrive at a steady rate; for each scenario it reports answered requests, latency,
+# requests that reached the server and TCP connections opened.
+# Run from backend/:  python -m benchmarks.bench_llm_resilience [--requests 60] [--interval 0.1]
+import os
+import sys
+import time
+import asyncio
+import statistics
+
+os.environ.setdefault("GROQ_API_KEY", "fake")
+
+from langchain_groq import ChatGroq
+
+from benchmarks.fakes import FakeGroqServer
+from app.services.llm_client import ResilientChatModel, create_groq_chat, create_http_client
+from app.utils.concurrency import CircuitBreaker
+
+TIMEOUT = 2.0
+ATTEMPTS = 3
+BREAKER_FAILURES = 5
+BREAKER_RESET = 1.0
+SCENARIOS = {
+    "healthy": {"latency": 0.3},
+    "flaky (30% 503s)": {"latency": 0.3, "error_rate": 0.3},
+    "slow tail (10% hang 10s)": {"latency": 0.3, "hang_rate": 0.1, "hang": 10.0},
+    "outage (503s for 3s)": {"latency": 0.3, "outage": ("down", 3.0)},
+    "outage (hangs for 3s)": {"latency": 0.3, "outage": ("hang", 3.0)},
+}
+
+
+def make_client(mode, base_url):
+    if mode == "before":
+        return ChatGroq(model_name="llama-3.3-70b-versatile", temperature=0.3, groq_api_base=base_url)
+    http_client = create_http_client(timeout=TIMEOUT)
+    return ResilientChatModel(
+        create_groq_chat("llama-3.3-70b-versatile", 0.3, http_client, base_url, TIMEOUT),
+        timeout=TIMEOUT, max_attempts=ATTEMPTS, backoff_base=0.2, backoff_max=2.0,
+        breaker=CircuitBreaker(BREAKER_FAILURES, BREAKER_RESET),
+    )
+
+
+async def one_request(llm, delay):
+    await asyncio.sleep(delay)
+    started = time.perf_counter()
+    try:
+        await llm.ainvoke("What is the admission process at APSIT?")
+        ok = True
+    except Exception:
+        ok = False
+    return ok, time.perf_counter() - started
+
+
+async def run(mode, scenario, requests, interval):
+    options = dict(scenario)
+    outage = options.pop("outage", None)
+    server = FakeGroqServer(**options).start()
+    llm = make_client(mode, server.base_url)
+
+    async def outage_window():
+        # Requests arriving in the window fail at once ("down") or hang until it is over ("hang")
+        kind, seconds = outage
+        server.down, server.hang_rate, server.hang = kind == "down", float(kind == "hang"), seconds
+        await asyncio.sleep(seconds)
+        server.down, server.hang_rate = False, 0.0
+
+    try:
+        tasks = [one_request(llm, i * interval) for i in range(requests)]
+        if outage:
+            tasks.append(outage_window())
+        results = [r for r in await asyncio.gather(*tasks) if r is not None]
+    finally:
+        server.stop()
+    latencies = sorted(seconds for _, seconds in results)
+    answered = sorted(seconds for ok, seconds in results if ok)
+    failed = sorted(seconds for ok, seconds in results if not ok)
+    return {
+        "ok": len(answered) / len(results),
+        "fail_p50": statistics.median(failed) if failed else None,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "max": latencies[-1],
+        "server_requests": server.requests,
+        "connections": server.connections,
+    }
+
+
+async def main(requests, interval):
+    print(f"\n{requests} requests, one every {interval}s; after: {TIMEOUT}s timeout, {ATTEMPTS} attempts, "
+          f"circuit opens after {BREAKER_FAILURES} failures for {BREAKER_RESET}s\n")
+    print(f"{'scenario':<26}{'client':<8}{'answered':>9}{'p50 s':>8}{'p95 s':>8}{'max s':>8}{'fail p50 s':>12}"
+          f"{'server reqs':>13}{'conns':>7}")
+    for name, scenario in SCENARIOS.items():
+        for mode in ("before", "after"):
+            row = await run(mode, scenario, requests, interval)
+            fail_p50 = "-" if row["fail_p50"] is None else f"{row['fail_p50']:.2f}"
+            print(f"{name:<26}{mode:<8}{row['ok']:>9.0%}{row['p50']:>8.2f}{row['p95']:>8.2f}{row['max']:>8.2f}"
+                  f"{fail_p50:>12}{row['server_requests']:>13}{row['connections']:>7}")
+    print("\nfail p50 = median time until a request that got no answer gave up")
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[sys.argv.index("--requests") + 1]) if "--requests" in sys.argv else 60
+    interval = float(sys.argv[sys.argv.index("--interval") + 1]) if "--interval" in sys.argv else 0.1
+    asyncio.run(main(requests, interval))
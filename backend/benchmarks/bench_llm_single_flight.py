@@ -0,0 +1,90 @@
+# bench_llm_single_flight.py
+# Outbound LLM calls for a burst of students asking the same first question (a notice just went out),
+# with RAG_LLM_SINGLE_FLIGHT off and on, for both the plain and the streaming answer paths.
+# Users arrive evenly over --window seconds; --share of them ask the notice question, the rest a
+# random golden question. Groq and DuckDuckGo are fixed-latency fakes and the answer cache is off,
+# so every identical prompt in flight at the same time is a candidate for sharing.
+# Retrieval uses the real embedding model and index.
+# Run from backend/:  python -m benchmarks.bench_llm_single_flight [--users 200] [--window 20] [--share 0.8]
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import statistics
+
+from app.config import settings
+from benchmarks.fakes import FakeChatModel, FakeSearchTool, install_fakes
+from app.services.rag import rag_service
+
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), "golden_questions.json")
+NOTICE_QUESTION = "What is the last date to pay the exam fees?"
+LLM_LATENCY = 1.0  # time to first token
+ANSWER = " ".join(["word"] * 120)  # ~2.4s more at 50 tokens/s
+
+
+async def ask(user_id, question, delay, streaming):
+    await asyncio.sleep(delay)
+    started = time.perf_counter()
+    first = None
+    if streaming:
+        async for _ in rag_service.astream_response_for_session(question, user_id, user_id):
+            if first is None:
+                first = time.perf_counter() - started
+    else:
+        await rag_service.aget_response_for_session(question, user_id, user_id)
+    total = time.perf_counter() - started
+    return first if first is not None else total, total
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def run(questions, window, streaming, single_flight):
+    settings.rag_llm_single_flight = single_flight
+    llm = FakeChatModel(latency=LLM_LATENCY, answer=ANSWER)
+    rag_service.llm = rag_service._resilient(llm, "answer")
+    before = rag_service.llm_flights.stats()
+
+    delays = [window * i / len(questions) for i in range(len(questions))]
+    results = await asyncio.gather(*[ask(i, q, d, streaming) for i, (q, d) in enumerate(zip(questions, delays))])
+    after = rag_service.llm_flights.stats()
+
+    first = sorted(r[0] for r in results)
+    total = sorted(r[1] for r in results)
+    return {
+        "calls": llm.calls,
+        "coalesced": after["coalesced"] - before["coalesced"],
+        "first_p50": statistics.median(first), "first_p95": percentile(first, 0.95),
+        "total_p50": statistics.median(total), "total_p95": percentile(total, 0.95),
+    }
+
+
+async def main(users, window, share):
+    with open(GOLDEN_FILE, "r", encoding="utf-8") as f:
+        golden = [item["question"] for item in json.load(f)]
+    rng = random.Random(0)
+    questions = [NOTICE_QUESTION if rng.random() < share else rng.choice(golden) for _ in range(users)]
+    install_fakes(rag_service, FakeChatModel(latency=0), FakeSearchTool(latency=0.3))
+    await rag_service.aget_response_for_session(NOTICE_QUESTION, 0, 0)  # warm up the model and index
+
+    print(f"\n{users} users over {window:.0f}s, {share:.0%} asking the same question, "
+          f"{len(set(questions))} distinct questions\n")
+    print(f"{'path':<8}{'single-flight':>15}{'LLM calls':>11}{'coalesced':>11}"
+          f"{'first p50 s':>13}{'first p95 s':>13}{'total p50 s':>13}{'total p95 s':>13}")
+    for streaming in (False, True):
+        for single_flight in (False, True):
+            row = await run(questions, window, streaming, single_flight)
+            print(f"{'stream' if streaming else 'invoke':<8}{'on' if single_flight else 'off':>15}{row['calls']:>11}"
+                  f"{row['coalesced']:>11}{row['first_p50']:>13.2f}{row['first_p95']:>13.2f}"
+                  f"{row['total_p50']:>13.2f}{row['total_p95']:>13.2f}")
+    print("\nfirst = time to the first token (stream) or the whole answer (invoke)")
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[sys.argv.index("--users") + 1]) if "--users" in sys.argv else 200
+    window = float(sys.argv[sys.argv.index("--window") + 1]) if "--window" in sys.argv else 20.0
+    share = float(sys.argv[sys.argv.index("--share") + 1]) if "--share" in sys.argv else 0.8
+    asyncio.run(main(users, window, share))
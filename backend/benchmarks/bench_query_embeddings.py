@@ -0,0 +1,48 @@
+# bench_query_embeddings.py
+# Query-embedding throughput at 1, 8 and 32 concurrent callers, with and without
+# micro-batching. The LRU cache is disabled and every query is distinct, so the
+# numbers reflect encode work only.
+# Run from backend/:  python -m benchmarks.bench_query_embeddings
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_community.embeddings import SentenceTransformerEmbeddings
+
+from app.services.embeddings import BatchingEmbeddings
+
+CONCURRENCY = [1, 8, 32]
+QUERIES_PER_CALLER = 16
+TOPICS = ["admission process", "hostel fees", "placement record", "HOD of IT", "library timings",
+          "bus facility", "scholarships", "canteen", "NBA accreditation", "intake capacity"]
+
+
+def run_round(embeddings, callers: int, round_id: int) -> float:
+    queries = [f"{TOPICS[i % len(TOPICS)]} question {round_id}-{i}" for i in range(callers * QUERIES_PER_CALLER)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        list(pool.map(embeddings.embed_query, queries))
+    return len(queries) / (time.perf_counter() - started)
+
+
+def run_benchmark():
+    base = SentenceTransformerEmbeddings(model_name="BAAI/bge-base-en-v1.5")
+    base.embed_query("warm up")
+
+    modes = {
+        "unbatched": BatchingEmbeddings(base, cache_size=0, max_batch_size=1),
+        "batched": BatchingEmbeddings(base, cache_size=0, batch_window_ms=2.0, max_batch_size=32),
+    }
+
+    print(f"{'callers':>8}" + "".join(f"{mode + ' q/s':>18}" for mode in modes) + f"{'avg batch':>12}")
+    for round_id, callers in enumerate(CONCURRENCY):
+        row = f"{callers:>8}"
+        for mode, embeddings in modes.items():
+            row += f"{run_round(embeddings, callers, round_id):>18.1f}"
+        batched = modes["batched"]
+        row += f"{batched.stats()['avg_batch_size']:>12.1f}"
+        batched.batches = batched.batched_queries = 0
+        print(row)
+
+
+if __name__ == "__main__":
+    run_benchmark()
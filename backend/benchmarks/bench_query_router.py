@@ -0,0 +1,105 @@
+# bench_query_router.py
+# 1. Accuracy of the query router on benchmarks/router_questions.json (labelled question types),
+#    reported separately for the "tuned" questions the keyword rules were written against and the
+#    "holdout" ones they were not. Questions go through the answer path (_aplan_answer), so the
+#    faculty directory fast path shows up as "directory"; only items marked "directory" expect it.
+# 2. Outbound web searches, LLM calls and median latency over the same questions with the
+#    router enabled vs disabled (the old "search for every multi-word question" rule).
+#    Groq and DuckDuckGo are replaced by fixed-latency fakes; retrieval uses the real
+#    embedding model and index.
+# Run from backend/:  python -m benchmarks.bench_query_router
+import os
+import json
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+from benchmarks.fakes import FakeChatModel, FakeSearchTool, install_fakes
+from app.services.query_router import TIERS
+from app.services.rag import rag_service
+
+LABELLED_FILE = os.path.join(os.path.dirname(__file__), "router_questions.json")
+LLM_LATENCY = 1.0
+SEARCH_LATENCY = 0.3
+DIRECTORY = "directory"
+OUTCOMES = TIERS + (DIRECTORY,)
+
+
+async def answer_route(question, session_id):
+    """What the answer path does with `question`: (tier, reason), or ("directory", ...) for the fast path."""
+    router = rag_service.router
+    decisions = []
+    record = router.record
+
+    def capture(question, decision):
+        decisions.append(decision)
+        record(question, decision)
+
+    router.record = capture
+    try:
+        await rag_service._aplan_answer(question, [], session_id)
+    finally:
+        router.record = record
+    if not decisions:
+        return DIRECTORY, "faculty directory fast path"
+    return decisions[0].tier, decisions[0].reason
+
+
+async def report_accuracy(labelled):
+    router = rag_service.router
+    confusion = {"tuned": Counter(), "holdout": Counter()}
+    latencies = []
+    for i, item in enumerate(labelled):
+        started = time.perf_counter()
+        router.match_keywords(item["question"]) or router.match_embedding(item["question"])
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        expected = DIRECTORY if item.get("directory") else item["tier"]
+        got, reason = await answer_route(item["question"], -(i + 1))
+        confusion[item["split"]][(expected, got)] += 1
+        if got != expected:
+            print(f"  [{item['split']}] expected {expected:<11} got {got:<11} {item['question']!r} ({reason})")
+
+    print(f"\nmedian router decision time {statistics.median(latencies):.2f}ms")
+    for split, counts in confusion.items():
+        total = sum(counts.values())
+        correct = sum(n for (expected, got), n in counts.items() if expected == got)
+        print(f"\n{split} accuracy: {correct}/{total} ({correct / total:.0%})\n")
+        print(f"{'label / routed':<16}" + "".join(f"{outcome:>12}" for outcome in OUTCOMES))
+        for expected in OUTCOMES:
+            print(f"{expected:<16}" + "".join(f"{counts[(expected, got)]:>12}" for got in OUTCOMES))
+
+
+async def run_pipeline(labelled, enabled, llm, search):
+    rag_service.router.enabled = enabled
+    llm.calls = search.calls = 0
+    latencies = []
+    for i, item in enumerate(labelled):
+        started = time.perf_counter()
+        await rag_service.aget_response_for_session(item["question"], -1, -(i + 1))
+        latencies.append(time.perf_counter() - started)
+    return search.calls, llm.calls, statistics.median(latencies), sum(latencies)
+
+
+async def main():
+    with open(LABELLED_FILE, "r", encoding="utf-8") as f:
+        labelled = json.load(f)
+
+    # No search latency while measuring accuracy; planning an answer runs the searches it routes to
+    llm, search = FakeChatModel(latency=LLM_LATENCY), FakeSearchTool(latency=0)
+    install_fakes(rag_service, llm, search)
+
+    print(f"{len(labelled)} labelled questions; misrouted:")
+    await report_accuracy(labelled)
+
+    search.latency = SEARCH_LATENCY
+    print(f"\nfake LLM {LLM_LATENCY}s, fake search {SEARCH_LATENCY}s\n")
+    print(f"{'router':<10}{'web searches':>14}{'LLM calls':>11}{'median s':>10}{'total s':>9}")
+    for name, enabled in (("disabled", False), ("enabled", True)):
+        searches, llm_calls, median, total = await run_pipeline(labelled, enabled, llm, search)
+        print(f"{name:<10}{searches:>14}{llm_calls:>11}{median:>10.2f}{total:>9.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+# bench_retrieval_server.py
+# Memory and throughput of N API workers that each load the model + index ("in-process")
+# vs N workers that query one shared retrieval server over a Unix socket ("shared").
+# Run from backend/:  python -m benchmarks.bench_retrieval_server
+#   --fake-embeddings  use a deterministic fake model (checks the plumbing, not the RSS saving)
+# RSS is read from /proc, so this needs Linux.
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import time
+import multiprocessing as mp
+
+WORKER_COUNTS = (1, 2, 4)
+THREADS_PER_WORKER = 4  # like the RAG executor
+DURATION = float(os.getenv("BENCH_DURATION", "10"))  # seconds of load per run
+
+QUESTIONS = [
+    "Who is the HOD of Computer Engineering",
+    "What is the admission process for first year",
+    "Which companies visit for placements",
+    "What are the library timings",
+    "Tell me about the Humanities and Applied Sciences department",
+]
+
+
+def make_embeddings(fake):
+    if fake:
+        from langchain_community.embeddings import DeterministicFakeEmbedding
+        from app.services.embeddings import BatchingEmbeddings
+        return BatchingEmbeddings(DeterministicFakeEmbedding(size=768))
+    from app.services.embeddings import create_query_embeddings
+    return create_query_embeddings()
+
+
+def rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def worker_main(mode, persist_dir, socket_path, fake, ready, start, results):
+    if mode == "shared":
+        from app.services.retrieval_server import RemoteRetriever, RetrievalClient
+        retriever = RemoteRetriever(client=RetrievalClient(socket_path))
+    else:
+        from app.services.knowledge_index import KnowledgeIndex
+        index = KnowledgeIndex(make_embeddings(fake), persist_dir=persist_dir, read_only=True)
+        index.open()
+        retriever = index.as_retriever()
+    retriever.get_relevant_documents("warm up")
+    ready.put(os.getpid())
+    start.wait()
+
+    done = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + DURATION
+
+    def load(thread_id):
+        i = 0
+        while time.monotonic() < deadline:
+            # Unique text per call, so the query embedding cache does not hide the model cost
+            retriever.get_relevant_documents(f"{QUESTIONS[i % len(QUESTIONS)]} ({os.getpid()}-{thread_id}-{i})")
+            i += 1
+        with lock:
+            done[0] += i
+
+    threads = [threading.Thread(target=load, args=(t,)) for t in range(THREADS_PER_WORKER)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results.put(done[0])
+
+
+def server_main(persist_dir, socket_path, fake):
+    from app.services.retrieval_server import RetrievalServer
+    os.environ["RAG_INDEX_READ_ONLY"] = "true"
+    RetrievalServer(socket_path, embeddings=make_embeddings(fake), persist_dir=persist_dir).serve_forever()
+
+
+def run_scenario(ctx, mode, workers, persist_dir, fake):
+    socket_path = os.path.join(persist_dir, "retrieval.sock")
+    server = None
+    if os.path.exists(socket_path):
+        os.remove(socket_path)  # left behind by the previous (terminated) server
+    if mode == "shared":
+        server = ctx.Process(target=server_main, args=(persist_dir, socket_path, fake), daemon=True)
+        server.start()
+        while not os.path.exists(socket_path):
+            if not server.is_alive():
+                raise RuntimeError("Retrieval server failed to start")
+            time.sleep(0.1)
+
+    ready, results, start = ctx.Queue(), ctx.Queue(), ctx.Event()
+    procs = [ctx.Process(target=worker_main, args=(mode, persist_dir, socket_path, fake, ready, start, results))
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+    pids = [ready.get(timeout=600) for _ in procs]
+
+    rss = sum(rss_mb(pid) for pid in pids) + (rss_mb(server.pid) if server else 0.0)
+    start.set()
+    total = sum(results.get(timeout=DURATION + 120) for _ in procs)
+    for p in procs:
+        p.join()
+    if server:
+        server.terminate()
+        server.join()
+    return rss, total / DURATION
+
+
+def run_benchmark(fake=False):
+    ctx = mp.get_context("spawn")  # a fresh interpreter per worker, like uvicorn --workers
+    workdir = tempfile.mkdtemp(prefix="bench_retrieval_")
+    persist_dir = os.path.join(workdir, "index")
+
+    try:
+        from app.services.knowledge_index import KnowledgeIndex
+        print("Building index...")
+        KnowledgeIndex(make_embeddings(fake), persist_dir=persist_dir).sync()
+
+        print(f"\n{'mode':<12}{'workers':>8}{'total RSS MB':>14}{'queries/s':>12}")
+        for mode in ("in-process", "shared"):
+            for workers in WORKER_COUNTS:
+                rss, qps = run_scenario(ctx, mode, workers, persist_dir, fake)
+                print(f"{mode:<12}{workers:>8}{rss:>14.0f}{qps:>12.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run_benchmark(fake="--fake-embeddings" in sys.argv)
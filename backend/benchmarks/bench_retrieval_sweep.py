@@ -0,0 +1,213 @@
+# bench_retrieval_sweep.py
+# Sweeps chunking (parent/child chunk size and overlap), k and embedding backends over college_data
+# and reports, for each combination: recall@k and MRR against the expected source sections in
+# benchmarks/golden_questions.json, index build time, index size on disk and per-query latency.
+# A retrieved parent chunk counts as relevant if it overlaps one of the question's "sources"
+# (a file in college_data and its "=== SECTION ===", or the whole file when section is null).
+# Every run is also written as a JSON report (settings, git commit, one row per combination);
+# pass an earlier report with --compare to print the change in recall, MRR and latency.
+# Run from backend/:  python -m benchmarks.bench_retrieval_sweep [--output retrieval_sweep.json]
+#   --parent-sizes 1000,2000 --parent-overlaps 200 --child-sizes 200,400,800 --child-overlaps 50,100
+#   --ks 1,3,5,10 --modes hybrid --backends torch,onnx-int8
+#   --compare old.json  --fake-embeddings (checks the plumbing; dense scores are meaningless)
+import os
+import re
+import sys
+import json
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from itertools import product
+
+from app.services.knowledge_index import KnowledgeIndex
+
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), "golden_questions.json")
+DATA_DIR = "college_data"
+MODEL = "BAAI/bge-base-en-v1.5"
+SECTION_HEADER = re.compile(r"^=== ?(.*?) ?===[ \t]*$", re.MULTILINE)
+CHUNKING_KEYS = ("parent_chunk_size", "parent_chunk_overlap", "child_chunk_size", "child_chunk_overlap")
+
+
+def int_list(name, default):
+    return [int(x) for x in sys.argv[sys.argv.index(name) + 1].split(",")] if name in sys.argv else default
+
+
+def str_list(name, default):
+    return sys.argv[sys.argv.index(name) + 1].split(",") if name in sys.argv else default
+
+
+def make_embeddings(backend, fake):
+    if fake:
+        from langchain_community.embeddings import DeterministicFakeEmbedding
+        return DeterministicFakeEmbedding(size=768)
+    from app.services.embeddings import create_embeddings
+    return create_embeddings(backend, MODEL)
+
+
+def load_sections(data_dir):
+    """{(file, section title or None): (start, end)} character spans, plus each file's text."""
+    texts, spans = {}, {}
+    for name in sorted(os.listdir(data_dir)):
+        if not name.endswith(".txt"):
+            continue
+        with open(os.path.join(data_dir, name), "r", encoding="utf-8") as f:
+            text = f.read()
+        texts[name] = text
+        spans[(name, None)] = (0, len(text))
+        headers = list(SECTION_HEADER.finditer(text))
+        for i, header in enumerate(headers):
+            end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+            spans[(name, header.group(1).strip())] = (header.start(), end)
+    return texts, spans
+
+
+def chunk_span(doc, texts):
+    """(file, start, end) of a retrieved chunk in its source file, or None if it cannot be found."""
+    name = os.path.basename(doc.metadata.get("source", ""))
+    text = texts.get(name)
+    if text is None:
+        return None
+    content = doc.page_content
+    start = text.find(content)
+    if start == -1:
+        start = text.find(content[:200])
+    return (name, start, start + len(content)) if start != -1 else None
+
+
+def first_relevant_rank(docs, sources, texts, spans):
+    for rank, doc in enumerate(docs, start=1):
+        located = chunk_span(doc, texts)
+        if located is None:
+            continue
+        name, start, end = located
+        for source in sources:
+            span = spans.get((source["file"], source["section"]))
+            if source["file"] == name and span and start < span[1] and end > span[0]:
+                return rank
+    return None
+
+
+def index_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+def evaluate(index, mode, k, golden, texts, spans):
+    retriever = index.as_retriever(mode, k=k)
+    retriever.get_relevant_documents("warm up")
+    ranks, latencies = [], []
+    for item in golden:
+        started = time.perf_counter()
+        docs = retriever.get_relevant_documents(item["question"])
+        latencies.append((time.perf_counter() - started) * 1000)
+        ranks.append(first_relevant_rank(docs[:k], item["sources"], texts, spans))
+    latencies.sort()
+    return {
+        "recall": sum(1 for r in ranks if r is not None) / len(golden),
+        "mrr": sum(1 / r for r in ranks if r is not None) / len(golden),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "misses": [item["question"] for item, r in zip(golden, ranks) if r is None],
+    }
+
+
+def chunkings():
+    grid = product(int_list("--parent-sizes", [1000, 2000]), int_list("--parent-overlaps", [200]),
+                   int_list("--child-sizes", [200, 400, 800]), int_list("--child-overlaps", [50, 100]))
+    # Overlap must be smaller than the chunk, and children no bigger than their parents
+    return [dict(zip(CHUNKING_KEYS, combo)) for combo in grid
+            if combo[1] < combo[0] and combo[3] < combo[2] <= combo[0]]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def row_key(row):
+    return (row["backend"], row["mode"], row["k"]) + tuple(row[key] for key in CHUNKING_KEYS)
+
+
+def print_comparison(rows, previous):
+    before = {row_key(row): row for row in previous["results"]}
+    print(f"\nChange against {previous.get('git_commit') or 'the earlier report'} "
+          f"({previous.get('created', '?')}), same settings only:")
+    for row in rows:
+        old = before.get(row_key(row))
+        if old is None:
+            continue
+        chunking = "/".join(str(row[key]) for key in CHUNKING_KEYS)
+        print(f"  {row['backend']:<10}{row['mode']:<8}{chunking:<20}k={row['k']:<4}"
+              f"recall {row['recall'] - old['recall']:+.2f}  MRR {row['mrr'] - old['mrr']:+.2f}  "
+              f"p50 {row['p50_ms'] - old['p50_ms']:+.1f} ms")
+
+
+def main():
+    fake = "--fake-embeddings" in sys.argv
+    ks = int_list("--ks", [1, 3, 5, 10])
+    modes = str_list("--modes", ["hybrid"])
+    backends = str_list("--backends", ["torch"])
+    output = sys.argv[sys.argv.index("--output") + 1] if "--output" in sys.argv else "retrieval_sweep.json"
+
+    with open(GOLDEN_FILE, "r", encoding="utf-8") as f:
+        golden = [item for item in json.load(f) if item.get("sources")]
+    texts, spans = load_sections(DATA_DIR)
+    unknown = [s for item in golden for s in item["sources"] if (s["file"], s["section"]) not in spans]
+    if unknown:
+        sys.exit(f"Golden sources not found in {DATA_DIR}: {unknown}")
+
+    grid = chunkings()
+    print(f"\n{len(golden)} questions; {len(grid)} chunkings x {len(backends)} backends x "
+          f"{len(modes)} modes x k in {ks}\n")
+    print(f"{'backend':<10}{'mode':<8}{'parent':>11}{'child':>10}{'k':>4}{'recall':>8}{'MRR':>7}"
+          f"{'p50 ms':>8}{'p95 ms':>8}{'build s':>9}{'size KB':>9}{'chunks':>8}")
+
+    rows = []
+    for backend in backends:
+        embeddings = make_embeddings(backend, fake)
+        embeddings.embed_query("warm up")  # model load is not part of the build time
+        for chunking in grid:
+            workdir = tempfile.mkdtemp(prefix="bench_retrieval_sweep_")
+            try:
+                index = KnowledgeIndex(embeddings, data_dir=DATA_DIR, persist_dir=workdir, embedding_model=MODEL,
+                                       embedding_backend=backend, **chunking)
+                report = index.sync()
+                size = index_size(workdir)
+                for mode, k in product(modes, ks):
+                    result = evaluate(index, mode, k, golden, texts, spans)
+                    row = {"backend": backend, "mode": mode, "k": k, **chunking,
+                           "build_s": report.seconds, "index_bytes": size,
+                           "child_chunks": report.embedded_chunks, **result}
+                    rows.append(row)
+                    parent = f"{chunking['parent_chunk_size']}/{chunking['parent_chunk_overlap']}"
+                    child = f"{chunking['child_chunk_size']}/{chunking['child_chunk_overlap']}"
+                    print(f"{backend:<10}{mode:<8}{parent:>11}{child:>10}{k:>4}{row['recall']:>8.2f}"
+                          f"{row['mrr']:>7.2f}{row['p50_ms']:>8.1f}{row['p95_ms']:>8.1f}{row['build_s']:>9.2f}"
+                          f"{size / 1024:>9.0f}{row['child_chunks']:>8}")
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "model": MODEL,
+        "fake_embeddings": fake,
+        "questions": len(golden),
+        "results": rows,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nChunk sizes are size/overlap in characters; recall and MRR are @k. Report saved to {output}")
+
+    if "--compare" in sys.argv:
+        with open(sys.argv[sys.argv.index("--compare") + 1], "r", encoding="utf-8") as f:
+            print_comparison(rows, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
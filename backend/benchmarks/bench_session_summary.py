@@ -0,0 +1,94 @@
+# bench_session_summary.py
+# Prompt history tokens against session length: the last 6 turns verbatim (before, raw and within the
+# history token budget) vs the rolling summary plus the newest turns (after), using SessionSummarizer's
+# folding policy and PromptBuilder.
+# Answers are a fixed ~230-word reply, about what the 70B model writes. Summaries come from a
+# fake LLM that always uses the full word limit, or from the configured Groq model with --live-llm.
+# Run from backend/:  python -m benchmarks.bench_session_summary [--turns 32] [--live-llm]
+import os
+import sys
+import json
+import asyncio
+
+from app.config import settings
+from benchmarks.fakes import FakeChatModel
+from app.services.prompt_builder import PromptBuilder, TokenCounter
+from app.services.session_summary import SessionSummarizer
+
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), "golden_questions.json")
+ANSWER = " ".join([
+    "Hey! Great question. At APSIT the first year fee for the open category is around Rs. 1,45,000,",
+    "which covers tuition and development charges, while OBC, SC and ST students pay reduced amounts",
+    "depending on their scholarship eligibility under the Maharashtra government schemes.",
+    "Admissions happen through the CAP rounds run by the State CET Cell, and 20% of seats are filled",
+    "through the institute level quota, with a share reserved for the Jain minority.",
+    "You will need your MHT-CET or JEE scorecard, the 10th and 12th mark sheets, a leaving certificate,",
+    "a domicile certificate and, if you claim a category, the caste and non-creamy layer certificates.",
+    "The Computer, IT, AI & ML and Data Science branches usually close first, so keep those options high",
+    "in your preference list, and check the DTE website after every round for your allotment.",
+    "Once allotted, report to the college with original documents within the given dates to confirm",
+    "your seat. The library, NSS unit and training and placement cell are open to first years from the",
+    "start, and the T&P cell runs aptitude sessions from the second year onwards. Let me know if you want",
+    "the branch-wise intake or details about the hostel options near the Kasarvadavali campus!",
+])
+CHECKPOINTS = (1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 48, 64)
+
+
+async def simulate(questions, summarizer, builder, turns):
+    """Prompt history size at each turn of one session, both ways."""
+    window = settings.rag_history_turns
+    history = []  # every turn so far
+    summary, pending = "", []  # rolling memory: summary plus the turns not folded into it
+    rows = []
+    for turn in range(1, turns + 1):
+        question = questions[(turn - 1) % len(questions)]
+        if turn in CHECKPOINTS:
+            # What the six turns cost with no history budget, as before token budgets
+            raw = builder.counter.count("\n".join(f"User: {t['question']}\nYou: {t['answer']}" for t in history[-window:]))
+            before = builder.build(question, history[-window:], [], "")
+            after = builder.build(question, pending, [], "", summary)
+            rows.append((turn, raw, before, after, len(pending)))
+
+        history.append({"question": question, "answer": ANSWER})
+        pending.append(history[-1])
+        folded = summarizer.turns_to_fold(pending)
+        if folded:
+            summary = await summarizer.fold(summary, folded)
+            pending = pending[len(folded):]
+            summarizer.folds += 1
+    return rows
+
+
+async def main(turns, live_llm):
+    with open(GOLDEN_FILE, "r", encoding="utf-8") as f:
+        questions = [item["question"] for item in json.load(f)]
+
+    if live_llm:
+        from langchain_groq import ChatGroq
+        llm = ChatGroq(groq_api_key=os.getenv("GROQ_API_KEY"), model_name=settings.rag_summary_model, temperature=0)
+    else:
+        llm = FakeChatModel(latency=0, answer=" ".join(ANSWER.split()[:settings.rag_summary_max_words]))
+    summarizer = SessionSummarizer(llm, verbatim_turns=settings.rag_summary_verbatim_turns,
+                                   fold_turns=settings.rag_summary_fold_turns, max_words=settings.rag_summary_max_words)
+    builder = PromptBuilder(TokenCounter(settings.rag_prompt_tokenizer), history_tokens=settings.rag_prompt_history_tokens,
+                            summary_tokens=settings.rag_prompt_summary_tokens)
+
+    rows = await simulate(questions, summarizer, builder, turns)
+
+    print(f"\ntokenizer: {builder.counter.name}; before: last {settings.rag_history_turns} turns verbatim; "
+          f"after: summary + {settings.rag_summary_verbatim_turns}-{settings.rag_summary_verbatim_turns + settings.rag_summary_fold_turns - 1} "
+          f"verbatim turns\n")
+    print("History tokens and earlier turns the prompt still covers (before: budgeted window; after: summary + verbatim)")
+    print(f"{'turn':>5}{'before raw':>12}{'before':>8}{'covers':>8}{'after':>8}{'summary':>9}{'verbatim':>10}{'covers':>8}"
+          f"{'prompt before/after':>21}")
+    for turn, raw, before, after, verbatim in rows:
+        covered = min(turn - 1, settings.rag_history_turns) - before.dropped.get("history", 0)
+        print(f"{turn:>5}{raw:>12}{before.tokens['history']:>8}{covered:>8}"
+              f"{after.tokens['summary'] + after.tokens['history']:>8}{after.tokens['summary']:>9}{verbatim:>10}{turn - 1:>8}"
+              f"{before.tokens['total']:>12}/{after.tokens['total']}")
+    print(f"\nSummary LLM calls over {turns} turns: {summarizer.folds}")
+
+
+if __name__ == "__main__":
+    turns = int(sys.argv[sys.argv.index("--turns") + 1]) if "--turns" in sys.argv else 32
+    asyncio.run(main(turns, "--live-llm" in sys.argv))
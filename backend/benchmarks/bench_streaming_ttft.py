@@ -0,0 +1,54 @@
+# bench_streaming_ttft.py
+# Time to first token for the streaming pipeline vs time to full answer for the
+# blocking one, against a local fake streaming LLM (no Groq quota used).
+# Exits non-zero if streaming does not deliver the first token well before the end.
+# Run from backend/:  python -m benchmarks.bench_streaming_ttft
+import asyncio
+import sys
+import time
+
+from benchmarks.fakes import FakeChatModel, FakeSearchTool, install_fakes
+from app.services.rag import rag_service
+
+FIRST_TOKEN_LATENCY = 0.4
+TOKENS_PER_SECOND = 40.0
+ANSWER = " ".join(["APSIT offers admissions through the CAP rounds and institute level quota."] * 8)
+QUESTION = "How do admissions work at APSIT?"
+
+
+async def measure_stream():
+    started = time.perf_counter()
+    first_token, tokens = None, 0
+    async for _ in rag_service.astream_response_for_session(QUESTION, -1, 1):
+        if first_token is None:
+            first_token = time.perf_counter() - started
+        tokens += 1
+    return first_token, time.perf_counter() - started, tokens
+
+
+async def measure_blocking():
+    started = time.perf_counter()
+    await rag_service.aget_response_for_session(QUESTION, -1, 2)
+    return time.perf_counter() - started
+
+
+async def main():
+    llm = FakeChatModel(latency=FIRST_TOKEN_LATENCY, tokens_per_second=TOKENS_PER_SECOND, answer=ANSWER)
+    install_fakes(rag_service, llm, FakeSearchTool(latency=0.1))
+
+    ttft, stream_total, tokens = await measure_stream()
+    blocking_total = await measure_blocking()
+
+    print(f"streamed tokens:              {tokens}")
+    print(f"time to first token (stream): {ttft * 1000:8.0f} ms")
+    print(f"time to full answer (stream): {stream_total * 1000:8.0f} ms")
+    print(f"time to full answer (POST):   {blocking_total * 1000:8.0f} ms")
+
+    if ttft >= blocking_total / 2:
+        print("❌ first token is not arriving ahead of the full answer")
+        sys.exit(1)
+    print("✅ streaming delivers the first token ahead of the full answer")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
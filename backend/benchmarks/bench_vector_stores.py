@@ -0,0 +1,203 @@
+# bench_vector_stores.py
+# Chroma vs the FAISS vector store (flat fp32, flat fp16, HNSW fp16, IVF-PQ) on college_data child
+# chunks: search latency for precomputed query vectors, index size on disk, overlap of the top 10
+# with exact search, and memory of N read-only worker processes searching the same index.
+# RSS counts shared pages in every process; PSS splits them between the processes mapping them,
+# so a memory-mapped index shows up as a lower PSS per worker.
+# Run from backend/:  python -m benchmarks.bench_vector_stores [--workers 4] [--scale 1]
+#   --scale N          add N-1 perturbed copies of every chunk vector (memory differences show at ~100k)
+#   --fake-embeddings  use a deterministic fake model (checks the plumbing; overlap is meaningless)
+# Reads /proc, so this needs Linux.
+import os
+import sys
+import json
+import queue
+import shutil
+import statistics
+import tempfile
+import time
+import multiprocessing as mp
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.services.faiss_store import FaissVectorStore
+from app.services.knowledge_index import KnowledgeIndex
+
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), "golden_questions.json")
+COLLECTION = "bench"
+ROUNDS = 20  # passes over the golden questions per worker
+STORES = {
+    "chroma": None,
+    "faiss flat32": {"index_type": "flat", "dtype": "float32"},
+    "faiss flat16": {"index_type": "flat", "dtype": "float16"},
+    "faiss hnsw16": {"index_type": "hnsw", "dtype": "float16"},
+    "faiss ivfpq": {"index_type": "ivfpq", "pq_m": 48, "nprobe": 8},
+}
+
+
+class PrecomputedEmbeddings(Embeddings):
+    """Returns vectors computed up front, so building every store embeds nothing."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_documents(self, texts):
+        return [self.vectors[text] for text in texts]
+
+    def embed_query(self, text):
+        return self.vectors[text]
+
+
+def make_embeddings(fake):
+    if fake:
+        from langchain_community.embeddings import DeterministicFakeEmbedding
+        return DeterministicFakeEmbedding(size=768)
+    from app.config import settings
+    from app.services.embeddings import create_embeddings
+    return create_embeddings(settings.rag_embedding_backend)
+
+
+def load_corpus(embeddings, scale):
+    """Child chunks of college_data (ids, texts, metadatas, vectors), plus perturbed copies."""
+    splitter = KnowledgeIndex(None, persist_dir=tempfile.mkdtemp(prefix="bench_split_"))
+    ids, texts, metadatas = [], [], []
+    for rel_path in sorted(splitter._scan_sources()):
+        _, _, child_ids, children = splitter._split_file(rel_path)
+        ids += child_ids
+        texts += [c.page_content for c in children]
+        metadatas += [c.metadata for c in children]
+    shutil.rmtree(splitter.persist_dir, ignore_errors=True)
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    rng = np.random.default_rng(0)
+    all_ids, all_texts, all_meta, all_vectors = list(ids), list(texts), list(metadatas), [vectors]
+    for copy in range(1, scale):
+        noisy = vectors + rng.normal(scale=0.05, size=vectors.shape).astype(np.float32)
+        all_vectors.append(noisy / np.linalg.norm(noisy, axis=1, keepdims=True))
+        all_ids += [f"{i}#copy{copy}" for i in ids]
+        all_texts += [f"{t} [copy {copy}]" for t in texts]
+        all_meta += metadatas
+    return all_ids, all_texts, all_meta, np.concatenate(all_vectors)
+
+
+def build_store(name, options, directory, corpus):
+    ids, texts, metadatas, vectors = corpus
+    if options is None:
+        from langchain_community.vectorstores import Chroma
+        store = Chroma(collection_name=COLLECTION, persist_directory=directory)
+        batch = 5000
+        for start in range(0, len(ids), batch):
+            store._collection.add(ids=ids[start:start + batch], documents=texts[start:start + batch],
+                                  metadatas=metadatas[start:start + batch],
+                                  embeddings=vectors[start:start + batch].tolist())
+        return
+    store = FaissVectorStore(PrecomputedEmbeddings(dict(zip(texts, vectors.tolist()))), directory, **options)
+    store.add_texts(texts, metadatas, ids=ids)
+    store.save()
+
+
+def open_store(options, directory):
+    if options is None:
+        from langchain_community.vectorstores import Chroma
+        return Chroma(collection_name=COLLECTION, persist_directory=directory)
+    return FaissVectorStore(None, directory, read_only=True, **options)
+
+
+def rss_kb(pid=None):
+    values = {}
+    with open(f"/proc/{pid or 'self'}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0][:-1].lower()] = int(parts[1])
+    return values
+
+
+def worker_main(options, directory, query_vectors, results, start, release):
+    results.put(os.getpid())
+    start.wait()
+    store = open_store(options, directory)
+    latencies = []
+    for _ in range(ROUNDS):
+        for vector in query_vectors:
+            started = time.perf_counter()
+            store.similarity_search_by_vector(vector, k=10)
+            latencies.append((time.perf_counter() - started) * 1000)
+    top = [[doc.page_content for doc in store.similarity_search_by_vector(v, k=10)] for v in query_vectors]
+    results.put((os.getpid(), latencies, top))
+    release.wait()
+
+
+def run_workers(options, directory, query_vectors, workers):
+    ctx = mp.get_context("spawn")
+    results, start, release = ctx.Queue(), ctx.Event(), ctx.Event()
+    processes = [ctx.Process(target=worker_main, args=(options, directory, query_vectors, results, start, release))
+                 for _ in range(workers)]
+    for p in processes:
+        p.start()
+
+    def collect():
+        while True:
+            try:
+                return results.get(timeout=1)
+            except queue.Empty:
+                if any(p.exitcode not in (None, 0) for p in processes):
+                    raise RuntimeError("a worker failed")
+
+    # Both readings are taken while every worker is alive, so shared pages are split the same way
+    pids = [collect() for _ in processes]
+    before = {pid: rss_kb(pid) for pid in pids}
+    start.set()
+    outcomes = [collect() for _ in processes]
+    memory = [(before[pid], rss_kb(pid)) for pid, _, _ in outcomes]
+    release.set()
+    for p in processes:
+        p.join()
+    latencies = sorted(ms for _, worker_latencies, _ in outcomes for ms in worker_latencies)
+    return latencies, memory, outcomes[0][2]
+
+
+def dir_mb(directory):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(directory) for name in names) / 1024 / 1024
+
+
+def main(workers, scale, fake):
+    with open(GOLDEN_FILE, "r", encoding="utf-8") as f:
+        questions = [item["question"] for item in json.load(f)]
+    embeddings = make_embeddings(fake)
+    corpus = load_corpus(embeddings, scale)
+    query_vectors = [embeddings.embed_query(q) for q in questions]
+    print(f"\n{len(corpus[0])} vectors x {corpus[3].shape[1]} dims, {len(questions)} queries x {ROUNDS} rounds, "
+          f"{workers} workers\n")
+
+    print(f"{'store':<14}{'build s':>9}{'disk MB':>9}{'p50 ms':>8}{'p95 ms':>8}{'top10 overlap':>15}"
+          f"{'RSS MB/worker':>15}{'PSS MB/worker':>15}")
+    exact = None
+    for name, options in STORES.items():
+        directory = tempfile.mkdtemp(prefix="bench_store_")
+        try:
+            started = time.perf_counter()
+            build_store(name, options, directory, corpus)
+            build_s = time.perf_counter() - started
+            latencies, memory, top = run_workers(options, directory, query_vectors, workers)
+        finally:
+            disk = dir_mb(directory)
+            shutil.rmtree(directory, ignore_errors=True)
+        if exact is None and options is not None and options["index_type"] == "flat":
+            exact = top
+        overlap = "" if exact is None else f"{statistics.mean(len(set(a) & set(b)) / 10 for a, b in zip(top, exact)):.2f}"
+        rss = statistics.mean(after["rss"] - before["rss"] for before, after in memory) / 1024
+        pss = statistics.mean(after["pss"] - before["pss"] for before, after in memory) / 1024
+        print(f"{name:<14}{build_s:>9.1f}{disk:>9.1f}{statistics.median(latencies):>8.2f}"
+              f"{latencies[int(len(latencies) * 0.95) - 1]:>8.2f}{overlap:>15}{rss:>15.1f}{pss:>15.1f}")
+    print("\nMemory is the growth of each worker from before opening the store to after its queries. "
+          "Overlap is measured against faiss flat32 (exact search).")
+
+
+if __name__ == "__main__":
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else 4
+    scale = int(sys.argv[sys.argv.index("--scale") + 1]) if "--scale" in sys.argv else 1
+    main(workers, scale, "--fake-embeddings" in sys.argv)
@@ -0,0 +1,83 @@
+# eval_retrieval.py
+# Recall@k and per-query latency of dense-only, lexical-only (BM25) and hybrid (RRF) retrieval
+# on benchmarks/golden_questions.json. A retrieved parent chunk counts as relevant if it
+# contains one of the question's expected answer strings.
+# Run from backend/:  python -m benchmarks.eval_retrieval
+#   --fake-embeddings  use a deterministic fake model (checks the plumbing; dense scores are meaningless)
+import os
+import sys
+import json
+import shutil
+import statistics
+import tempfile
+import time
+
+from app.services.knowledge_index import KnowledgeIndex
+
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), "golden_questions.json")
+KS = (1, 3, 5)
+MODES = ("dense", "lexical", "hybrid")
+
+
+def make_embeddings(fake):
+    if fake:
+        from langchain_community.embeddings import DeterministicFakeEmbedding
+        return DeterministicFakeEmbedding(size=768)
+    from langchain_community.embeddings import SentenceTransformerEmbeddings
+    return SentenceTransformerEmbeddings(model_name="BAAI/bge-base-en-v1.5")
+
+
+def first_relevant_rank(docs, answers):
+    answers = [a.lower() for a in answers]
+    for rank, doc in enumerate(docs, start=1):
+        text = doc.page_content.lower()
+        if any(answer in text for answer in answers):
+            return rank
+    return None
+
+
+def evaluate(index, mode, golden):
+    retriever = index.as_retriever(mode, k=max(KS))
+    retriever.get_relevant_documents("warm up")
+    ranks, latencies, misses = [], [], []
+    for item in golden:
+        started = time.perf_counter()
+        docs = retriever.get_relevant_documents(item["question"])
+        latencies.append((time.perf_counter() - started) * 1000)
+        rank = first_relevant_rank(docs, item["answers"])
+        ranks.append(rank)
+        if rank is None:
+            misses.append(item["question"])
+    recall = {k: sum(1 for r in ranks if r is not None and r <= k) / len(golden) for k in KS}
+    latencies.sort()
+    return recall, statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1], misses
+
+
+def run_eval(fake=False):
+    with open(GOLDEN_FILE, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+
+    workdir = tempfile.mkdtemp(prefix="eval_retrieval_")
+    try:
+        index = KnowledgeIndex(make_embeddings(fake), persist_dir=workdir)
+        index.sync()
+
+        header = "".join(f"{f'recall@{k}':>11}" for k in KS)
+        print(f"\n{len(golden)} questions\n")
+        print(f"{'mode':<10}{header}{'p50 ms':>10}{'p95 ms':>10}")
+        all_misses = {}
+        for mode in MODES:
+            recall, p50, p95, misses = evaluate(index, mode, golden)
+            cells = "".join(f"{recall[k]:>11.2f}" for k in KS)
+            print(f"{mode:<10}{cells}{p50:>10.1f}{p95:>10.1f}")
+            all_misses[mode] = misses
+
+        for mode, misses in all_misses.items():
+            if misses:
+                print(f"\nMissed by {mode} (top {max(KS)}): " + "; ".join(misses))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run_eval(fake="--fake-embeddings" in sys.argv)
@@ -0,0 +1,287 @@
+import sys
+import json
+import time
+import random
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import AsyncIterator, List, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from app.services.session_history import SessionMemory
+
+
+CANNED_PARAGRAPH = (
+    "APSIT admits students through the CAP rounds run by the State CET Cell and the institute level quota. "
+    "Keep your MHT-CET or JEE scorecard, mark sheets, leaving certificate and domicile certificate ready, "
+    "and check the DTE website after every round for your allotment."
+)
+
+
+def canned_answer(words: int) -> str:
+    """A plausible answer of exactly `words` words, for fakes that need a realistic length."""
+    base = CANNED_PARAGRAPH.split(" ")
+    return " ".join(base[i % len(base)] for i in range(max(1, words)))
+
+
+def jittered(latency: float, jitter: float, rng: random.Random) -> float:
+    """`latency` as the median of a lognormal distribution with shape `jitter` (0: always `latency`)."""
+    return latency * rng.lognormvariate(0, jitter) if jitter else latency
+
+
+class FakeChatModel:
+    """Stand-in for ChatGroq used by the benchmarks and load tests.
+
+    `latency` is the time to first token (the median, if `jitter` is set;
+    see `jittered`); the rest of the answer is produced at
+    `tokens_per_second`, word by word. With `max_concurrency`, async calls
+    beyond that many wait for a free slot, like requests queued behind a
+    provider's rate limit. With `fail_after`, streams break off with a
+    ConnectionError after that many tokens, like a dropped connection.
+    """
+
+    def __init__(self, latency: float = 1.0, tokens_per_second: float = 50.0,
+                 answer: str = "This is a canned answer from the fake LLM.", max_concurrency: int = 0,
+                 jitter: float = 0.0, seed: int = 0, fail_after: Optional[int] = None):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.answer = answer
+        self.jitter = jitter
+        self.fail_after = fail_after
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._capacity = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+    def _tokens(self) -> List[str]:
+        words = self.answer.split(" ")
+        return [words[0]] + [" " + word for word in words[1:]]
+
+    def _first_token_time(self) -> float:
+        return jittered(self.latency, self.jitter, self._random)
+
+    def _generation_time(self) -> float:
+        return self._first_token_time() + (len(self._tokens()) - 1) / self.tokens_per_second
+
+    def _usage(self, prompt) -> dict:
+        # Roughly what a provider would bill: ~4 characters per prompt token, one token per word
+        input_tokens = (len(str(prompt)) + 3) // 4
+        output_tokens = len(self._tokens())
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens}
+
+    def invoke(self, prompt, **kwargs) -> AIMessage:
+        self.calls += 1
+        time.sleep(self._generation_time())
+        return AIMessage(content=self.answer, usage_metadata=self._usage(prompt))
+
+    async def _acquire(self):
+        if self._capacity is not None:
+            await self._capacity.acquire()
+
+    def _release(self):
+        if self._capacity is not None:
+            self._capacity.release()
+
+    async def ainvoke(self, prompt, **kwargs) -> AIMessage:
+        self.calls += 1
+        await self._acquire()
+        try:
+            await asyncio.sleep(self._generation_time())
+        finally:
+            self._release()
+        return AIMessage(content=self.answer, usage_metadata=self._usage(prompt))
+
+    async def astream(self, prompt, **kwargs) -> AsyncIterator[AIMessageChunk]:
+        self.calls += 1
+        await self._acquire()
+        try:
+            await asyncio.sleep(self._first_token_time())
+            for i, token in enumerate(self._tokens()):
+                if i == self.fail_after:
+                    raise ConnectionError(f"fake LLM stream dropped after {i} tokens")
+                if i:
+                    await asyncio.sleep(1 / self.tokens_per_second)
+                yield AIMessageChunk(content=token)
+            yield AIMessageChunk(content="", usage_metadata=self._usage(prompt))
+        finally:
+            self._release()
+
+
+class FakeSearchTool:
+    """Stand-in for DuckDuckGoSearchRun with a fixed (or, with `jitter`, lognormal) round-trip latency."""
+
+    def __init__(self, latency: float = 0.5, result: str = "APSIT, Thane. Result snippet from the fake search.",
+                 jitter: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.result = result
+        self.jitter = jitter
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    def run(self, query: str, **kwargs) -> str:
+        self.calls += 1
+        time.sleep(jittered(self.latency, self.jitter, self._random))
+        return self.result
+
+
+class FakeGroqServer:
+    """Local HTTP server speaking Groq's chat-completions API, with injectable latency and errors.
+
+    Point a ChatGroq at `base_url`. Each request waits `latency` seconds;
+    with probability `error_rate` (or always, while `down`) it gets an
+    `error_status` reply instead, and with probability `hang_rate` it waits
+    `hang` seconds first, to trip client timeouts. Streaming requests get
+    the answer as server-sent events, one word per `token_interval`.
+    `connections` counts accepted TCP connections, so keep-alive reuse
+    shows up as connections < requests.
+    """
+
+    def __init__(self, latency: float = 0.2, error_rate: float = 0.0, error_status: int = 503,
+                 hang_rate: float = 0.0, hang: float = 30.0, token_interval: float = 0.0,
+                 answer: str = "This is a canned answer from the fake Groq server.", seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.hang_rate = hang_rate
+        self.hang = hang
+        self.token_interval = token_interval
+        self.answer = answer
+        self.down = False
+        self.requests = 0
+        self.errors = 0
+        self.connections = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGroqServer":
+        fake = self
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+
+            def process_request(self, request, client_address):
+                with fake._lock:
+                    fake.connections += 1
+                super().process_request(request, client_address)
+
+            def handle_error(self, request, client_address):
+                # Clients that timed out and hung up are expected here; anything else is reported
+                if not isinstance(sys.exc_info()[1], ConnectionError):
+                    super().handle_error(request, client_address)
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                fake._handle(self, body)
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _plan(self):
+        with self._lock:
+            self.requests += 1
+            fail = self.down or self._random.random() < self.error_rate
+            hang = self._random.random() < self.hang_rate
+            if fail:
+                self.errors += 1
+        return fail, hang
+
+    def _handle(self, handler: BaseHTTPRequestHandler, body: dict):
+        fail, hang = self._plan()
+        time.sleep(self.hang if hang else self.latency)
+        if fail:
+            payload = json.dumps({"error": {"message": "injected failure", "type": "server_error"}}).encode()
+            handler.send_response(self.error_status)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(payload)))
+            handler.end_headers()
+            handler.wfile.write(payload)
+            return
+
+        model = body.get("model", "fake")
+        if not body.get("stream"):
+            payload = json.dumps({
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": self.answer},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": len(self.answer.split()), "total_tokens": 1},
+            }).encode()
+            handler.send_response(200)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(payload)))
+            handler.end_headers()
+            handler.wfile.write(payload)
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+        words = self.answer.split(" ")
+        for i, word in enumerate(words + [None]):
+            if i and self.token_interval:
+                time.sleep(self.token_interval)
+            delta = {"content": word if i == 0 else " " + word} if word is not None else {}
+            chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [{"index": 0, "delta": delta,
+                                                  "finish_reason": None if word is not None else "stop"}]}
+            self._write_chunk(handler, f"data: {json.dumps(chunk)}\n\n")
+        self._write_chunk(handler, "data: [DONE]\n\n")
+        handler.wfile.write(b"0\r\n\r\n")
+
+    @staticmethod
+    def _write_chunk(handler: BaseHTTPRequestHandler, text: str):
+        data = text.encode()
+        handler.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        handler.wfile.flush()
+
+
+class FakeSessionHistory:
+    """Stand-in for SessionHistoryStore without a database; every question is a first turn."""
+
+    async def get_memory(self, user_id: int, session_id: int) -> SessionMemory:
+        return SessionMemory()
+
+    async def get_recent_turns(self, user_id: int, session_id: int):
+        return []
+
+    def record_turn(self, user_id: int, session_id: int, message_id: int, question: str, answer: str):
+        pass
+
+    def pending_turns(self, user_id: int, session_id: int):
+        return 0
+
+    def forget(self, user_id: int, session_id: int):
+        pass
+
+
+def install_fakes(rag, llm: FakeChatModel, search_tool: FakeSearchTool):
+    """Point a RAGService at the fakes, with its caches and search rate limit out of the way
+    so every request pays for the full pipeline. The fake LLM goes behind the same retries and
+    circuit breaker as Groq; keep your own reference to it for its `calls`."""
+    rag.llm = rag._resilient(llm, "answer")
+    rag.search_tool = search_tool
+    rag.session_history = FakeSessionHistory()
+    rag.answer_cache.threshold = 2.0  # cosine similarity never exceeds 1
+    rag.web_search.cache.maxsize = 0
+    rag.web_search.limiter.rate = rag.web_search.limiter.capacity = 1e9
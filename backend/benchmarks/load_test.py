@@ -0,0 +1,251 @@
+# load_test.py
+# Scripted multi-user load test of the chat API: each virtual user logs in, starts a chat session
+# with a first question, asks a few follow-ups (with think time in between), then lists its
+# sessions and opens the one it used. Reports requests/s and p50/p95/p99 latency per endpoint
+# (and time to first token for streamed answers), and can gate on a saved baseline.
+# By default it starts its own uvicorn with the local Groq and DuckDuckGo stand-ins
+# (RAG_LLM_BACKEND=fake, RAG_SEARCH_BACKEND=fake; latency set by the RAG_FAKE_* settings), so no
+# quota is used and apsit.edu.in is not hit. The database is the configured DATABASE_URL; virtual
+# users are registered as loadtest-<n>@example.com.
+# Run from backend/:  python -m benchmarks.load_test [--users 20] [--followups 3] [--stream]
+#   --url http://host:port       test a server that is already running instead
+#   --output report.json         save the report (e.g. as the baseline on the main branch)
+#   --baseline report.json       exit 1 if an endpoint's p95 or error rate regressed beyond --tolerance
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import statistics
+import subprocess
+from collections import defaultdict
+
+import httpx
+
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), "golden_questions.json")
+FOLLOW_UPS = [
+    "What documents do I need for that?",
+    "And what are the fees?",
+    "Is there a hostel near the campus?",
+    "Who should I contact about it?",
+    "Can you explain that in more detail?",
+]
+PASSWORD = "loadtest-password"
+FAKE_ENV = {"RAG_LLM_BACKEND": "fake", "RAG_SEARCH_BACKEND": "fake"}
+SLACK_SECONDS = 0.05  # absolute p95 slack on top of --tolerance, so tiny endpoints don't flap
+
+
+def arg(name, default, cast=str):
+    return cast(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+
+class Recorder:
+    """Latency samples and errors per endpoint."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint, seconds, ok=True):
+        self.samples[endpoint].append(seconds)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def report(self, duration):
+        endpoints = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            endpoints[endpoint] = {
+                "count": len(ordered),
+                "errors": self.errors[endpoint],
+                "error_rate": self.errors[endpoint] / len(ordered),
+                "rps": len(ordered) / duration,
+                "p50": statistics.median(ordered),
+                "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+            }
+        return endpoints
+
+
+async def timed(recorder, endpoint, request):
+    started = time.perf_counter()
+    try:
+        response = await request
+    except httpx.HTTPError:
+        recorder.record(endpoint, time.perf_counter() - started, ok=False)
+        return None
+    recorder.record(endpoint, time.perf_counter() - started, ok=response.is_success)
+    return response if response.is_success else None
+
+
+async def streamed_answer(client, recorder, endpoint, url, question, headers):
+    """POST to a streaming endpoint; records total time and time to the first token. Returns the session id."""
+    started = time.perf_counter()
+    first_token, session_id, ok = None, None, False
+    try:
+        async with client.stream("POST", url, json={"question": question}, headers=headers) as response:
+            ok = response.is_success
+            event = None
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    if event == "token" and first_token is None:
+                        first_token = time.perf_counter() - started
+                    elif event == "session":
+                        session_id = json.loads(line[len("data: "):])["id"]
+                    elif event == "error":
+                        ok = False
+    except httpx.HTTPError:
+        ok = False
+    recorder.record(endpoint, time.perf_counter() - started, ok)
+    if first_token is not None:
+        recorder.record(f"{endpoint} (first token)", first_token)
+    return session_id, ok
+
+
+async def virtual_user(client, recorder, n, questions, followups, think, stream, start_delay):
+    rng = random.Random(n)
+    await asyncio.sleep(start_delay)
+    email = f"loadtest-{n}@example.com"
+    await client.post("/auth/register", json={"username": f"loadtest{n}", "email": email, "password": PASSWORD})
+    login = await timed(recorder, "POST /auth/login",
+                        client.post("/auth/login", json={"email": email, "password": PASSWORD}))
+    if login is None:
+        return
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    first_question = rng.choice(questions)
+    if stream:
+        session_id, ok = await streamed_answer(client, recorder, "POST /chat-sessions/start/stream",
+                                               "/chat-sessions/start/stream", first_question, headers)
+    else:
+        response = await timed(recorder, "POST /chat-sessions/start",
+                               client.post("/chat-sessions/start", json={"question": first_question}, headers=headers))
+        session_id = response.json()["session"]["id"] if response is not None else None
+    if session_id is None:
+        return
+
+    for question in rng.sample(FOLLOW_UPS, min(followups, len(FOLLOW_UPS))):
+        await asyncio.sleep(rng.expovariate(1 / think) if think else 0)
+        if stream:
+            await streamed_answer(client, recorder, "POST /chat-sessions/{id}/messages/stream",
+                                  f"/chat-sessions/{session_id}/messages/stream", question, headers)
+        else:
+            await timed(recorder, "POST /chat-sessions/{id}/messages",
+                        client.post(f"/chat-sessions/{session_id}/messages", json={"question": question}, headers=headers))
+
+    await timed(recorder, "GET /chat-sessions", client.get("/chat-sessions", headers=headers))
+    await timed(recorder, "GET /chat-sessions/{id}", client.get(f"/chat-sessions/{session_id}", headers=headers))
+
+
+def start_server():
+    """uvicorn on a free port with the fake backends; returns (process, base URL)."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    env = {**os.environ, **FAKE_ENV}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 300  # the embedding model and index load at startup
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{url}/health", timeout=1).is_success:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become healthy within 300s")
+
+
+def compare(report, baseline, tolerance):
+    """Endpoints whose p95 or error rate got worse than the baseline allows."""
+    failures = []
+    for endpoint, base in baseline["endpoints"].items():
+        current = report["endpoints"].get(endpoint)
+        if current is None:
+            failures.append(f"{endpoint}: missing from this run")
+            continue
+        allowed = base["p95"] * (1 + tolerance) + SLACK_SECONDS
+        if current["p95"] > allowed:
+            failures.append(f"{endpoint}: p95 {current['p95']:.3f}s > {allowed:.3f}s (baseline {base['p95']:.3f}s)")
+        if current["error_rate"] > base["error_rate"] + 0.01:
+            failures.append(f"{endpoint}: error rate {current['error_rate']:.1%} (baseline {base['error_rate']:.1%})")
+    return failures
+
+
+async def run(url, users, followups, ramp, think, stream):
+    with open(GOLDEN_FILE, "r", encoding="utf-8") as f:
+        questions = [item["question"] for item in json.load(f)]
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=users * 2, max_keepalive_connections=users * 2)
+    async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            virtual_user(client, recorder, n, questions, followups, think, stream, ramp * n / users)
+            for n in range(users)
+        ])
+        duration = time.perf_counter() - started
+    return {
+        "config": {"users": users, "followups": followups, "ramp_s": ramp, "think_s": think, "stream": stream},
+        "duration_s": duration,
+        "endpoints": recorder.report(duration),
+    }
+
+
+def main():
+    users = arg("--users", 20, int)
+    followups = arg("--followups", 3, int)
+    ramp = arg("--ramp", 10.0, float)
+    think = arg("--think", 2.0, float)
+    stream = "--stream" in sys.argv
+    url = arg("--url", None)
+
+    process = None
+    if url is None:
+        process, url = start_server()
+        print(f"started uvicorn with fake Groq/DuckDuckGo at {url}")
+    try:
+        report = asyncio.run(run(url, users, followups, ramp, think, stream))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print(f"\n{users} users x (login, start, {followups} follow-ups, list, open) in {report['duration_s']:.1f}s"
+          f"{', streaming' if stream else ''}\n")
+    print(f"{'endpoint':<56}{'count':>7}{'errors':>8}{'req/s':>8}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}")
+    for endpoint, row in report["endpoints"].items():
+        print(f"{endpoint:<56}{row['count']:>7}{row['errors']:>8}{row['rps']:>8.2f}"
+              f"{row['p50']:>8.3f}{row['p95']:>8.3f}{row['p99']:>8.3f}")
+
+    output = arg("--output", None)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nreport saved to {output}")
+
+    baseline_path = arg("--baseline", None)
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        failures = compare(report, baseline, arg("--tolerance", 0.2, float))
+        if failures:
+            print("\n❌ Regressions against the baseline:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print("\n✅ No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
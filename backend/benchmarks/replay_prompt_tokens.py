@@ -0,0 +1,125 @@
+# replay_prompt_tokens.py
+# Replays stored questions (chat_messages, with each session's preceding turns as history)
+# through retrieval and compares prompt sizes: the old unbounded f-string vs PromptBuilder.
+# Falls back to benchmarks/golden_questions.json (no history) when there are no stored messages.
+# Web results are a fixed sample of DuckDuckGo-sized output unless --live-web is given.
+# Run from backend/:  python -m benchmarks.replay_prompt_tokens [--limit 200] [--live-web]
+import os
+import sys
+import json
+import asyncio
+import statistics
+from collections import defaultdict
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import async_session, engine
+from app.models.chat_session import ChatMessage
+from app.models import chat, password_reset_token, signup_otp_token, user  # noqa: F401  (mappers ChatSession relates to)
+from app.services.rag import rag_service
+
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), "golden_questions.json")
+SAMPLE_WEB_RESULT = " ".join([
+    "A. P. Shah Institute of Technology (APSIT), Thane, is affiliated to the University of Mumbai and approved by AICTE.",
+    "APSIT offers B.E. programs in Computer, IT, Civil, Mechanical, CSE (AI & ML) and CSE (Data Science).",
+    "Admissions are through the CAP rounds conducted by the State CET Cell, Maharashtra, and the institute level quota.",
+    "The campus is located on Ghodbunder Road, Kasarvadavali, Thane West, opposite Hypercity Mall.",
+    "APSIT is a Jain religious minority institute run by the Parshvanath Charitable Trust.",
+] * 2)
+
+
+def legacy_prompt(question, history_list, db_chunks, web_context):
+    """The prompt as RAGService built it before PromptBuilder: everything, unbounded."""
+    if history_list:
+        style_instruction = "Strictly DO NOT greet. Answer directly."
+        history_text = "\n".join([f"User: {msg['question']}\nYou: {msg['answer']}" for msg in history_list])
+    else:
+        style_instruction = "Start with a short, friendly greeting."
+        history_text = "No previous conversation."
+    db_context = "\n".join(db_chunks)
+    return f"""You are a smart senior student at APSIT.
+
+        **CRITICAL INSTRUCTIONS:**
+        1. **Conflict Rule:** If Source 1 and Source 2 disagree on a person's name/role, **Source 1 (Web) is the TRUTH**.
+        2. **HOD Check:** When checking for "HOD" or "Head of Department", look for the exact name listed next to that title in Source 1. Ignore "Assistant Professor" names unless they are explicitly called HOD.
+        3. **Correction:** If the user corrects you (e.g., "Mugdha is HOD"), trust the user and double-check Source 1.
+        4. **Persona:** {style_instruction} Be helpful and confident.
+
+        **CONTEXT:**
+        History: {history_text}
+        User Question: {question}
+
+        **INFORMATION:**
+
+        [SOURCE 1: LIVE WEB SEARCH (HIGHEST PRIORITY)]:
+        {web_context}
+
+        [SOURCE 2: INTERNAL DATABASE (SECONDARY)]:
+        {db_context}
+
+
+        **ANSWER:**"""
+
+
+async def load_stored_questions(limit):
+    """(question, history) pairs from chat_messages, history = the session's previous turns."""
+    async with async_session() as db:
+        rows = (await db.execute(
+            select(ChatMessage.chat_session_id, ChatMessage.question, ChatMessage.answer)
+            .order_by(ChatMessage.id.desc()).limit(limit)
+        )).all()
+    sessions = defaultdict(list)
+    replay = []
+    for session_id, question, answer in reversed(rows):
+        replay.append((question, list(sessions[session_id][-settings.rag_history_turns:])))
+        sessions[session_id].append({"question": question, "answer": answer})
+    return replay
+
+
+def percentiles(values):
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(len(values) * q))]
+    return f"{statistics.median(values):>8.0f}{pick(0.9):>8}{pick(0.99):>8}{values[-1]:>8}"
+
+
+async def main(limit, live_web):
+    try:
+        replay = await load_stored_questions(limit)
+    except Exception as e:
+        print(f"Could not read chat_messages ({e})")
+        replay = []
+    finally:
+        await engine.dispose()
+    if not replay:
+        with open(GOLDEN_FILE, "r", encoding="utf-8") as f:
+            replay = [(item["question"], []) for item in json.load(f)]
+        print("No stored messages, replaying the golden questions without history")
+
+    builder = rag_service.prompt_builder
+    counter = builder.counter
+    before, after = [], []
+    sections = defaultdict(list)
+    trimmed = 0
+    for question, history in replay:
+        db_chunks = rag_service._retrieve_context(question)
+        web = rag_service._perform_web_search(question) if live_web else SAMPLE_WEB_RESULT
+        before.append(counter.count(legacy_prompt(question, history, db_chunks, web)))
+        built = builder.build(question, history, db_chunks, web)
+        after.append(built.tokens["total"])
+        for name, count in built.tokens.items():
+            sections[name].append(count)
+        trimmed += bool(built.dropped or built.truncated)
+
+    print(f"\n{len(replay)} prompts, tokenizer: {counter.name}, budgets: {builder.budgets}\n")
+    print(f"{'prompt':<10}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>8}")
+    print(f"{'before':<10}{percentiles(before)}")
+    print(f"{'after':<10}{percentiles(after)}")
+    print(f"\nMean tokens per section after: " + ", ".join(
+        f"{name}={statistics.mean(counts):.0f}" for name, counts in sections.items()))
+    print(f"Prompts trimmed to fit the budget: {trimmed}/{len(replay)}")
+
+
+if __name__ == "__main__":
+    limit = int(sys.argv[sys.argv.index("--limit") + 1]) if "--limit" in sys.argv else 200
+    asyncio.run(main(limit, "--live-web" in sys.argv))
@@ -0,0 +1,61 @@
+# import_conversation_memory.py
+# One-time import of the legacy conversation_memory.pkl into chat_messages.
+# Session history is now read from chat_messages, so turns that only exist in the
+# pickle would otherwise be lost. Turns already present (same question and answer)
+# and sessions that no longer exist are skipped.
+# Usage (from backend/):  python import_conversation_memory.py [--dry-run] [path]
+import sys
+import pickle
+import asyncio
+
+from sqlalchemy import select
+
+from app.database import async_session, engine
+from app.models import user, chat, password_reset_token  # noqa: F401  (mapped for User's relationships)
+from app.models.chat_session import ChatSession, ChatMessage
+
+
+async def import_memory(path: str, dry_run: bool):
+    with open(path, 'rb') as f:
+        memory = pickle.load(f)
+
+    imported = skipped_turns = missing_sessions = 0
+    async with async_session() as db:
+        for user_id, sessions in memory.items():
+            for session_id, turns in sessions.items():
+                session = await db.get(ChatSession, session_id)
+                if session is None or session.user_id != user_id:
+                    missing_sessions += 1
+                    continue
+
+                result = await db.execute(
+                    select(ChatMessage.question, ChatMessage.answer)
+                    .filter(ChatMessage.chat_session_id == session_id)
+                )
+                existing = set(result.all())
+
+                for turn in turns:
+                    if (turn['question'], turn['answer']) in existing:
+                        skipped_turns += 1
+                        continue
+                    db.add(ChatMessage(
+                        chat_session_id=session_id,
+                        user_id=user_id,
+                        question=turn['question'],
+                        answer=turn['answer']
+                    ))
+                    imported += 1
+
+        if dry_run:
+            await db.rollback()
+        else:
+            await db.commit()
+
+    await engine.dispose()
+    print(f"{'Would import' if dry_run else '✅ Imported'} {imported} turns "
+          f"({skipped_turns} already in chat_messages, {missing_sessions} sessions no longer exist)")
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--dry-run"]
+    asyncio.run(import_memory(args[0] if args else "conversation_memory.pkl", "--dry-run" in sys.argv))
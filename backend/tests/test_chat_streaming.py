@@ -0,0 +1,139 @@
+# Tests for the streaming chat endpoints that need no network: Groq, DuckDuckGo and the embedding
+# model are fakes, prompt tokens are estimated, and the database and index are built in a temporary
+# directory (backend/chroma_db_final is left alone).
+# Run from backend/:  pip install pytest aiosqlite && python -m pytest tests
+import os
+import json
+import tempfile
+
+WORK_DIR = tempfile.mkdtemp(prefix="test_chat_streaming_")
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///" + os.path.join(WORK_DIR, "test.db")
+os.environ["RAG_INDEX_DIR"] = os.path.join(WORK_DIR, "index")
+os.environ["RAG_LLM_BACKEND"] = "fake"
+os.environ["RAG_SEARCH_BACKEND"] = "fake"
+os.environ["RAG_EMBEDDING_BACKEND"] = "fake"
+os.environ["RAG_PROMPT_TOKENIZER"] = ""
+os.environ["RAG_RETRIEVAL_MODE"] = "local"
+os.environ["RAG_INDEX_READ_ONLY"] = "false"
+os.environ["DEBUG_ENDPOINTS_ENABLED"] = "true"
+for name in ("GROQ_API_KEY", "JWT_SECRET", "MAIL_USERNAME", "MAIL_PASSWORD", "MAIL_SERVER"):
+    os.environ.setdefault(name, "test")
+os.environ.setdefault("MAIL_FROM", "test@example.com")
+os.environ.setdefault("MAIL_PORT", "587")
+os.environ.setdefault("MAIL_TLS", "false")
+os.environ.setdefault("MAIL_SSL", "false")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import init_db
+from app.main import app
+from app.services.admission import admission
+from app.services.rag import rag_service
+from benchmarks.fakes import FakeChatModel, FakeSearchTool, install_fakes
+
+ANSWER = "The library is open from 9 am to 5 pm on working days."
+QUESTION = "What are the library timings?"
+
+
+def read_events(response):
+    """(event, data) pairs of a Server-Sent Events body, checking the framing of every event."""
+    assert response.headers["content-type"].startswith("text/event-stream")
+    body = response.read().decode()
+    assert body.endswith("\n\n")
+    events = []
+    for block in body[:-2].split("\n\n"):
+        event, data = block.split("\n")
+        assert event.startswith("event: ") and data.startswith("data: ")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def stream(client, path, headers, question=QUESTION):
+    with client.stream("POST", path, json={"question": question}, headers=headers) as response:
+        assert response.status_code == 200
+        return read_events(response)
+
+
+def saved_answers(client, session_id, headers):
+    response = client.get(f"/chat-sessions/{session_id}", headers=headers)
+    assert response.status_code == 200
+    return [message["answer"] for message in response.json()["messages"]]
+
+
+@pytest.fixture(scope="module")
+def client():
+    install_fakes(rag_service, FakeChatModel(latency=0, tokens_per_second=1000, answer=ANSWER),
+                  FakeSearchTool(latency=0))
+    with TestClient(app) as client:
+        client.portal.call(init_db)
+        yield client
+
+
+@pytest.fixture(scope="module")
+def headers(client):
+    credentials = {"username": "streamer", "email": "streamer@example.com", "password": "secret"}
+    assert client.post("/auth/register", json=credentials).status_code == 200
+    response = client.post("/auth/login", json={"email": credentials["email"], "password": credentials["password"]})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_start_stream_sends_session_tokens_then_done(client, headers):
+    events = stream(client, "/chat-sessions/start/stream", headers)
+
+    names = [name for name, _ in events]
+    assert names[0] == "session" and names[-1] == "done"
+    assert set(names[1:-1]) == {"token"}
+
+    session, done = events[0][1], events[-1][1]
+    tokens = "".join(data["token"] for name, data in events if name == "token")
+    assert tokens == ANSWER
+    assert done["message"]["question"] == QUESTION
+    assert done["message"]["answer"] == ANSWER
+    assert done["time_to_first_token_ms"] is not None
+    assert saved_answers(client, session["id"], headers) == [ANSWER]
+    assert admission.in_flight == 0
+
+
+def test_follow_up_stream_appends_to_session(client, headers):
+    session_id = stream(client, "/chat-sessions/start/stream", headers)[0][1]["id"]
+
+    events = stream(client, f"/chat-sessions/{session_id}/messages/stream", headers, "Is it open on Saturdays?")
+
+    assert [name for name, _ in events] == ["token"] * len(events[:-1]) + ["done"]
+    assert events[-1][1]["message"]["question"] == "Is it open on Saturdays?"
+    assert saved_answers(client, session_id, headers) == [ANSWER, ANSWER]
+    assert admission.in_flight == 0
+
+
+def test_answer_cut_off_mid_stream_sends_error_event_and_saves_nothing(client, headers, monkeypatch):
+    session_id = stream(client, "/chat-sessions/start/stream", headers)[0][1]["id"]
+
+    failing = FakeChatModel(latency=0, tokens_per_second=1000, answer=ANSWER, fail_after=3)
+    monkeypatch.setattr(rag_service, "llm", rag_service._resilient(failing, "answer"))
+    events = stream(client, f"/chat-sessions/{session_id}/messages/stream", headers, "Is it open on Sundays?")
+
+    assert [name for name, _ in events] == ["token", "token", "token", "error"]
+    assert "".join(data["token"] for _, data in events[:-1]) == "The library is"
+    assert events[-1][1]["detail"] == "The answer was interrupted. Please ask again."
+    assert saved_answers(client, session_id, headers) == [ANSWER]
+    assert admission.in_flight == 0
+
+
+def test_unknown_session_is_rejected_before_streaming(client, headers):
+    response = client.post("/chat-sessions/999999/messages/stream", json={"question": QUESTION}, headers=headers)
+
+    assert response.status_code == 404
+    assert admission.in_flight == 0
+
+
+def test_knowledge_base_refresh_keeps_cached_answers_when_nothing_changed(client, monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(rag_service.answer_cache, "invalidate", lambda: invalidated.append(True))
+    version = rag_service.kb_version
+
+    response = client.post("/debug/knowledge-base/refresh")
+
+    assert response.status_code == 200
+    assert response.json() == {"kb_version": version}
+    assert invalidated == []